@@ -1,369 +1,483 @@
+import os
+import weakref
+from functools import partial
+from urllib.parse import quote
+
 import dash
-from dash import dcc, html
+from dash import dash_table, dcc, html
+from dash.dash_table import FormatTemplate
+from dash.dash_table.Format import Format, Group, Scheme
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output
-import pandas as pd
-from datetime import datetime, timedelta
-import plotly.express as px
-
-# Carregar o arquivo Excel
-file_path = 'BASE BI CONTRATOS.xlsx'
-xls = pd.ExcelFile(file_path)
-
-# Carregar as abas relevantes
-analise_df = pd.read_excel(xls, sheet_name='ANÁLISE', header=1)  # Definindo a segunda linha como cabeçalho
-contratos_df = pd.read_excel(xls, sheet_name='Contratos', header=0)  # Definindo a primeira linha como cabeçalho
-demanda_spt_df = pd.read_excel(xls, sheet_name='Demanda SPT')
-
-# Remover espaços em branco dos nomes das colunas
-analise_df.columns = [str(col).strip() for col in analise_df.columns]
-contratos_df.columns = [str(col).strip() for col in contratos_df.columns]
-
-# Filtrar e calcular métricas para o mês de junho
-total_contratos = len(analise_df['Doc.compra'].unique())
-valor_total_contratos = analise_df['Val.fixado'].astype(float).sum()
-valor_global_pendente = analise_df['ValGlPend.'].astype(float).sum()
-
-# Calcular valor consumido do contrato
-contratos_df['valor_consumido_contrato'] = contratos_df['Val.fixado'].astype(float) - contratos_df['ValGlPend.'].astype(float)
-
-# Converter a coluna de data 'FimValid/' para datetime
-contratos_df['FimValid/'] = pd.to_datetime(contratos_df['FimValid/'], format='%d/%m/%Y')
-
-# Definir o intervalo de 6 meses a partir da data atual
-data_atual = datetime.now()
-data_limite = data_atual + timedelta(days=180)
-
-# Filtrar contratos próximos ao vencimento de 6 meses
-contratos_prox_venc = analise_df[analise_df['FimValid/'] <= data_limite]
-
-# Filtrar contratos com consumo mínimo definido
-contratos_com_minimo = contratos_df[(contratos_df['Consumo Mínimo'].str.lower() == 'sim') | (contratos_df['Consumo Mínimo'] == 1)]
-total_contratos_com_minimo = contratos_com_minimo['Doc.compra'].nunique()
-
-# Aplicar a lógica da fórmula DAX em Python diretamente nos contratos com consumo mínimo
-contratos_df['Consumo Mínimo Atingido'] = contratos_df.apply(
-    lambda row: (
-        "Consumo mínimo atingido" if pd.notna(row['Valor Consumo Mínimo']) and float(row['valor_consumido_contrato']) >= float(row['Valor Consumo Mínimo'])
-        else "Consumo mínimo não atingido" if pd.notna(row['Valor Consumo Mínimo'])
-        else "Não tem valor mínimo"
-    ), axis=1
-)
+from dash.dependencies import Input, Output, State
+from datetime import date
+from flask import abort, jsonify
+
+# Só módulos leves na subida do servidor: pandas, plotly e os módulos de cálculo são
+# importados pelo atualizador, em segundo plano, junto com a primeira carga da planilha
+from atualizacao import AtualizadorDashboard, analise_no_momento
+from cache_http import configurar_cache_http
+from instrumentacao import CALLBACK, TIPO_CONTEUDO, formatar_metricas
+from pagina_espera import layout_espera, registrar_espera
+from unidades import (LIMITE_CACHE_MB, PREFIXO_UNIDADE, CacheUnidades, nome_unidade, planilhas_da_pasta,
+                      unidade_da_requisicao)
+
+# Carregar o arquivo Excel (DASH_PLANILHA aponta para outra planilha, como nos benchmarks)
+file_path = os.environ.get('DASH_PLANILHA', 'BASE BI CONTRATOS.xlsx')
+
+# Pasta com uma planilha por unidade de negócio (DASH_PLANILHAS), servidas pelo mesmo processo
+pasta_planilhas = os.environ.get('DASH_PLANILHAS')
+
+
+# O carregador guarda as abas lidas e só relê o arquivo quando ele muda
+def criar_carregador(caminho=file_path):
+    from carregamento import CarregadorPlanilha
+    return CarregadorPlanilha(caminho)
+
+
+# A cada carga nova, os indicadores do mês vão para o histórico ao lado do xlsx
+def criar_historico(caminho=file_path):
+    from historico import HistoricoMensal, caminho_historico
+    return HistoricoMensal(caminho_historico(caminho))
+
+
+# Leitura da planilha, indicadores e gráfico ficam numa thread em segundo plano;
+# o snapshot publicado por ela tem a análise descritiva, a figura e o horário.
+# O servidor não espera a primeira carga: até ela terminar, a página é a de espera
+def criar_atualizador(caminho):
+    atualizador = AtualizadorDashboard(partial(criar_carregador, caminho), historico=partial(criar_historico, caminho))
+    # Com 'python app.py', os processos que leem as abas (forkserver/spawn) executam este
+    # arquivo de novo como __mp_main__: lá nenhuma carga é iniciada
+    if __name__ == '__mp_main__':
+        return atualizador
+    return atualizador.iniciar(esperar=False)
+
+
+# Unidades carregadas, num cache LRU limitado pela memória dos dados (DASH_CACHE_MB)
+if pasta_planilhas:
+    unidades = CacheUnidades(
+        planilhas_da_pasta(pasta_planilhas), criar_atualizador, padrao=os.environ.get('DASH_UNIDADE_PADRAO'),
+        limite_bytes=float(os.environ.get('DASH_CACHE_MB', LIMITE_CACHE_MB)) * 2**20, pasta=pasta_planilhas,
+    )
+else:
+    unidades = CacheUnidades({nome_unidade(file_path): file_path}, criar_atualizador)
 
-# Filtrar contratos que atingiram o consumo mínimo
-contratos_minimo_atingido = contratos_df[
-    (contratos_df['Consumo Mínimo Atingido'] == 'Consumo mínimo atingido') &
-    (~contratos_df['Doc.compra'].isin(['JA10063222', 'JA10114401']))
-]
-total_contratos_minimo_atingido = contratos_minimo_atingido['Doc.compra'].nunique()
-
-# Materiais sem contrato
-materiais_sem_contrato = demanda_spt_df[demanda_spt_df['Contrato Vigente'] == "Não"].shape[0]
-
-# Filtrar os contratos por Farol SALDO
-contratos_abaixo_60 = analise_df[analise_df['Farol SALDO'].astype(float) < 0.6]['Doc.compra'].nunique()
-contratos_acima_60 = analise_df[(analise_df['Farol SALDO'].astype(float) >= 0.6) & (analise_df['Farol SALDO'].astype(float) < 0.8)]['Doc.compra'].nunique()
-contratos_acima_80 = analise_df[analise_df['Farol SALDO'].astype(float) >= 0.8]['Doc.compra'].nunique()
-
-# Análise descritiva de junho
-analise_descritiva = {
-    "Contratos Prox. Vencimento": contratos_prox_venc.shape[0],
-    "Consumo Abaixo de 60%": contratos_abaixo_60,
-    "Consumo Acima de 60%": contratos_acima_60,
-    "Consumo Acima de 80%": contratos_acima_80,
-    "Total de Contratos": total_contratos,
-    "Valor Total dos Contratos (Bi)": valor_total_contratos / 1e9,
-    "Valor Global Pendente (Bi)": valor_global_pendente / 1e9,
-    "Contratos com Consumo Mínimo": total_contratos_com_minimo,
-    "Consumo Mínimo Atingido": total_contratos_minimo_atingido,
-    "Materiais Sem Contrato": materiais_sem_contrato
-}
+# Atualizador da unidade padrão (sempre carregada): o do wsgi.py e dos benchmarks
+atualizador = unidades.obter()
 
-# Criar DataFrame para o gráfico
-data_consumo = pd.DataFrame({
-    'Consumo': ["Abaixo de 60%", "Entre 60% e 80%", "Acima de 80%"],
-    'Quantidade': [contratos_abaixo_60, contratos_acima_60, contratos_acima_80]
-})
-
-# Gráfico de barras para mostrar os consumos
-fig_consumo = px.bar(
-    data_consumo,
-    x='Consumo',
-    y='Quantidade',
-    title='Consumo',
-    color='Consumo',
-    color_discrete_map={
-        "Abaixo de 60%": "green",
-        "Entre 60% e 80%": "orange",
-        "Acima de 80%": "red"
-    }
-)
 
-fig_consumo.update_traces(
-    texttemplate='%{y}', 
-    textposition='inside', 
-    insidetextanchor='middle', 
-    textfont=dict(color='white', size=15, family='Arial', weight='bold'),
-    hovertemplate='<b>Consumo</b>: %{x}<br><b>Quantidade</b>: %{y}<extra></extra>'  
-)
+def unidade_atual(unidade=None):
+    """(unidade, atualizador) pedidos na requisição; KeyError se a unidade não existir."""
+    if unidade is None:
+        unidade = unidade_da_requisicao() or unidades.padrao
+    return unidade, unidades.obter(unidade)
 
-fig_consumo.update_layout(
-    showlegend=False,
-    xaxis_title=None,
-    yaxis_title=None,
-    plot_bgcolor='white',
-    paper_bgcolor='white',
-    title_font=dict(size=30, family='Arial', color='#005a8d', weight='bold'),
-    title_x=0.5,
-    xaxis=dict(tickfont=dict(size=15, family='Arial', color='black', weight='bold'))
-)
 
-fig_consumo.update_xaxes(
-    tickfont=dict(size=13, family='Arial', color='black', weight='bold')
-)
-
-# Data da última atualização
-data_ultima_atualizacao = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+def unidade_consultada():
+    """(unidade, atualizador) da requisição sem efeitos no cache: atualizador None se ela não está carregada."""
+    unidade = unidade_da_requisicao() or unidades.padrao
+    return unidade, unidades.consultar(unidade)
 
 # Layout do aplicativo Dash
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-
-app.layout = dbc.Container([
-    #Atualizar o arquivo em excel a  cada 5 minutos (para isso precisa ter callback um def para update o dashboard que fica lá no final)
-    dcc.Interval(
-        id='interval-component',
-        interval=5*60*1000,  
-        n_intervals=0
-    ),
-    dbc.Row([
-        dbc.Col([
-            html.H1("Para maiores informações veja pelo Power BI", style={'textAlign': 'center', 'marginTop': '10px', 'fontSize': '18px'}),
-        ], width=8, style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+# compress: respostas com brotli/gzip; o CSS do Bootstrap vem da pasta assets/ (sem CDN)
+# suppress_callback_exceptions: a página de espera e o dashboard têm componentes diferentes
+app = dash.Dash(__name__, compress=True, suppress_callback_exceptions=True)
+
+# Layout e /snapshot com ETag/Last-Modified da versão dos dados (304 quando não mudou)
+configurar_cache_http(app, unidade_consultada)
+
+# Filtros do dashboard: dimensão do cubo -> id do dropdown
+FILTROS = {
+    'Fornecedor': 'filtro_fornecedor',
+    'Família': 'filtro_familia',
+    'Grupo de mercadorias': 'filtro_grupo_mercadorias',
+    'Gestor': 'filtro_gestor',
+}
+
+# Cartões atualizados pelo callback no navegador: id do elemento -> indicador
+CARTOES = {
+    'total_contratos': 'Total de Contratos',
+    'contratos_prox_vencimento': 'Contratos Prox. Vencimento',
+    'valor_total_contratos': 'Valor Total dos Contratos (Bi)',
+    'valor_global_pendente': 'Valor Global Pendente (Bi)',
+    'total_contratos_com_minimo': 'Contratos com Consumo Mínimo',
+    'total_contratos_com_minimo_atingido': 'Consumo Mínimo Atingido',
+    'materiais_sem_contrato': 'Materiais Sem Contrato',
+}
+
+# Formato das colunas numéricas da tabela de detalhe (as demais vão como texto)
+_VALOR = Format(precision=2, scheme=Scheme.fixed, group=Group.yes, group_delimiter='.', decimal_delimiter=',')
+FORMATOS_DETALHE = {
+    'Farol SALDO': FormatTemplate.percentage(1),
+    'Val.fixado': _VALOR,
+    'ValGlPend.': _VALOR,
+}
+
+# Endpoint de saúde: responde assim que o servidor está no ar (usado pelo streamlit_app.py)
+@app.server.route('/saude')
+def saude():
+    return 'ok'
+
+# Métricas de carga, cálculo e callbacks no formato do Prometheus (por processo)
+@app.server.route('/metrics')
+def metrics():
+    return formatar_metricas(), 200, {'Content-Type': TIPO_CONTEUDO}
+
+# Unidades disponíveis e as carregadas no cache (da menos para a mais usada)
+@app.server.route('/unidades')
+def unidades_json():
+    return jsonify(padrao=unidades.padrao, unidades=unidades.unidades(), carregadas=unidades.estado())
+
+# Payload sem filtro de cada snapshot e dia: o mesmo para todas as abas abertas da unidade.
+# O snapshot fica numa referência fraca: uma unidade descarregada do cache libera os dados
+_payload_sem_filtro = {}
+
+
+def payload_dashboard(snapshot, filtros, unidade=None):
+    """
+    Indicadores prontos para exibir, em JSON compacto (algumas centenas de bytes).
+
+    ``digital`` (impressão digital do conteúdo, a mesma em todos os workers e reinícios),
+    ``dia`` e ``filtros`` identificam o conteúdo: se o navegador já tem o payload com os
+    mesmos três, o callback não devolve nada.
+    """
+    from metricas import LIMITES_CONSUMO
+
+    dia = date.today().isoformat()
+    guardado = _payload_sem_filtro.get(unidade)
+    if not filtros and guardado is not None and guardado['snapshot']() is snapshot and guardado['dia'] == dia:
+        return guardado['payload']
+
+    # Com filtro, os indicadores saem do cubo do snapshot (sem voltar às abas)
+    analise_descritiva = snapshot.cubo.consultar(filtros) if filtros else analise_no_momento(snapshot)
+    payload = {
+        'digital': snapshot.digital,
+        'dia': dia,
+        'filtros': filtros,
+        'atualizado_em': f"Data da última atualização: {snapshot.atualizado_em.strftime('%d/%m/%Y %H:%M:%S')}",
+        # Barras do gráfico de consumo (faixas configuradas): do histograma ou, com filtro, do cubo
+        'consumo': snapshot.cubo.faixas(filtros) if filtros else snapshot.histograma.contar(LIMITES_CONSUMO),
+        'cartoes': [
+            f"{valor:.3f}" if isinstance(valor, float) else str(valor)
+            for valor in (analise_descritiva[indicador] for indicador in CARTOES.values())
+        ],
+    }
+    if not filtros:
+        _payload_sem_filtro[unidade] = {'snapshot': weakref.ref(snapshot), 'dia': dia, 'payload': payload}
+    return payload
+
+# Indicadores atuais (sem filtro) em JSON, para outros clientes além do dashboard
+@app.server.route('/snapshot')
+def snapshot_json():
+    try:
+        unidade, atualizador_unidade = unidade_atual()
+    except KeyError:
+        abort(404)
+    snapshot = atualizador_unidade.snapshot
+    if snapshot is None:
+        return 'Dados ainda em carregamento', 503, {'Retry-After': '1'}
+    return jsonify(payload_dashboard(snapshot, {}, unidade))
+
+
+def links_unidades(unidade):
+    # Links para as outras unidades (só com DASH_PLANILHAS e mais de uma planilha)
+    nomes = unidades.unidades()
+    if len(nomes) < 2:
+        return html.Div()
+    return html.Div([
+        html.A(nome, href=PREFIXO_UNIDADE + quote(nome), style={
+            'margin': '0 8px', 'fontSize': '14px', 'fontWeight': 'bold' if nome == unidade else 'normal'
+        }) for nome in nomes
+    ], style={'textAlign': 'center', 'marginTop': '10px'})
+
+
+def layout_unidade_inexistente(unidade):
+    return html.Div([
+        html.H1(f"Unidade não encontrada: {unidade}", style={
+            'textAlign': 'center', 'color': '#005a8d', 'marginTop': '40px', 'fontSize': '24px'
+        }),
+        links_unidades(None),
+    ])
+
+
+# O layout é montado a cada carregamento da página, com o snapshot mais recente
+# e os vencimentos contados na data da requisição (e não na data em que o processo subiu)
+@CALLBACK.cronometrar(callback='layout')
+def serve_layout():
+    try:
+        unidade, atualizador_unidade = unidade_atual()
+    except KeyError as erro:
+        return layout_unidade_inexistente(erro.args[0])
+    snapshot = atualizador_unidade.snapshot
+    if snapshot is None:
+        return layout_espera()
+    return layout_dashboard(snapshot, unidade)
+
+
+def layout_dashboard(snapshot, unidade=None):
+    """Dashboard de um snapshot (também renderizado em HTML estático pelo exportacao.py)."""
+    from detalhe import COLUNAS, LINHAS_POR_PAGINA
+
+    analise_descritiva = analise_no_momento(snapshot)
+    fig_consumo = snapshot.figura
+    payload = payload_dashboard(snapshot, {}, unidade)
+    # Com várias unidades, o título diz qual é e há links para as outras
+    titulo = f"{unidade} - {snapshot.periodo}" if pasta_planilhas else snapshot.periodo
+
+    # Data da última atualização
+    data_ultima_atualizacao = snapshot.atualizado_em.strftime("%d/%m/%Y %H:%M:%S")
+
+    return dbc.Container([
+        # Indicadores da página em JSON compacto; os cartões e o gráfico são atualizados a partir dele
+        dcc.Store(id='payload_dashboard', data=payload),
+        dcc.Store(id='unidade', data=unidade),
+        links_unidades(unidade),
+        dbc.Row([
+            dbc.Col([
+                html.H1("Para maiores informações veja pelo Power BI", style={'textAlign': 'center', 'marginTop': '10px', 'fontSize': '18px'}),
+            ], width=8, style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
         
-    dbc.Row([
-        dbc.Col([
-            dbc.Button("Clique aqui para ver o dashboard no Power BI", href="https://app.powerbi.com/links/i3E_cz8GVg?ctid=d539d4bf-5610-471a-afc2-1c76685cfefa&pbi_source=linkShare", color="primary", className="mt-3", target="_blank")
-        ], width={'size': 6, 'offset': 3}, style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'})
-    ], style={'marginBottom': '20px'}),    
+        dbc.Row([
+            dbc.Col([
+                dbc.Button("Clique aqui para ver o dashboard no Power BI", href="https://app.powerbi.com/links/i3E_cz8GVg?ctid=d539d4bf-5610-471a-afc2-1c76685cfefa&pbi_source=linkShare", color="primary", className="mt-3", target="_blank")
+            ], width={'size': 6, 'offset': 3}, style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'})
+        ], style={'marginBottom': '20px'}),    
     
-        html.H1("Análise Descritiva Contratos de Materiais - Junho 2024", style={
-            'textAlign': 'center', 
-            'color': '#005a8d',
-            'backgroundColor': '#F0F8FF', 
-            'padding': '10px', 
-            'border-radius': '10px',
-            'width': '100%',
-            'fontSize': '24px'  
-        }),html.Div([
-        dbc.Col([
-            html.P(f"Data da última atualização: {data_ultima_atualizacao}", style={
-                'textAlign': 'right',
-                'fontSize': '12px',
-                'color': '#888888',
-                'marginTop': '10px'
-            })
-        ], width=4, style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'})
-    ], style={'marginBottom': '20px'}),        
-    ], style={'marginBottom': '40px', 'width': '100%', 'display': 'flex', 'justify-content': 'center'}),
+            html.H1(f"Análise Descritiva Contratos de Materiais - {titulo}", style={
+                'textAlign': 'center', 
+                'color': '#005a8d',
+                'backgroundColor': '#F0F8FF', 
+                'padding': '10px', 
+                'border-radius': '10px',
+                'width': '100%',
+                'fontSize': '24px'  
+            }),html.Div([
+            dbc.Col([
+                html.P(f"Data da última atualização: {data_ultima_atualizacao}", id='data_ultima_atualizacao', style={
+                    'textAlign': 'right',
+                    'fontSize': '12px',
+                    'color': '#888888',
+                    'marginTop': '10px'
+                })
+            ], width=4, style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'})
+        ], style={'marginBottom': '20px'}),        
+        ], style={'marginBottom': '40px', 'width': '100%', 'display': 'flex', 'justify-content': 'center'}),
+
+        # Filtros: respondidos pelo cubo pré-agregado do snapshot
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id=id_filtro,
+                    options=snapshot.cubo.opcoes(dimensao),
+                    multi=True,
+                    placeholder=dimensao,
+                )
+            ], width=2) for dimensao, id_filtro in FILTROS.items()
+        ], justify='center', className="mb-3"),
     
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Total de Contratos", className="card-title", style={'textAlign': 'center', 'fontSize': '16px'}),
-                    html.H2(f"{analise_descritiva['Total de Contratos']}", className="card-text", style={'textAlign': 'center', 'fontSize': '28px', 'weight':'bold' }),
-                ], style={'textAlign': 'center', 'padding': '10%'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}), 
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Total de Contratos", className="card-title", style={'textAlign': 'center', 'fontSize': '16px'}),
+                        html.H2(f"{analise_descritiva['Total de Contratos']}", id='total_contratos', className="card-text", style={'textAlign': 'center', 'fontSize': '28px', 'weight':'bold' }),
+                    ], style={'textAlign': 'center', 'padding': '10%'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}), 
                   
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Prox. Vencimento (6 meses)", className="card-title", style={'textAlign': 'center', 'fontSize': '14px', 'color': 'red','weight':'bold' }),
-                    html.H2(f"{analise_descritiva['Contratos Prox. Vencimento']}", className="card-text", style={'textAlign': 'center', 'color': 'red','fontSize': '24px'}),
-                ], style={'textAlign': 'center', 'padding': '10px'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}),   
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Prox. Vencimento (6 meses)", className="card-title", style={'textAlign': 'center', 'fontSize': '14px', 'color': 'red','weight':'bold' }),
+                        html.H2(f"{analise_descritiva['Contratos Prox. Vencimento']}", id='contratos_prox_vencimento', className="card-text", style={'textAlign': 'center', 'color': 'red','fontSize': '24px'}),
+                    ], style={'textAlign': 'center', 'padding': '10px'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}),   
                 
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Valor dos Contratos (Bi)" ,className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
-                    html.H2(f"{analise_descritiva['Valor Total dos Contratos (Bi)']:.3f}", className="card-text", style={'textAlign': 'center', 'fontSize': '24px'}),
-                ], style={'textAlign': 'center', 'padding': '5px'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Valor dos Contratos (Bi)" ,className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
+                        html.H2(f"{analise_descritiva['Valor Total dos Contratos (Bi)']:.3f}", id='valor_total_contratos', className="card-text", style={'textAlign': 'center', 'fontSize': '24px'}),
+                    ], style={'textAlign': 'center', 'padding': '5px'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Valor Global Pendente (Bi)", className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
-                    html.H2(f"{analise_descritiva['Valor Global Pendente (Bi)']:.3f}", className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
-                ], style={'textAlign': 'center', 'padding': '5px'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Valor Global Pendente (Bi)", className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
+                        html.H2(f"{analise_descritiva['Valor Global Pendente (Bi)']:.3f}", id='valor_global_pendente', className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
+                    ], style={'textAlign': 'center', 'padding': '5px'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Com Consumo Mínimo", className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
-                    html.H2(f"{analise_descritiva['Contratos com Consumo Mínimo']}", className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
-                ], style={'textAlign': 'center', 'padding': '5px'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Com Consumo Mínimo", className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
+                        html.H2(f"{analise_descritiva['Contratos com Consumo Mínimo']}", id='total_contratos_com_minimo', className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
+                    ], style={'textAlign': 'center', 'padding': '5px'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Consumo Mínimo Atingido", className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
-                    html.H2(f"{analise_descritiva['Consumo Mínimo Atingido']}", className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
-                ], style={'textAlign': 'center', 'padding': '5px'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Consumo Mínimo Atingido", className="card-title", style={'textAlign': 'center', 'fontSize': '16px', 'weight':'bold' }),
+                        html.H2(f"{analise_descritiva['Consumo Mínimo Atingido']}", id='total_contratos_com_minimo_atingido', className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
+                    ], style={'textAlign': 'center', 'padding': '5px'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Materiais Sem Contrato", className="card-title", style={'textAlign': 'center', 'fontSize': '18px', 'weight':'bold' }),
-                    html.H2(f"{analise_descritiva['Materiais Sem Contrato']}", className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
-                ], style={'textAlign': 'center', 'padding': '5px'}),
-            ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
-        ], width=1, style={'margin': '10px'}),
-    ], justify='center', className="mb-2"),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Materiais Sem Contrato", className="card-title", style={'textAlign': 'center', 'fontSize': '18px', 'weight':'bold' }),
+                        html.H2(f"{analise_descritiva['Materiais Sem Contrato']}", id='materiais_sem_contrato', className="card-text", style={'textAlign': 'center','fontSize': '24px'}),
+                    ], style={'textAlign': 'center', 'padding': '5px'}),
+                ], color="info", inverse=True, style={'border-radius': '15px', 'height': '100px', 'width': '100px', 'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'}),
+            ], width=1, style={'margin': '10px'}),
+        ], justify='center', className="mb-2"),
     
-    dbc.Row([
-        dbc.Col([
-            dcc.Graph(figure=fig_consumo, id='consumo_graph')
-        ], width=12)
-    ]),
-    #### DEFINE O TEMPO PARA ATUALIZAÇÃO ####
-    dcc.Interval(
-        id='interval_component',
-        interval=60*60*1000, #a cada 24horas(24 horas * 60 minutos * 60 segundos * 1000 milissegundos)        #60*60*1000, Verifica a cada hora
-        n_intervals=0
-    )
-], fluid=True, style={'backgroundColor': 'white', 'width': '100%'})
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(figure=fig_consumo, id='consumo_graph')
+            ], width=12)
+        ]),
+        # Contratos da barra clicada: página, ordenação e filtro calculados no servidor,
+        # só as linhas da página visível vão para o navegador
+        html.Div([
+            html.H5(id='detalhe_titulo', style={'textAlign': 'center', 'color': '#005a8d', 'fontSize': '18px'}),
+            dash_table.DataTable(
+                id='detalhe_tabela',
+                columns=[
+                    {'name': coluna, 'id': coluna, 'type': COLUNAS[coluna], 'format': FORMATOS_DETALHE.get(coluna, Format())}
+                    for coluna in snapshot.detalhe.colunas
+                ],
+                data=[],
+                page_action='custom',
+                page_current=0,
+                page_size=LINHAS_POR_PAGINA,
+                page_count=1,
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                virtualization=True,
+                fixed_rows={'headers': True},
+                style_table={'height': '450px', 'overflowY': 'auto'},
+                style_cell={'fontFamily': 'Arial', 'fontSize': '13px', 'minWidth': '110px', 'textAlign': 'left'},
+                style_header={'fontWeight': 'bold', 'backgroundColor': '#F0F8FF', 'color': '#005a8d'},
+            ),
+        ], id='detalhe_consumo', style={'display': 'none'}, className="mb-4"),
+        # Tendência mês a mês, montada a partir do histórico (não relê planilhas antigas)
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(figure=snapshot.figura_tendencia, id='tendencia_graph')
+            ], width=12)
+        ]) if snapshot.figura_tendencia else html.Div(),
+        #### DEFINE O TEMPO PARA ATUALIZAÇÃO ####
+        dcc.Interval(
+            id='interval_component',
+            interval=60*60*1000, #a cada 24horas(24 horas * 60 minutos * 60 segundos * 1000 milissegundos)        #60*60*1000, Verifica a cada hora
+            n_intervals=0
+        )
+    ], fluid=True, style={'backgroundColor': 'white', 'width': '100%'})
+
+app.layout = serve_layout
+
+def snapshot_pronto():
+    try:
+        return unidade_atual()[1].snapshot is not None
+    except KeyError:
+        return False
+
+
+# A página de espera recarrega sozinha quando o primeiro snapshot da unidade é publicado
+registrar_espera(app, snapshot_pronto)
+
+# Erros de uma unidade inexistente (KeyError) ou de valores malformados enviados ao callback
+ENTRADA_INVALIDA = (KeyError, IndexError, TypeError, ValueError, AttributeError, ZeroDivisionError)
 
 ############## ATUALIZAÇÃO DOS DADOS NO DASH ###############
-# Callback para verificar e atualizar os dados do arquivo excel
+# A cada intervalo (ou mudança de filtro) o servidor só compara versões; o payload
+# novo só é enviado quando os dados, o dia ou os filtros mudaram
 @app.callback(
-    [Output('consumo_graph', 'figure'),
-     Output('data_ultima_atualizacao', 'children'),
-     Output('total_contratos', 'children'),
-     Output('contratos_prox_vencimento', 'children'),
-     Output('valor_total_contratos', 'children'),
-     Output('valor_global_pendente', 'children'),
-     Output('total_contratos_com_minimo', 'children'),
-     Output('total_contratos_com_minimo_atingido', 'children'),
-     Output('materiais_sem_contrato', 'children')],
-    [Input('interval_component', 'n_intervals')]
+    Output('payload_dashboard', 'data'),
+    [Input('interval_component', 'n_intervals')] + [Input(id_filtro, 'value') for id_filtro in FILTROS.values()],
+    [State('payload_dashboard', 'data'), State('unidade', 'data')],
+    prevent_initial_call=True,
 )
-def update_dashboard(n):
-    xls = pd.ExcelFile(file_path)
-    analise_df = pd.read_excel(xls, sheet_name='ANÁLISE', header=1)
-    contratos_df = pd.read_excel(xls, sheet_name='Contratos', header=0)
-    demanda_spt_df = pd.read_excel(xls, sheet_name='Demanda SPT')
-
-    analise_df.columns = [str(col).strip() for col in analise_df.columns]
-    contratos_df.columns = [str(col).strip() for col in contratos_df.columns]
-
-    total_contratos = len(analise_df['Doc.compra'].unique())
-    valor_total_contratos = analise_df['Val.fixado'].astype(float).sum()
-    valor_global_pendente = analise_df['ValGlPend.'].astype(float).sum()
-
-    contratos_df['valor_consumido_contrato'] = contratos_df['Val.fixado'].astype(float) - contratos_df['ValGlPend.'].astype(float)
-    contratos_df['FimValid/'] = pd.to_datetime(contratos_df['FimValid/'], format='%d/%m/%Y')
-
-    data_atual = datetime.now()
-    data_limite = data_atual + timedelta(days=180)
-    contratos_prox_venc = analise_df[analise_df['FimValid/'] <= data_limite]
-    contratos_com_minimo = contratos_df[(contratos_df['Consumo Mínimo'].str.lower() == 'sim') | (contratos_df['Consumo Mínimo'] == 1)]
-    total_contratos_com_minimo = contratos_com_minimo['Doc.compra'].nunique()
-
-    contratos_df['Consumo Mínimo Atingido'] = contratos_df.apply(
-        lambda row: (
-            "Consumo mínimo atingido" if pd.notna(row['Valor Consumo Mínimo']) and float(row['valor_consumido_contrato']) >= float(row['Valor Consumo Mínimo'])
-            else "Consumo mínimo não atingido" if pd.notna(row['Valor Consumo Mínimo'])
-            else "Não tem valor mínimo"
-        ), axis=1
-    )
-
-    contratos_minimo_atingido = contratos_df[
-        (contratos_df['Consumo Mínimo Atingido'] == 'Consumo mínimo atingido') &
-        (~contratos_df['Doc.compra'].isin(['JA10063222', 'JA10114401']))
-    ]
-    total_contratos_minimo_atingido = contratos_minimo_atingido['Doc.compra'].nunique()
-    materiais_sem_contrato = demanda_spt_df[demanda_spt_df['Contrato Vigente'] == "Não"].shape[0]
-
-    contratos_abaixo_60 = analise_df[analise_df['Farol SALDO'].astype(float) < 0.6]['Doc.compra'].nunique()
-    contratos_acima_60 = analise_df[(analise_df['Farol SALDO'].astype(float) >= 0.6) & (analise_df['Farol SALDO'].astype(float) < 0.8)]['Doc.compra'].nunique()
-    contratos_acima_80 = analise_df[analise_df['Farol SALDO'].astype(float) >= 0.8]['Doc.compra'].nunique()
-
-    analise_descritiva = {
-        "Contratos Prox. Vencimento": contratos_prox_venc.shape[0],
-        "Consumo Abaixo de 60%": contratos_abaixo_60,
-        "Consumo Acima de 60%": contratos_acima_60,
-        "Consumo Acima de 80%": contratos_acima_80,
-        "Total de Contratos": total_contratos,
-        "Valor Total dos Contratos (Bi)": valor_total_contratos / 1e9,
-        "Valor Global Pendente (Bi)": valor_global_pendente / 1e9,
-        "Contratos com Consumo Mínimo": total_contratos_com_minimo,
-        "Consumo Mínimo Atingido": total_contratos_minimo_atingido,
-        "Materiais Sem Contrato": materiais_sem_contrato
+@CALLBACK.cronometrar(callback='update_dashboard')
+def update_dashboard(n, *valores):
+    try:
+        *valores_filtros, atual, unidade = valores
+        snapshot = unidade_atual(unidade)[1].snapshot
+        if snapshot is None:
+            # Unidade descarregada do cache e ainda sendo carregada de novo
+            return dash.no_update
+        filtros = {dimensao: filtro for dimensao, filtro in zip(FILTROS, valores_filtros) if filtro}
+        if atual and (atual['digital'], atual['dia'], atual['filtros']) == (snapshot.digital, date.today().isoformat(), filtros):
+            return dash.no_update
+        return payload_dashboard(snapshot, filtros, unidade)
+    except ENTRADA_INVALIDA:
+        # Unidade inexistente ou valores malformados vindos do navegador: nada a atualizar
+        return dash.no_update
+
+
+# Clique numa barra do gráfico de consumo: contratos daquela faixa do Farol SALDO, com os
+# filtros do dashboard. Cada página, ordenação ou filtro da tabela é uma requisição que
+# devolve só as linhas visíveis
+@app.callback(
+    [Output('detalhe_tabela', 'data'), Output('detalhe_tabela', 'page_count'), Output('detalhe_tabela', 'page_current'),
+     Output('detalhe_titulo', 'children'), Output('detalhe_consumo', 'style')],
+    [Input('consumo_graph', 'clickData'), Input('detalhe_tabela', 'page_current'), Input('detalhe_tabela', 'page_size'),
+     Input('detalhe_tabela', 'sort_by'), Input('detalhe_tabela', 'filter_query')]
+    + [Input(id_filtro, 'value') for id_filtro in FILTROS.values()],
+    State('unidade', 'data'),
+    prevent_initial_call=True,
+)
+@CALLBACK.cronometrar(callback='detalhe_consumo')
+def detalhe_consumo(clique, pagina, linhas_por_pagina, ordenacao, consulta, *valores):
+    from detalhe import FAIXAS
+
+    try:
+        *valores_filtros, unidade = valores
+        snapshot = unidade_atual(unidade)[1].snapshot
+        if snapshot is None or not clique or clique['points'][0].get('x') not in FAIXAS:
+            return dash.no_update
+        faixa = clique['points'][0]['x']
+        # Outra barra, outra ordenação ou outro filtro: volta para a primeira página
+        if 'detalhe_tabela.page_current' not in dash.ctx.triggered_prop_ids:
+            pagina = 0
+        filtros = {dimensao: filtro for dimensao, filtro in zip(FILTROS, valores_filtros) if filtro}
+        registros, pagina, paginas, total = snapshot.detalhe.pagina(
+            FAIXAS.index(faixa), pagina or 0, linhas_por_pagina, filtros, consulta, ordenacao
+        )
+    except ENTRADA_INVALIDA:
+        return dash.no_update
+    return registros, paginas, pagina, f"Consumo {faixa}: {total} contratos", {'display': 'block'}
+
+
+# Cartões, data e barras do gráfico são atualizados no navegador a partir do payload,
+# sem mandar a figura de novo: só a altura das três barras muda
+app.clientside_callback(
+    """
+    function(payload, figura) {
+        var dados = figura.data.map(function(trace, i) {
+            return Object.assign({}, trace, {y: [payload.consumo[i]]});
+        });
+        return [Object.assign({}, figura, {data: dados}), payload.atualizado_em].concat(payload.cartoes);
     }
+    """,
+    [Output('consumo_graph', 'figure'), Output('data_ultima_atualizacao', 'children')]
+    + [Output(id_cartao, 'children') for id_cartao in CARTOES],
+    Input('payload_dashboard', 'data'),
+    State('consumo_graph', 'figure'),
+    prevent_initial_call=True,
+)
 
-    data_consumo = pd.DataFrame({
-        'Consumo': ["Abaixo de 60%", "Entre 60% e 80%", "Acima de 80%"],
-        'Quantidade': [contratos_abaixo_60, contratos_acima_60, contratos_acima_80]
-    })
-
-    fig_consumo = px.bar(
-        data_consumo,
-        x='Consumo',
-        y='Quantidade',
-        title='Consumo',
-        color='Consumo',
-        color_discrete_map={
-            "Abaixo de 60%": "green",
-            "Entre 60% e 80%": "orange",
-            "Acima de 80%": "red"
-        }
-    )
-
-    fig_consumo.update_traces(
-        texttemplate='%{y}', 
-        textposition='inside', 
-        insidetextanchor='middle', 
-        textfont=dict(color='white', size=15, family='Arial', weight='bold'),
-        hovertemplate='<b>Consumo</b>: %{x}<br><b>Quantidade</b>: %{y}<extra></extra>'
-    )
-
-    fig_consumo.update_layout(
-        showlegend=False,
-        xaxis_title=None,
-        yaxis_title=None,
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        title_font=dict(size=30, family='Arial', color='#005a8d', weight='bold'),
-        title_x=0.5,
-        xaxis=dict(tickfont=dict(size=15, family='Arial', color='black', weight='bold'))
-    )
-
-    fig_consumo.update_xaxes(
-        tickfont=dict(size=13, family='Arial', color='black', weight='bold')
-    )
-
-    data_ultima_atualizacao = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-    return (fig_consumo, 
-            f"Data da última atualização: {data_ultima_atualizacao}", 
-            total_contratos, 
-            analise_descritiva["Contratos Prox. Vencimento"], 
-            f"{analise_descritiva['Valor Total dos Contratos (Bi)']:.3f}", 
-            f"{analise_descritiva['Valor Global Pendente (Bi)']:.3f}", 
-            analise_descritiva["Contratos com Consumo Mínimo"], 
-            analise_descritiva["Consumo Mínimo Atingido"], 
-            analise_descritiva["Materiais Sem Contrato"])
-
+# Servidor de desenvolvimento (uma thread); em produção use o wsgi.py com o gunicorn
 if __name__ == '__main__':
-    app.run_server(debug=False, port=8055)
+    app.run(debug=False, port=8055)
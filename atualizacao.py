@@ -0,0 +1,175 @@
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+# Só módulos leves aqui: pandas, plotly e os módulos de cálculo são importados na
+# primeira atualização, que pode rodar em segundo plano (ver iniciar)
+from instrumentacao import ETAPA, ULTIMA_ATUALIZACAO, VERSAO_DADOS
+
+logger = logging.getLogger(__name__)
+
+# De quanto em quanto tempo (segundos) o arquivo é verificado; sem mudança, a verificação é só um stat
+INTERVALO_ATUALIZACAO = 60
+
+
+@dataclass(frozen=True)
+class SnapshotDashboard:
+    """Estado publicado para os callbacks: nunca é alterado depois de criado."""
+    versao: int  # contador da carga neste processo (recomeça em 1 a cada reinício)
+    analise_descritiva: MappingProxyType
+    figura: dict  # figura do consumo já convertida para JSON (dicts e listas)
+    atualizado_em: datetime
+    indice_vencimento: 'IndiceVencimento'  # para contar os vencimentos na hora da requisição
+    cubo: 'CuboContratos'  # indicadores pré-agregados para os filtros do dashboard
+    periodo: str  # mês da planilha, por extenso ('Junho 2024')
+    figura_tendencia: dict  # indicadores mês a mês do histórico (vazio sem histórico)
+    detalhe: 'TabelaDetalhe'  # contratos por faixa de consumo, para a tabela de detalhe
+    histograma: 'HistogramaFarol'  # Farol SALDO por contrato: contagens de qualquer conjunto de faixas
+    digital: str = ''  # impressão digital do conteúdo das abas: a mesma em todos os processos
+
+
+def analise_no_momento(snapshot, agora=None):
+    """Indicadores do snapshot com "Contratos Prox. Vencimento" recalculado para ``agora``."""
+    from metricas import DIAS_PROX_VENCIMENTO
+
+    analise_descritiva = dict(snapshot.analise_descritiva)
+    analise_descritiva["Contratos Prox. Vencimento"] = snapshot.indice_vencimento.contar_proximos(
+        DIAS_PROX_VENCIMENTO, agora
+    )
+    return analise_descritiva
+
+
+class AtualizadorDashboard:
+    """
+    Único responsável por ler a planilha e calcular indicadores e gráfico.
+
+    Uma thread em segundo plano chama ``atualizar`` a cada ``intervalo`` segundos e
+    troca ``snapshot`` por um novo quando os dados mudam. Os callbacks só leem
+    ``snapshot`` (uma leitura de atributo), então N abas abertas custam uma leitura.
+
+    ``carregador`` e ``historico`` também podem ser funções que os criam: assim até os
+    imports pesados ficam para a primeira atualização.
+    """
+
+    def __init__(self, carregador, intervalo=INTERVALO_ATUALIZACAO, historico=None):
+        self.carregador = carregador
+        self.intervalo = intervalo
+        self.historico = historico
+        self.snapshot = None
+        self._publicado = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def atualizar(self):
+        """Recarrega a planilha e publica um snapshot novo se algo mudou. Retorna o snapshot atual."""
+        from cubo import CuboContratos
+        from detalhe import TabelaDetalhe
+        from graficos import figura_consumo_faixas
+        from historico import nome_periodo, periodo_arquivo
+        from metricas import LIMITES_CONSUMO, HistogramaFarol, IndiceVencimento
+        from motores import calcular_indicadores
+
+        if callable(self.carregador):
+            self.carregador = self.carregador()
+        if callable(self.historico):
+            self.historico = self.historico()
+        with ETAPA.cronometrar(etapa='carga'):
+            self.carregador.carregar()
+        if self.snapshot is not None and self.snapshot.versao == self.carregador.versao:
+            return self.snapshot
+
+        analise_df, contratos_df, demanda_spt_df = self.carregador.frames()
+        with ETAPA.cronometrar(etapa='indicadores'):
+            indice_vencimento = IndiceVencimento(analise_df['FimValid/'])
+            with ETAPA.cronometrar(etapa='faixas_consumo'):
+                histograma = HistogramaFarol(analise_df['Doc.compra'], analise_df['Farol SALDO'])
+            # Motor de cálculo escolhido por DASH_MOTOR (pandas, duckdb ou polars); as faixas
+            # de consumo saem do histograma em qualquer motor
+            analise_descritiva = calcular_indicadores(
+                analise_df, contratos_df, demanda_spt_df, indice_vencimento=indice_vencimento, histograma=histograma
+            )
+        with ETAPA.cronometrar(etapa='cubo'):
+            cubo = CuboContratos(analise_df, contratos_df, demanda_spt_df)
+        with ETAPA.cronometrar(etapa='detalhe'):
+            detalhe = TabelaDetalhe(analise_df, cubo.dimensoes_por_doc)
+        with ETAPA.cronometrar(etapa='figura'):
+            # Vem do cache de figuras: com as mesmas contagens não monta nem serializa de novo
+            figura = figura_consumo_faixas(histograma.contar(LIMITES_CONSUMO))
+        periodo = periodo_arquivo(self.carregador.caminho, analise_df)
+        self.snapshot = SnapshotDashboard(
+            versao=self.carregador.versao,
+            analise_descritiva=MappingProxyType(analise_descritiva),
+            figura=figura,
+            atualizado_em=datetime.now(),
+            indice_vencimento=indice_vencimento,
+            cubo=cubo,
+            periodo=nome_periodo(periodo),
+            figura_tendencia=self._registrar_historico(periodo, analise_descritiva, analise_df),
+            detalhe=detalhe,
+            histograma=histograma,
+            digital=self.carregador.digital(),
+        )
+        VERSAO_DADOS.definir(self.snapshot.versao, unidade=self.carregador.unidade)
+        ULTIMA_ATUALIZACAO.definir(self.snapshot.atualizado_em.timestamp(), unidade=self.carregador.unidade)
+        self._publicado.set()
+        return self.snapshot
+
+    def _registrar_historico(self, periodo, analise_descritiva, analise_df):
+        # Grava a carga no histórico e devolve o gráfico de tendência; uma falha no
+        # histórico não impede de publicar os indicadores do mês
+        from graficos import criar_figura_tendencia
+
+        if self.historico is None:
+            return {}
+        try:
+            with ETAPA.cronometrar(etapa='historico'):
+                self.historico.registrar(periodo, self.carregador.digital(), analise_descritiva, analise_df)
+                serie = self.historico.serie_indicadores()
+        except (sqlite3.Error, OSError):
+            logger.exception("Falha ao gravar o histórico mensal")
+            return {}
+        with ETAPA.cronometrar(etapa='figura_tendencia'):
+            return json.loads(criar_figura_tendencia(serie).to_json())
+
+    def _executar(self, imediato):
+        # Sem snapshot publicado (iniciar com esperar=False), a primeira carga é imediata
+        espera = 0 if imediato or self.snapshot is None else self.intervalo
+        while not self._parar.wait(espera):
+            espera = self.intervalo
+            try:
+                self.atualizar()
+            except Exception:
+                # Mantém o último snapshot publicado e tenta de novo no próximo ciclo
+                logger.exception("Falha ao atualizar os dados do dashboard")
+
+    def iniciar(self, esperar=True, imediato=False):
+        """
+        Inicia a thread de atualização. Com ``esperar``, publica antes o primeiro snapshot
+        (se ainda não houver); sem, a primeira carga é feita já na thread e ``snapshot``
+        fica None até ela terminar. Com ``imediato``, a thread confere a planilha logo ao
+        começar, mesmo com um snapshot publicado (o herdado do mestre, num worker).
+        """
+        if esperar and self.snapshot is None:
+            self.atualizar()
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(
+                target=self._executar, args=(imediato,), name='atualizador-dashboard', daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def esperar(self, timeout=None):
+        """Espera o primeiro snapshot ser publicado e o retorna (None se ``timeout`` acabar antes)."""
+        self._publicado.wait(timeout)
+        return self.snapshot
+
+    def parar(self, esperar=True):
+        """Para a thread de atualização; sem ``esperar``, não aguarda uma carga em andamento terminar."""
+        self._parar.set()
+        if esperar and self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,112 @@
+"""
+Teste de carga local do dashboard: requisições/s e latência p95 da página e do
+_dash-update-component com 1, 10 e 100 clientes simultâneos.
+
+Suba o servidor antes, por exemplo:
+    gunicorn -c gunicorn.conf.py wsgi:server
+e rode (a partir da raiz do repositório):
+    python -m benchmarks.carga --url http://127.0.0.1:8055 --clientes 1 10 100 --duracao 10
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _ler(url, corpo=None):
+    cabecalhos = {'Content-Type': 'application/json'} if corpo is not None else {}
+    requisicao = urllib.request.Request(url, data=corpo, headers=cabecalhos)
+    with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+        resposta.read()
+        return resposta.status
+
+
+def _saidas(output):
+    # "..a.b...c.d.." (várias saídas) ou "a.b" (uma saída) -> specs de saída do Dash
+    def spec(texto):
+        id_, propriedade = texto.rsplit('.', 1)
+        return {'id': id_, 'property': propriedade}
+
+    if output.startswith('..'):
+        return [spec(parte) for parte in output[2:-2].split('...')]
+    return spec(output)
+
+
+def corpo_callback(url, indice, valor):
+    """Monta a requisição do callback ``indice`` a partir do /_dash-dependencies do próprio servidor."""
+    with urllib.request.urlopen(f'{url}/_dash-dependencies', timeout=60) as resposta:
+        dependencias = json.load(resposta)
+    callback = [d for d in dependencias if d.get('clientside_function') is None][indice]
+    entradas = [{'id': e['id'], 'property': e['property'], 'value': valor} for e in callback['inputs']]
+    return json.dumps({
+        'output': callback['output'],
+        'outputs': _saidas(callback['output']),
+        'inputs': entradas,
+        'state': [{'id': e['id'], 'property': e['property']} for e in callback['state']],
+        'changedPropIds': [f"{e['id']}.{e['property']}" for e in callback['inputs']],
+    }).encode()
+
+
+def medir(url, corpo, clientes, duracao):
+    """Dispara requisições com ``clientes`` threads por ``duracao`` segundos."""
+    latencias, erros = [], []
+    trava = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def cliente():
+        locais, falhas = [], 0
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            try:
+                _ler(url, corpo)
+                locais.append(time.perf_counter() - inicio)
+            except OSError:
+                falhas += 1
+        with trava:
+            latencias.extend(locais)
+            erros.append(falhas)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as pool:
+        for _ in range(clientes):
+            pool.submit(cliente)
+    total = time.perf_counter() - inicio
+
+    p95 = statistics.quantiles(latencias, n=20)[-1] if len(latencias) > 1 else float('nan')
+    return {
+        'clientes': clientes,
+        'requisicoes': len(latencias),
+        'erros': sum(erros),
+        'req_por_s': len(latencias) / total,
+        'p95_ms': p95 * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8055')
+    parser.add_argument('--clientes', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--duracao', type=float, default=10, help='segundos por medição')
+    parser.add_argument('--callback', type=int, default=0, help='índice do callback (servidor) testado')
+    parser.add_argument('--valor', type=json.loads, default=1, help='valor (JSON) enviado nos inputs do callback')
+    args = parser.parse_args()
+
+    alvos = {
+        'página': (args.url + '/', None),
+        '_dash-update-component': (args.url + '/_dash-update-component',
+                                   corpo_callback(args.url, args.callback, args.valor)),
+    }
+    print(f"{'alvo':<24} {'clientes':>8} {'req':>8} {'erros':>6} {'req/s':>9} {'p95 (ms)':>9}")
+    for nome, (url, corpo) in alvos.items():
+        _ler(url, corpo)  # aquecimento
+        for clientes in args.clientes:
+            r = medir(url, corpo, clientes, args.duracao)
+            print(f"{nome:<24} {r['clientes']:>8} {r['requisicoes']:>8} {r['erros']:>6} "
+                  f"{r['req_por_s']:>9.1f} {r['p95_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compara a regra "Consumo Mínimo Atingido" vetorizada (regras_dax.py) com o apply linha a linha original.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.consumo_minimo
+    python -m benchmarks.consumo_minimo --linhas 1000000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.kpis import cronometrar
+from benchmarks.sinteticos import gerar_frames
+from regras_dax import classificar_consumo_minimo
+
+
+def classificar_original(contratos_df):
+    # Cópia da regra que ficava nos dashboards
+    contratos_df = contratos_df.copy()
+    contratos_df['valor_consumido_contrato'] = contratos_df['Val.fixado'].astype(float) - contratos_df['ValGlPend.'].astype(float)
+    return contratos_df.apply(
+        lambda row: (
+            "Consumo mínimo atingido" if pd.notna(row['Valor Consumo Mínimo']) and float(row['valor_consumido_contrato']) >= float(row['Valor Consumo Mínimo'])
+            else "Consumo mínimo não atingido" if pd.notna(row['Valor Consumo Mínimo'])
+            else "Não tem valor mínimo"
+        ), axis=1
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12} {'apply (s)':>11} {'vetorizado (s)':>15} {'ganho':>8} {'memória':>16}")
+    for n in args.linhas:
+        _, contratos_df, _ = gerar_frames(n)
+        # Alguns consumidos sem valor (NaN) e empates exatos com o mínimo
+        contratos_df.loc[contratos_df.index[::97], 'ValGlPend.'] = np.nan
+        empate = contratos_df.index[::89]
+        contratos_df.loc[empate, 'Valor Consumo Mínimo'] = (
+            contratos_df.loc[empate, 'Val.fixado'] - contratos_df.loc[empate, 'ValGlPend.']
+        )
+
+        t_orig, original = cronometrar(classificar_original, contratos_df, repeticoes=1)
+        t_novo, novo = cronometrar(classificar_consumo_minimo, contratos_df)
+        # Mesma classificação, linha a linha
+        assert (original.to_numpy(dtype=object) == novo.to_numpy(dtype=object)).all()
+
+        bytes_orig = original.memory_usage(deep=True)
+        bytes_novo = novo.memory_usage(deep=True)
+        print(f"{n:>12,} {t_orig:>11.3f} {t_novo:>15.4f} {t_orig / t_novo:>7.0f}x "
+              f"{bytes_orig / 2**20:>6.1f} -> {bytes_novo / 2**20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
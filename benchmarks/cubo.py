@@ -0,0 +1,67 @@
+"""
+Latência de uma consulta filtrada: cubo pré-agregado (cubo.py) contra recalcular os
+indicadores sobre as abas filtradas com o motor de metricas.py.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.cubo
+    python -m benchmarks.cubo --linhas 100000 1000000
+"""
+import argparse
+import math
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks.sinteticos import gerar_frames
+from cubo import CuboContratos
+from metricas import calcular_analise_descritiva
+
+
+def filtrar_frames(analise_df, contratos_df, demanda_spt_df, fornecedores, familias):
+    # Mesmo filtro aplicado direto nas abas (o que o callback faria sem o cubo)
+    docs = analise_df.loc[
+        analise_df['Fornecedor'].isin(fornecedores) & analise_df['Família'].isin(familias), 'Doc.compra'
+    ]
+    familias = {familia.casefold() for familia in familias}
+    return (
+        analise_df[analise_df['Doc.compra'].isin(docs)],
+        contratos_df[contratos_df['Doc.compra'].isin(docs)],
+        demanda_spt_df[demanda_spt_df['Família'].str.casefold().isin(familias)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'montagem (s)':>13} {'células':>9} {'abas (ms)':>10} {'cubo (ms)':>10} {'ganho':>7}")
+    for n_linhas in args.linhas:
+        frames = gerar_frames(n_linhas)
+        inicio = time.perf_counter()
+        cubo = CuboContratos(*frames)
+        montagem = time.perf_counter() - inicio
+
+        rng = np.random.default_rng(1)
+        fornecedores = list(rng.choice(cubo.opcoes('Fornecedor'), 20, replace=False))
+        familias = cubo.opcoes('Família')[:2]
+        filtros = {'Fornecedor': fornecedores, 'Família': familias}
+
+        # Conferência: o cubo devolve o mesmo que o motor sobre as abas filtradas
+        esperado = calcular_analise_descritiva(*filtrar_frames(*frames, fornecedores, familias))
+        obtido = cubo.consultar(filtros)
+        assert all(math.isclose(obtido[chave], esperado[chave]) for chave in esperado), (obtido, esperado)
+
+        abas = min(timeit.repeat(
+            lambda: calcular_analise_descritiva(*filtrar_frames(*frames, fornecedores, familias)),
+            number=1, repeat=max(args.repeticoes // 5, 1),
+        ))
+        consulta = min(timeit.repeat(lambda: cubo.consultar(filtros), number=1, repeat=args.repeticoes))
+        print(f"{n_linhas:>10} {montagem:>13.2f} {len(cubo.celulas):>9} {abas * 1e3:>10.1f} "
+              f"{consulta * 1e3:>10.2f} {abas / consulta:>6.0f}x")
+
+
+if __name__ == '__main__':
+    main()
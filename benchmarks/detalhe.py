@@ -0,0 +1,59 @@
+"""
+Tabela de detalhe do gráfico de consumo (detalhe.py): latência e bytes de uma página
+conforme o número de contratos cresce, contra mandar a faixa inteira para o navegador
+(o que uma DataTable com paginação no cliente faria).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.detalhe
+    python -m benchmarks.detalhe --linhas 100000 1000000 10000000
+"""
+import argparse
+import json
+import time
+import timeit
+
+from benchmarks.sinteticos import gerar_frames
+from carregamento import ABAS, preparar_aba
+from cubo import CuboContratos
+from detalhe import TabelaDetalhe
+
+# Faixa "Acima de 80%", a do exemplo do gráfico
+FAIXA = 2
+
+CONSULTAS = {
+    'primeira página': {},
+    'página 20': {'pagina': 20},
+    'ordenada': {'ordenacao': [{'column_id': 'Val.fixado', 'direction': 'desc'}]},
+    'filtrada': {'consulta': '{Fornecedor} contains "fornecedor 1" && {Farol SALDO} < 0.95'},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'contratos':>10} {'montagem (s)':>13} {'consulta':>16} {'1ª (ms)':>8} "
+          f"{'seguintes (ms)':>15} {'bytes':>7} {'faixa inteira':>14}")
+    for n_linhas in args.linhas:
+        frames = [preparar_aba(aba, df) for aba, df in zip(ABAS, gerar_frames(n_linhas))]
+        dimensoes_por_doc = CuboContratos(*frames).dimensoes_por_doc
+        inicio = time.perf_counter()
+        detalhe = TabelaDetalhe(frames[0], dimensoes_por_doc)
+        montagem = time.perf_counter() - inicio
+
+        contratos = detalhe.contratos(FAIXA)
+        inteira = len(json.dumps(detalhe.registros(range(*detalhe.inicios[FAIXA:FAIXA + 2]))))
+        for nome, consulta in CONSULTAS.items():
+            # A primeira consulta calcula as posições; as seguintes (outras páginas) vêm do cache
+            inicio = time.perf_counter()
+            registros = detalhe.pagina(FAIXA, **consulta)[0]
+            primeira = time.perf_counter() - inicio
+            seguintes = min(timeit.repeat(lambda: detalhe.pagina(FAIXA, **consulta), number=1, repeat=args.repeticoes))
+            print(f"{n_linhas:>10} {contratos:>10} {montagem:>13.2f} {nome:>16} {primeira * 1e3:>8.1f} "
+                  f"{seguintes * 1e3:>15.2f} {len(json.dumps(registros)):>7} {inteira:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Esquema de tipos com células sujas: cada aba da planilha é lida uma vez e recebe um texto
+livre numa coluna fora dos indicadores (ex.: 'a definir' em DATA DE APLICAÇÃO, 'ABC-1'
+em Material). A aba tem que carregar, com só essa célula vazia e os indicadores iguais;
+o mesmo texto numa coluna dos indicadores (COLUNAS_ESTRITAS) tem que falhar a carga.
+
+Termina com erro se alguma conferência falhar.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.esquema
+    python -m benchmarks.esquema --planilha outra.xlsx
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from carregamento import ABAS, ARQUIVO_PADRAO, COLUNAS_ESTRITAS, preparar_aba
+from motores import calcular_indicadores
+
+# (aba, coluna fora dos indicadores, texto livre) e (aba, coluna dos indicadores, texto livre)
+SUJEIRAS = [('ANÁLISE', 'DATA DE APLICAÇÃO', 'a definir'), ('Contratos', 'Material', 'ABC-1')]
+SUJEIRAS_ESTRITAS = [('ANÁLISE', 'Farol SALDO', 'n/d'), ('Contratos', 'Valor Consumo Mínimo', 'a definir')]
+
+
+def sujar(brutos, aba, coluna, texto):
+    # Cópia das abas com o texto na primeira linha da coluna
+    abas = {nome: df.copy() for nome, df in brutos.items()}
+    abas[aba][coluna] = abas[aba][coluna].astype(object)
+    abas[aba].loc[abas[aba].index[0], coluna] = texto
+    return abas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--planilha', default=ARQUIVO_PADRAO)
+    args = parser.parse_args()
+
+    with pd.ExcelFile(args.planilha) as xls:
+        brutos = {aba: pd.read_excel(xls, sheet_name=aba, header=cabecalho) for aba, cabecalho in ABAS.items()}
+    for df in brutos.values():
+        df.columns = [str(coluna).strip() for coluna in df.columns]
+    esperado = calcular_indicadores(*(preparar_aba(aba, df.copy()) for aba, df in brutos.items()))
+
+    falhas = 0
+    for aba, coluna, texto in SUJEIRAS:
+        assert coluna not in COLUNAS_ESTRITAS.get(aba, set())
+        frames = {nome: preparar_aba(nome, df) for nome, df in sujar(brutos, aba, coluna, texto).items()}
+        vazia = pd.isna(frames[aba][coluna].iloc[0])
+        iguais = calcular_indicadores(*frames.values()) == esperado
+        falhas += not (vazia and iguais)
+        print(f"{aba:<10} {coluna:<22} {texto!r:<12} carregou; célula vazia: {vazia}; indicadores iguais: {iguais}")
+    for aba, coluna, texto in SUJEIRAS_ESTRITAS:
+        try:
+            for nome, df in sujar(brutos, aba, coluna, texto).items():
+                preparar_aba(nome, df)
+        except (ValueError, TypeError) as erro:
+            print(f"{aba:<10} {coluna:<22} {texto!r:<12} falhou como esperado ({type(erro).__name__})")
+        else:
+            falhas += 1
+            print(f"{aba:<10} {coluna:<22} {texto!r:<12} CARREGOU (deveria falhar: coluna dos indicadores)")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Faixas do Farol SALDO: o histograma de metricas.py (ordenado uma vez por carga) contra
+as máscaras com nunique() de 'Doc.compra', uma por faixa, como no notebook original.
+
+Confere as contagens para os limites de sempre e para outros conjuntos de limites, com
+alguns contratos repetidos com Farol SALDO diferente (os que não vão para as contagens
+acumuladas). Termina com erro se alguma contagem divergir.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.faixas
+    python -m benchmarks.faixas --linhas 1000000 --limites 0.4,0.6,0.8,0.95
+"""
+import argparse
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sinteticos import gerar_frames
+from carregamento import ABAS, preparar_aba
+from metricas import HistogramaFarol
+
+CONJUNTOS_LIMITES = ['0.6,0.8', '0.4,0.6,0.8,0.95', '0.5', '0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1']
+
+
+def contagem_mascaras(analise_df, limites):
+    # Uma máscara e um nunique() por faixa (a lógica original, generalizada para N limites)
+    farol = analise_df['Farol SALDO'].astype(float)
+    bordas = [-np.inf, *limites, np.inf]
+    return tuple(
+        analise_df[(farol >= inicio) & (farol < fim)]['Doc.compra'].nunique()
+        for inicio, fim in zip(bordas, bordas[1:])
+    )
+
+
+def com_repetidos(analise_df, fracao=0.01, seed=0):
+    # Repete alguns contratos com outro Farol SALDO, como uma ANÁLISE com mais de uma linha por contrato
+    rng = np.random.default_rng(seed)
+    repetidos = analise_df.sample(frac=fracao, random_state=seed).copy()
+    repetidos['Farol SALDO'] = rng.uniform(0, 1.05, len(repetidos)).astype(repetidos['Farol SALDO'].dtype)
+    return pd.concat([analise_df, repetidos], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--limites', nargs='+', default=CONJUNTOS_LIMITES,
+                        help='conjuntos de limites separados por vírgula')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    divergencias = 0
+    print(f"{'linhas':>10} {'contratos':>10} {'limites':>32} {'máscaras (ms)':>14} {'histograma (ms)':>16} "
+          f"{'consulta (ms)':>14}  resultado")
+    for n_linhas in args.linhas:
+        analise_df = com_repetidos(preparar_aba(next(iter(ABAS)), gerar_frames(n_linhas)[0]))
+        analise_df['Doc.compra'] = analise_df['Doc.compra'].astype('category')
+        montagem = min(timeit.repeat(lambda: HistogramaFarol(analise_df['Doc.compra'], analise_df['Farol SALDO']),
+                                     number=1, repeat=args.repeticoes))
+        histograma = HistogramaFarol(analise_df['Doc.compra'], analise_df['Farol SALDO'])
+        for texto in args.limites:
+            limites = sorted(float(limite) for limite in texto.split(','))
+            esperado = contagem_mascaras(analise_df, limites)
+            obtido = histograma.contar(limites)
+            mascaras = min(timeit.repeat(lambda: contagem_mascaras(analise_df, limites), number=1,
+                                         repeat=args.repeticoes))
+            consulta = min(timeit.repeat(lambda: histograma.contar(limites), number=1, repeat=args.repeticoes))
+            divergencias += obtido != esperado
+            print(f"{n_linhas:>10} {len(analise_df):>10} {texto:>32} {mascaras * 1e3:>14.1f} {montagem * 1e3:>16.1f} "
+                  f"{consulta * 1e3:>14.3f}  {'igual às máscaras' if obtido == esperado else (esperado, obtido)}")
+    if divergencias:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
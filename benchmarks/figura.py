@@ -0,0 +1,45 @@
+"""
+Tempo para montar o gráfico de consumo: Plotly Express + serialização a cada atualização
+(como era antes) contra o cache de figuras por contagens (graficos.py).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.figura
+"""
+import argparse
+import timeit
+
+from graficos import criar_figura_consumo, figura_consumo_dados, figura_consumo_json
+
+CONTAGENS = (145, 15, 97)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+    n = args.repeticoes
+
+    def sem_cache():
+        return criar_figura_consumo(*CONTAGENS).to_json()
+
+    def cache_frio():
+        figura_consumo_json.cache_clear()
+        figura_consumo_dados.cache_clear()
+        return figura_consumo_dados(*CONTAGENS)
+
+    def cache_quente():
+        return figura_consumo_dados(*CONTAGENS)
+
+    sem_cache()  # importações e templates do Plotly carregados fora da medição
+    tempos = {
+        'px.bar + to_json (antes)': min(timeit.repeat(sem_cache, number=1, repeat=n)),
+        'cache frio': min(timeit.repeat(cache_frio, number=1, repeat=n)),
+        'cache quente (depois)': min(timeit.repeat(cache_quente, number=1000, repeat=5)) / 1000,
+    }
+    base = tempos['px.bar + to_json (antes)']
+    for nome, tempo in tempos.items():
+        print(f"{nome:<26} {tempo * 1e3:>10.4f} ms {base / tempo:>10.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Custo de gravar um mês no histórico (historico.py) conforme os meses se acumulam:
+deve depender só das linhas do mês, não do tamanho do histórico.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.historico
+    python -m benchmarks.historico --meses 36 --linhas 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.sinteticos import gerar_frames
+from historico import HistoricoMensal
+from metricas import calcular_analise_descritiva
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--meses', type=int, default=24)
+    parser.add_argument('--linhas', type=int, default=500_000)
+    args = parser.parse_args()
+
+    frames = gerar_frames(args.linhas)
+    analise_descritiva = calcular_analise_descritiva(*frames)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'historico.sqlite')
+        historico = HistoricoMensal(caminho)
+        print(f"{len(frames[0])} contratos por mês")
+        print(f"{'mês':>4} {'gravar (ms)':>12} {'série (ms)':>11} {'arquivo (MB)':>13}")
+        for mes in range(args.meses):
+            periodo = f"{2024 + mes // 12}-{mes % 12 + 1:02d}"
+            inicio = time.perf_counter()
+            historico.registrar(periodo, str(mes), analise_descritiva, frames[0])
+            gravar = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            historico.serie_indicadores()
+            serie = time.perf_counter() - inicio
+            print(f"{mes + 1:>4} {gravar * 1e3:>12.1f} {serie * 1e3:>11.2f} {os.path.getsize(caminho) / 2**20:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Compara o motor de indicadores (metricas.py) com o cálculo original copiado dos dashboards.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.kpis
+    python -m benchmarks.kpis --linhas 10000 100000 1000000 10000000 --max-original 1000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.sinteticos import gerar_frames
+from metricas import calcular_analise_descritiva
+
+
+def analise_descritiva_original(analise_df, contratos_df, demanda_spt_df):
+    # Cópia do cálculo que ficava em app.py / dash_contratos_materiais_app.py
+    contratos_df = contratos_df.copy()
+    total_contratos = len(analise_df['Doc.compra'].unique())
+    valor_total_contratos = analise_df['Val.fixado'].astype(float).sum()
+    valor_global_pendente = analise_df['ValGlPend.'].astype(float).sum()
+    contratos_df['valor_consumido_contrato'] = contratos_df['Val.fixado'].astype(float) - contratos_df['ValGlPend.'].astype(float)
+    contratos_df['FimValid/'] = pd.to_datetime(contratos_df['FimValid/'], format='%d/%m/%Y')
+    data_limite = datetime.now() + timedelta(days=180)
+    contratos_prox_venc = analise_df[analise_df['FimValid/'] <= data_limite]
+    contratos_com_minimo = contratos_df[(contratos_df['Consumo Mínimo'].str.lower() == 'sim') | (contratos_df['Consumo Mínimo'] == 1)]
+    total_contratos_com_minimo = contratos_com_minimo['Doc.compra'].nunique()
+    contratos_df['Consumo Mínimo Atingido'] = contratos_df.apply(
+        lambda row: (
+            "Consumo mínimo atingido" if pd.notna(row['Valor Consumo Mínimo']) and float(row['valor_consumido_contrato']) >= float(row['Valor Consumo Mínimo'])
+            else "Consumo mínimo não atingido" if pd.notna(row['Valor Consumo Mínimo'])
+            else "Não tem valor mínimo"
+        ), axis=1
+    )
+    contratos_minimo_atingido = contratos_df[
+        (contratos_df['Consumo Mínimo Atingido'] == 'Consumo mínimo atingido') &
+        (~contratos_df['Doc.compra'].isin(['JA10063222', 'JA10114401']))
+    ]
+    total_contratos_minimo_atingido = contratos_minimo_atingido['Doc.compra'].nunique()
+    materiais_sem_contrato = demanda_spt_df[demanda_spt_df['Contrato Vigente'] == "Não"].shape[0]
+    contratos_abaixo_60 = analise_df[analise_df['Farol SALDO'].astype(float) < 0.6]['Doc.compra'].nunique()
+    contratos_acima_60 = analise_df[(analise_df['Farol SALDO'].astype(float) >= 0.6) & (analise_df['Farol SALDO'].astype(float) < 0.8)]['Doc.compra'].nunique()
+    contratos_acima_80 = analise_df[analise_df['Farol SALDO'].astype(float) >= 0.8]['Doc.compra'].nunique()
+    return {
+        "Contratos Prox. Vencimento": contratos_prox_venc.shape[0],
+        "Consumo Abaixo de 60%": contratos_abaixo_60,
+        "Consumo Acima de 60%": contratos_acima_60,
+        "Consumo Acima de 80%": contratos_acima_80,
+        "Total de Contratos": total_contratos,
+        "Valor Total dos Contratos (Bi)": valor_total_contratos / 1e9,
+        "Valor Global Pendente (Bi)": valor_global_pendente / 1e9,
+        "Contratos com Consumo Mínimo": total_contratos_com_minimo,
+        "Consumo Mínimo Atingido": total_contratos_minimo_atingido,
+        "Materiais Sem Contrato": materiais_sem_contrato
+    }
+
+
+def cronometrar(funcao, *args, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def conferir(original, novo):
+    for chave, valor in original.items():
+        if isinstance(valor, float):
+            assert abs(valor - novo[chave]) <= 1e-9 * max(1.0, abs(valor)), chave
+        else:
+            assert valor == novo[chave], (chave, valor, novo[chave])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-original', type=int, default=1_000_000,
+                        help='acima deste tamanho o cálculo original (apply linha a linha) não é executado')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12} {'original (s)':>14} {'motor (s)':>12} {'ganho':>8}")
+    for n in args.linhas:
+        frames = gerar_frames(n)
+        t_novo, novo = cronometrar(calcular_analise_descritiva, *frames, repeticoes=args.repeticoes)
+        if n <= args.max_original:
+            t_orig, original = cronometrar(analise_descritiva_original, *frames, repeticoes=1)
+            conferir(original, novo)
+            print(f"{n:>12,} {t_orig:>14.3f} {t_novo:>12.3f} {t_orig / t_novo:>7.1f}x")
+        else:
+            print(f"{n:>12,} {'-':>14} {t_novo:>12.3f} {'-':>8}")
+
+
+if __name__ == '__main__':
+    main()
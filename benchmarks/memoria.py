@@ -0,0 +1,41 @@
+"""
+Relatório de memória das abas: DataFrame como sai do pd.read_excel contra o mesmo
+DataFrame depois do esquema de tipos (carregamento.ESQUEMAS), medido com
+memory_usage(deep=True).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.memoria
+    python -m benchmarks.memoria --planilha outra.xlsx
+"""
+import argparse
+
+import pandas as pd
+
+from carregamento import ABAS, ARQUIVO_PADRAO, limpar_colunas, preparar_aba
+
+
+def memoria(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--planilha', default=ARQUIVO_PADRAO)
+    args = parser.parse_args()
+
+    print(f"{'aba':<14} {'linhas':>8} {'antes (MB)':>11} {'depois (MB)':>12} {'redução':>8}")
+    total_antes = total_depois = 0
+    with pd.ExcelFile(args.planilha) as xls:
+        for aba, cabecalho in ABAS.items():
+            bruto = limpar_colunas(pd.read_excel(xls, sheet_name=aba, header=cabecalho))
+            antes = memoria(bruto)
+            depois = memoria(preparar_aba(aba, bruto.copy()))
+            total_antes += antes
+            total_depois += depois
+            print(f"{aba:<14} {len(bruto):>8} {antes / 2**20:>11.2f} {depois / 2**20:>12.2f} {antes / depois:>7.1f}x")
+    print(f"{'total':<14} {'':>8} {total_antes / 2**20:>11.2f} {total_depois / 2**20:>12.2f} "
+          f"{total_antes / total_depois:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
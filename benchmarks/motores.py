@@ -0,0 +1,54 @@
+"""
+Compara os motores de cálculo dos indicadores (motores.py): tempo de cada um e
+igualdade dos resultados com o pandas (a referência), em frames sintéticos já
+tratados como pelo carregador.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.motores
+    python -m benchmarks.motores --linhas 1000000 10000000 --motores pandas duckdb
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime
+
+from benchmarks.sinteticos import gerar_frames
+from carregamento import ABAS, preparar_aba
+from motores import MOTOR_REFERENCIA, MOTORES, diferencas, disponivel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--motores', nargs='+', default=list(MOTORES))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    motores = [motor for motor in args.motores if disponivel(motor)]
+    for motor in set(args.motores) - set(motores):
+        print(f"{motor}: indisponível (pacote não instalado)")
+    agora = datetime.now()
+    divergencias = 0
+    print(f"{'linhas':>12} {'motor':>8} {'tempo (ms)':>11} {'x pandas':>9}  resultado")
+    for n_linhas in args.linhas:
+        # Mesmos tipos que o carregador entrega (categorias, datas, inteiros reduzidos)
+        frames = [preparar_aba(aba, df) for aba, df in zip(ABAS, gerar_frames(n_linhas))]
+        referencia = MOTORES[MOTOR_REFERENCIA](*frames, agora=agora)
+        tempo_referencia = None
+        for motor in motores:
+            calcular = MOTORES[motor]
+            resultado = calcular(*frames, agora=agora)
+            tempo = min(timeit.repeat(lambda: calcular(*frames, agora=agora), number=1, repeat=args.repeticoes))
+            if motor == MOTOR_REFERENCIA:
+                tempo_referencia = tempo
+            diferentes = diferencas(referencia, resultado)
+            divergencias += bool(diferentes)
+            comparacao = f"{tempo_referencia / tempo:>8.1f}x" if tempo_referencia else f"{'-':>9}"
+            print(f"{n_linhas:>12,} {motor:>8} {tempo * 1e3:>11.1f} {comparacao}  "
+                  f"{'igual ao pandas' if not diferentes else diferentes}")
+    if divergencias:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
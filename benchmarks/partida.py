@@ -0,0 +1,165 @@
+"""
+Relatório do tempo de subida dos apps Dash: tempo de importação de cada módulo
+(python -X importtime) e o tempo até o primeiro byte servido por um processo novo,
+até o layout da página de espera e até o dashboard completo.
+
+Com --verificar, termina com erro se algum módulo pesado for importado na subida ou se
+o primeiro byte passar de --limite-ttfb segundos (para rodar na integração contínua).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.partida
+    python -m benchmarks.partida --apps app --saida partida.json --verificar --limite-ttfb 3
+"""
+import argparse
+import ast
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ('app', 'dash_contratos_materiais_app')
+
+# Módulos que não devem ser importados antes do servidor subir (vêm com a carga dos dados)
+MODULOS_PESADOS = ('pandas', 'plotly.express', 'openpyxl', 'pyarrow', 'carregamento', 'metricas', 'motores', 'cubo', 'detalhe')
+
+
+def _imports_no_topo(modulo):
+    # Comandos import do nível do módulo, na ordem do arquivo (os imports dentro de funções
+    # são adiados), e os módulos que eles nomeiam
+    with open(os.path.join(RAIZ, modulo.replace('.', os.sep) + '.py'), encoding='utf-8') as arquivo:
+        fonte = arquivo.read()
+    comandos = [no for no in ast.parse(fonte).body if isinstance(no, (ast.Import, ast.ImportFrom))]
+    nomes = {no.module for no in comandos if isinstance(no, ast.ImportFrom)}
+    nomes.update(alias.name for no in comandos if isinstance(no, ast.Import) for alias in no.names)
+    return [ast.get_source_segment(fonte, no) for no in comandos], nomes
+
+
+def importacoes(modulo):
+    """
+    Tempo de importação (ms) de ``modulo`` e de cada um dos seus imports de topo, e os
+    módulos pesados importados por eles.
+
+    A thread de carga importa em paralelo e embaralha a saída do -X importtime; por isso
+    os imports de topo são medidos sozinhos (cada um descontando o que os anteriores já
+    trouxeram) e o total é o tempo de relógio do ``import`` do módulo.
+    """
+    comandos, nomes = _imports_no_topo(modulo)
+    # -X importtime escreve no stderr: "import time: próprio | acumulado | nome" (indentado pelo nível)
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', '\n'.join(comandos)],
+                              capture_output=True, text=True, check=True, cwd=RAIZ)
+    linhas = [linha.split('|') for linha in processo.stderr.splitlines()[1:] if linha.startswith('import time:')]
+    diretos, importados = {}, set()
+    for _, acumulado, nome in linhas:
+        importados.add(nome.strip())
+        if nome.strip() in nomes and not nome[1:].startswith(' '):
+            diretos[nome.strip()] = int(acumulado) / 1e3
+
+    total = subprocess.run(
+        [sys.executable, '-c', f'import time; inicio = time.perf_counter(); import {modulo}; '
+                               f'print(time.perf_counter() - inicio)'],
+        capture_output=True, text=True, check=True, cwd=RAIZ,
+    )
+    return {
+        'total_ms': float(total.stdout.split()[-1]) * 1e3,
+        'modulos_ms': dict(sorted(diretos.items(), key=lambda item: -item[1])),
+        'pesados': [nome for nome in MODULOS_PESADOS if nome in importados],
+    }
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=60) as resposta:
+        return resposta.read()
+
+
+def _esperar(url, inicio, timeout, condicao=lambda corpo: True):
+    # Segundos desde ``inicio`` até ``url`` responder com um corpo que satisfaça ``condicao``
+    while time.perf_counter() - inicio < timeout:
+        try:
+            if condicao(_get(url)):
+                return time.perf_counter() - inicio
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} não respondeu em {timeout} s")
+
+
+def tempo_ate_primeiro_byte(modulo, timeout):
+    """Sobe ``modulo`` num processo novo e mede (em s, desde o início do processo) as primeiras respostas."""
+    porta = _porta_livre()
+    url = f'http://127.0.0.1:{porta}'
+    inicio = time.perf_counter()
+    servidor = subprocess.Popen([sys.executable, '-m', 'benchmarks.partida', '--servir', modulo, '--porta', str(porta)],
+                                cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return {
+            'primeiro_byte_s': _esperar(f'{url}/', inicio, timeout),
+            'layout_s': _esperar(f'{url}/_dash-layout', inicio, timeout),
+            'dados_prontos_s': _esperar(f'{url}/_dash-layout', inicio, timeout,
+                                        lambda corpo: b'espera_dados' not in corpo),
+        }
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def servir(modulo, porta):
+    # Como o streamlit_app.py: servidor WSGI de threads no próprio processo
+    from importlib import import_module
+    from werkzeug.serving import make_server
+
+    app = import_module(modulo).app
+    make_server('127.0.0.1', porta, app.server, threaded=True).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', nargs='+', default=list(APPS))
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--saida', help='grava o relatório em JSON')
+    parser.add_argument('--verificar', action='store_true')
+    parser.add_argument('--limite-ttfb', type=float, default=3.0)
+    parser.add_argument('--servir', metavar='MODULO', help=argparse.SUPPRESS)
+    parser.add_argument('--porta', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir:
+        servir(args.servir, args.porta)
+        return
+
+    relatorio, problemas = {}, []
+    for modulo in args.apps:
+        resultado = {'importacao': importacoes(modulo), **tempo_ate_primeiro_byte(modulo, args.timeout)}
+        relatorio[modulo] = resultado
+        importacao = resultado['importacao']
+        print(f"{modulo}: import {importacao['total_ms']:.0f} ms | primeiro byte {resultado['primeiro_byte_s']:.2f} s | "
+              f"layout {resultado['layout_s']:.2f} s | dados prontos {resultado['dados_prontos_s']:.2f} s")
+        for nome, tempo in list(importacao['modulos_ms'].items())[:10]:
+            print(f"    {nome:<36} {tempo:>8.1f} ms")
+        if importacao['pesados']:
+            problemas.append(f"{modulo} importa na subida: {', '.join(importacao['pesados'])}")
+        if resultado['primeiro_byte_s'] > args.limite_ttfb:
+            problemas.append(f"{modulo}: primeiro byte em {resultado['primeiro_byte_s']:.2f} s "
+                             f"(limite {args.limite_ttfb} s)")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    for problema in problemas:
+        print(f"PROBLEMA: {problema}")
+    if args.verificar and problemas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
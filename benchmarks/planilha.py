@@ -0,0 +1,173 @@
+"""
+Gera planilhas sintéticas com o mesmo layout da 'BASE BI CONTRATOS.xlsx': mesmas abas,
+mesmos cabeçalhos (com os espaços originais), a linha de totais acima do cabeçalho da
+'ANÁLISE' (header=1) e todas as colunas, com tipos parecidos com os reais.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.planilha 100000 sintetica_100k.xlsx
+"""
+import argparse
+import time
+from datetime import time as hora
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from benchmarks.sinteticos import gerar_frames
+
+# Cabeçalhos exatamente como estão na planilha real (None = coluna sem nome no fim da aba)
+CABECALHOS = {
+    'ANÁLISE': (
+        'Doc.compra', 'Fornecedor', 'Família', 'Linha de Negócio', 'InPerVal', 'FimValid/',
+        'Prazo para encerrar (D)', 'Farol Prazo', '    Val.fixado', '   ValGlPend.', 'Moeda', 'Tipo Fornecedor',
+        'Farol SALDO', 'Ampliação Prazo', 'Ampliação Saldo', 'Ação Macro', 'Prazo Licitação', 'Ação Contrato',
+        'Nº BRA', 'Nº RDA', 'Responsável Ação', 'OBS', 'TIPO DE MULTA', 'DATA DE APLICAÇÃO', 'Nº Identificação',
+        None,
+    ),
+    'Contratos': (
+        'Data doc/', 'Doc.compra', 'InPerVal', 'FimValid/', 'OrgC', 'E', 'Itm', 'Material', 'Texto breve', 'Cen.',
+        'Dep.', '     Qtd.prev.', '  Q.fix.pend', '   Preço líq.', 'Moeda', '   por', '    Val.fixado',
+        '   ValGlPend.', 'Fornecedor/centro fornecedor', 'Grupo de mercadorias', 'Família', 'GESTOR',
+        'PREÇO FINAL', 'QTDE DISPONIVEL EM CONTRATO', 'Linha de Negócio', 'Consumo Mínimo',
+        'Valor Consumo Mínimo', 'CHECK', 'Código',
+    ),
+    'Demanda SPT': (
+        'E4E', 'MATERIAL', 'Família', 'MG CODE', 'SUBSTITUIDO 1', 'SUBSTITUIDO 2', 'PREÇO', 'Mensal 2024',
+        'Total 2024', 'Valor Anual', 'Contagem', 'Contrato Vigente', 'Qnt Licitação', 'Licitação em Curso',
+        'Data Fim Licitação', 'Ação Necessária', None, None, None,
+    ),
+}
+
+TEXTOS_MATERIAL = ['CABO BT PRE-REUN AL 3X50+70', 'POSTE,CONCRETO,DT,12/600DAN', 'RELIG,RD,3F,15kV,630A,12.5kA',
+                   'CONECTOR,CUNHA,AL,TIPO I', 'TRAFO,DX,15KVA,13.8KV/220V', 'ISOLADOR,PILAR,POLIMERICO,15KV']
+
+
+def _completar_analise(df, rng):
+    n = len(df)
+    hoje = pd.Timestamp.now().normalize()
+    df['InPerVal'] = df['FimValid/'] - pd.to_timedelta(rng.integers(365, 1100, n), unit='D')
+    df['Prazo para encerrar (D)'] = (df['FimValid/'] - hoje).dt.days
+    df['Farol Prazo'] = np.where(df['Prazo para encerrar (D)'] < 180, 'PRAZO CRÍTICO', 'OK')
+    df['Moeda'] = rng.choice(['BRL', 'BRL', 'BRL', 'USD', 'EUR'], n)
+    df['Tipo Fornecedor'] = rng.choice(['Nacional', 'Internacional'], n, p=[0.9, 0.1])
+    df['Ampliação Prazo'] = rng.choice(['LIMITE 3 ANOS', 'APLICAR RDA/CHO PRAZO', 'MONITORAR CONTRATO'], n)
+    df['Ampliação Saldo'] = rng.choice(['APLICAR RDA/CHO MONTO', 'MONITORAR CONSUMO'], n)
+    df['Ação Macro'] = rng.choice(['ANTECIPAR LICITAÇÃO', 'AGUARDAR LICITAÇÃO', 'MONITORAR CONTRATO'], n)
+    df['Prazo Licitação'] = hora(0, 0)
+    df['Ação Contrato'] = rng.choice(['Iniciar Licitação', 'Aguardar Licitação', 'RDA Aplicada'], n)
+    df['Nº BRA'] = None
+    df['Nº RDA'] = None
+    df['Responsável Ação'] = rng.choice(['SC Brasil', 'SC Local', 'Procurement', '-'], n)
+    df['OBS'] = None
+    df['TIPO DE MULTA'] = rng.choice([' ', 'Logistica'], n)
+    df['DATA DE APLICAÇÃO'] = None
+    df['Nº Identificação'] = None
+    return df
+
+
+def _completar_contratos(df, rng):
+    n = len(df)
+    material = rng.integers(100000, 400000, n)
+    df['Data doc/'] = df['FimValid/'] - pd.to_timedelta(rng.integers(900, 1300, n), unit='D')
+    df['InPerVal'] = df['Data doc/'] - pd.to_timedelta(rng.integers(30, 200, n), unit='D')
+    df['OrgC'] = 'GPBR'
+    df['E'] = None
+    df['Itm'] = (df.groupby('Doc.compra').cumcount().to_numpy() + 1) * 10
+    df['Material'] = material
+    df['Texto breve'] = rng.choice(TEXTOS_MATERIAL, n)
+    df['Cen.'] = rng.choice(['BL00', 'BL01', 'BC03', ''], n)
+    df['Dep.'] = rng.choice(['', 'BL11'], n)
+    df['Qtd.prev.'] = rng.integers(1, 5000, n)
+    df['Q.fix.pend'] = (df['Qtd.prev.'] * rng.random(n)).round()
+    df['Preço líq.'] = (df['Val.fixado'] / df['Qtd.prev.']).round(2)
+    df['Moeda'] = 'BRL'
+    df['por'] = 1
+    df['PREÇO FINAL'] = df['Preço líq.']
+    df['QTDE DISPONIVEL EM CONTRATO'] = df['Q.fix.pend']
+    df['Linha de Negócio'] = rng.choice(['Linhas', 'Subestações', 'Local', 'Smartgrid'], n)
+    df['CHECK'] = df['Doc.compra'] + '-' + material.astype(str)
+    df['Código'] = material.astype(str)
+    return df
+
+
+def _completar_demanda(df, rng):
+    n = len(df)
+    mensal = rng.uniform(0, 200000, n).round(4)
+    df['MATERIAL'] = rng.choice(TEXTOS_MATERIAL, n)
+    df['MG CODE'] = rng.choice([f'FE{i:06d}' for i in range(300)], n)
+    df['SUBSTITUIDO 1'] = rng.integers(0, 400000, n)
+    df['SUBSTITUIDO 2'] = None
+    df['PREÇO'] = rng.uniform(1, 5000, n).round(4)
+    df['Mensal 2024'] = mensal
+    df['Total 2024'] = (mensal * 12).round().astype(int)
+    df['Valor Anual'] = (df['Total 2024'] * df['PREÇO']).round(2)
+    df['Contagem'] = rng.integers(1, 6, n)
+    df['Qnt Licitação'] = rng.uniform(0, 1e6, n).round(2)
+    df['Licitação em Curso'] = rng.choice(['Sim', 'Não'], n)
+    df['Data Fim Licitação'] = pd.Timestamp('2024-12-31') - pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+    df['Ação Necessária'] = None
+    return df
+
+
+def _valores(df, cabecalho):
+    # Colunas na ordem do cabeçalho, já como valores Python (NaN/NaT -> célula vazia)
+    colunas = []
+    for nome in cabecalho:
+        if nome is None:
+            colunas.append([None] * len(df))
+            continue
+        serie = df[nome.strip()]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            serie = serie.dt.to_pydatetime()
+            colunas.append([None if pd.isna(valor) else valor for valor in serie])
+        else:
+            colunas.append([None if valor is None or (isinstance(valor, float) and np.isnan(valor)) else valor
+                            for valor in serie.astype(object).tolist()])
+    return zip(*colunas)
+
+
+def gerar_planilha(caminho, n_linhas, seed=0):
+    """
+    Grava em ``caminho`` um xlsx sintético com ``n_linhas`` linhas na aba Contratos
+    (e as mesmas proporções de benchmarks.sinteticos nas outras abas).
+    """
+    rng = np.random.default_rng(seed + 1)
+    analise_df, contratos_df, demanda_spt_df = gerar_frames(n_linhas, seed)
+    abas = {
+        'ANÁLISE': _completar_analise(analise_df.copy(), rng),
+        'Contratos': _completar_contratos(contratos_df.copy(), rng),
+        'Demanda SPT': _completar_demanda(demanda_spt_df.copy(), rng),
+    }
+
+    wb = Workbook(write_only=True)
+    for aba in ('Contratos', 'ANÁLISE', 'Demanda SPT'):
+        ws = wb.create_sheet(aba)
+        df = abas[aba]
+        if aba == 'ANÁLISE':
+            # Linha de totais acima do cabeçalho (por isso header=1 na leitura)
+            totais = [None] * len(CABECALHOS[aba])
+            totais[0] = len(df)
+            totais[8] = float(df['Val.fixado'].sum())
+            totais[9] = float(df['ValGlPend.'].sum())
+            ws.append(totais)
+        ws.append(list(CABECALHOS[aba]))
+        for linha in _valores(df, CABECALHOS[aba]):
+            ws.append(linha)
+    wb.save(caminho)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('caminho')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    inicio = time.perf_counter()
+    gerar_planilha(args.caminho, args.linhas, args.seed)
+    print(f"{args.caminho}: {args.linhas} linhas em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
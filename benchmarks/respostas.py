@@ -0,0 +1,76 @@
+"""
+Bytes e latência das respostas do app.py no cliente de teste do Flask: sem compressão
+(como era antes), com gzip e com brotli, e a revalidação do layout com ETag (304).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.respostas
+"""
+import argparse
+import re
+import timeit
+
+from app import app, atualizador
+
+# Partes carregadas sob demanda pelo navegador quando a página tem gráfico e dropdown
+PARTES_ASSINCRONAS = [
+    '/_dash-component-suites/dash/dcc/async-graph.js',
+    '/_dash-component-suites/dash/dcc/async-dropdown.js',
+    '/_dash-component-suites/plotly/package_data/plotly.min.js',
+]
+
+CODIFICACOES = {
+    'sem compressão (antes)': 'identity',
+    'gzip': 'gzip',
+    'brotli (depois)': 'br',
+}
+
+
+def recursos_da_pagina(cliente):
+    # Página inicial, scripts e folhas de estilo que o navegador baixa, e as rotas de dados
+    html = cliente.get('/').get_data(as_text=True)
+    arquivos = re.findall(r'<script src="([^"]+)"', html) + re.findall(r'<link rel="stylesheet" href="([^"]+)"', html)
+    return ['/', *arquivos, *PARTES_ASSINCRONAS, '/_dash-layout', '/_dash-dependencies', '/snapshot']
+
+
+def medir(cliente, caminho, cabecalhos, repeticoes):
+    resposta = cliente.get(caminho, headers=cabecalhos)
+    tempo = min(timeit.repeat(lambda: cliente.get(caminho, headers=cabecalhos), number=1, repeat=repeticoes))
+    return resposta, tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+    # Mede o dashboard completo, não a página de espera da subida
+    atualizador.esperar()
+    cliente = app.server.test_client()
+
+    totais = {nome: [0, 0.0] for nome in CODIFICACOES}
+    print(f"{'recurso':<48}" + ''.join(f"{nome:>26}" for nome in CODIFICACOES))
+    for caminho in recursos_da_pagina(cliente):
+        colunas = []
+        for nome, codificacao in CODIFICACOES.items():
+            resposta, tempo = medir(cliente, caminho, {'Accept-Encoding': codificacao}, args.repeticoes)
+            tamanho = len(resposta.get_data())
+            totais[nome][0] += tamanho
+            totais[nome][1] += tempo
+            colunas.append(f"{tamanho / 1024:>10.1f} KB {tempo * 1e3:>8.2f} ms")
+        print(f"{caminho.split('?')[0][-48:]:<48}" + ''.join(f"{coluna:>26}" for coluna in colunas))
+    print(f"{'total da página':<48}" + ''.join(
+        f"{f'{tamanho / 1024:>10.1f} KB {tempo * 1e3:>8.2f} ms':>26}" for tamanho, tempo in totais.values()))
+
+    # Revalidação: o navegador manda o ETag recebido e o layout não é montado de novo
+    print()
+    for caminho in ('/_dash-layout', '/snapshot'):
+        primeira, tempo_completo = medir(cliente, caminho, {'Accept-Encoding': 'br'}, args.repeticoes)
+        etag = primeira.headers['ETag']
+        revalidacao, tempo_304 = medir(cliente, caminho, {'Accept-Encoding': 'br', 'If-None-Match': etag},
+                                       args.repeticoes)
+        print(f"{caminho:<16} 200: {len(primeira.get_data()):>7} B {tempo_completo * 1e3:>7.2f} ms | "
+              f"If-None-Match {etag} -> {revalidacao.status_code}: {len(revalidacao.get_data()):>3} B "
+              f"{tempo_304 * 1e3:>6.2f} ms | Last-Modified: {primeira.headers['Last-Modified']}")
+
+
+if __name__ == '__main__':
+    main()
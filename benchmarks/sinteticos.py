@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Proporções aproximadas da planilha real: ~7 itens por contrato na aba Contratos
+ITENS_POR_CONTRATO = 7
+
+
+def _docs(n_contratos):
+    return np.array([f'JA{10000000 + i:08d}' for i in range(n_contratos)], dtype=object)
+
+
+def gerar_frames(n_linhas, seed=0):
+    """
+    Gera (analise_df, contratos_df, demanda_spt_df) sintéticos já tratados,
+    com as colunas usadas pelos indicadores e ``n_linhas`` linhas na aba Contratos.
+    """
+    rng = np.random.default_rng(seed)
+    n_contratos = max(n_linhas // ITENS_POR_CONTRATO, 1)
+    docs = _docs(n_contratos)
+    # Garante que os contratos excluídos da regra de consumo mínimo aparecem
+    docs[:2] = ['JA10063222', 'JA10114401'][:len(docs[:2])]
+
+    hoje = pd.Timestamp.now().normalize()
+    val_fixado = rng.uniform(1e4, 5e7, n_contratos).round(2)
+    farol = rng.uniform(0, 1.05, n_contratos)
+    farol[rng.random(n_contratos) < 0.01] = np.nan
+    analise_df = pd.DataFrame({
+        'Doc.compra': docs,
+        'Fornecedor': rng.choice([f'20000{i:05d} FORNECEDOR {i}' for i in range(200)], n_contratos),
+        'Família': rng.choice(['CONECTORES', 'Concretos', 'Condutores', 'Chaves', 'Transformadores'], n_contratos),
+        'Linha de Negócio': rng.choice(['Linhas', 'Subestações', 'Redes'], n_contratos),
+        'FimValid/': hoje + pd.to_timedelta(rng.integers(-60, 900, n_contratos), unit='D'),
+        'Val.fixado': val_fixado,
+        'ValGlPend.': (val_fixado * (1 - np.nan_to_num(farol))).round(2),
+        'Farol SALDO': farol,
+    })
+
+    itens = rng.integers(0, n_contratos, n_linhas)
+    itens[:n_contratos] = np.arange(n_contratos)[:n_linhas]
+    val_item = rng.uniform(1e3, 5e6, n_linhas).round(2)
+    pendente = (val_item * rng.random(n_linhas)).round(2)
+    minimo = np.where(rng.random(n_linhas) < 0.3, (val_item * rng.uniform(0.2, 0.9, n_linhas)).round(2), np.nan)
+    consumo_minimo = rng.choice(np.array(['Sim', 'sim', 0, 1, np.nan], dtype=object), n_linhas)
+    contratos_df = pd.DataFrame({
+        'Doc.compra': docs[itens],
+        'FimValid/': analise_df['FimValid/'].to_numpy()[itens],
+        'Grupo de mercadorias': rng.choice([f'FE{i:06d}' for i in range(300)], n_contratos)[itens],
+        'Família': analise_df['Família'].to_numpy()[itens],
+        'GESTOR': rng.choice(['ANA', 'BRUNO', 'CARLA', 'DIEGO', 'ELISA'], n_linhas),
+        'Val.fixado': val_item,
+        'ValGlPend.': pendente,
+        'Fornecedor/centro fornecedor': analise_df['Fornecedor'].to_numpy()[itens],
+        'Consumo Mínimo': consumo_minimo,
+        'Valor Consumo Mínimo': minimo,
+    })
+
+    n_demanda = max(n_linhas // 2, 1)
+    demanda_spt_df = pd.DataFrame({
+        'E4E': rng.integers(100000, 400000, n_demanda),
+        'Família': rng.choice(['Concretos', 'Condutores', 'Chaves'], n_demanda),
+        'Contrato Vigente': rng.choice(['Sim', 'Não'], n_demanda, p=[0.65, 0.35]),
+    })
+    return analise_df, contratos_df, demanda_spt_df
@@ -0,0 +1,211 @@
+"""
+Suíte de benchmarks reprodutível sobre planilhas sintéticas (benchmarks/planilha.py).
+
+Para cada tamanho mede: carga do Excel (sem snapshot) e do snapshot colunar, cálculo dos
+indicadores, montagem do cubo e uma consulta filtrada, montagem da figura de consumo e
+as requisições do dashboard (layout e callback, num processo com o app.py apontado para
+a planilha sintética). O resultado vai para um JSON, para comparar execuções.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.suite                                  # 10k, 100k e 1M linhas
+    python -m benchmarks.suite --linhas 10000 100000 --saida antes.json
+    python -m benchmarks.suite --comparar antes.json depois.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime
+
+import dash
+import numpy as np
+import pandas as pd
+import plotly
+
+import snapshot
+from benchmarks.planilha import gerar_planilha
+from carregamento import CarregadorPlanilha
+from cubo import CuboContratos
+from graficos import contagens_consumo, criar_figura_consumo
+from metricas import calcular_analise_descritiva
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+PASTA_PLANILHAS = os.path.join(PASTA, 'planilhas')
+PASTA_RESULTADOS = os.path.join(PASTA, 'resultados')
+TAMANHOS = (10_000, 100_000, 1_000_000)
+
+
+def _minimo(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def ambiente():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=PASTA, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'versoes': {'pandas': pd.__version__, 'numpy': np.__version__, 'dash': dash.__version__,
+                    'plotly': plotly.__version__},
+    }
+
+
+def planilha_sintetica(n_linhas, seed):
+    """Caminho da planilha sintética do tamanho pedido, gerando se ainda não existir."""
+    os.makedirs(PASTA_PLANILHAS, exist_ok=True)
+    caminho = os.path.join(PASTA_PLANILHAS, f'sintetica_{n_linhas}_{seed}.xlsx')
+    if os.path.exists(caminho):
+        return caminho, None
+    inicio = time.perf_counter()
+    gerar_planilha(caminho + '.tmp', n_linhas, seed)
+    os.replace(caminho + '.tmp', caminho)
+    return caminho, time.perf_counter() - inicio
+
+
+def medir_requisicoes(caminho, repeticoes):
+    """Layout e callback do app.py (executado num processo próprio, com DASH_PLANILHA=caminho)."""
+    os.environ['DASH_PLANILHA'] = caminho
+    import app
+
+    cliente = app.app.server.test_client()
+    snapshot_atual = app.atualizador.esperar()
+    payload = app.payload_dashboard(snapshot_atual, {}, app.unidades.padrao)
+    familia = snapshot_atual.cubo.opcoes('Família')[0]
+
+    def callback(estado, familias=None):
+        valores = {id_filtro: None for id_filtro in app.FILTROS.values()}
+        valores[app.FILTROS['Família']] = familias
+        corpo = {
+            'output': 'payload_dashboard.data',
+            'outputs': {'id': 'payload_dashboard', 'property': 'data'},
+            'inputs': [{'id': 'interval_component', 'property': 'n_intervals', 'value': 1}]
+                      + [{'id': id_filtro, 'property': 'value', 'value': valor} for id_filtro, valor in valores.items()],
+            'state': [{'id': 'payload_dashboard', 'property': 'data', 'value': estado},
+                      {'id': 'unidade', 'property': 'data', 'value': app.unidades.padrao}],
+            'changedPropIds': ['interval_component.n_intervals'],
+        }
+        resposta = cliente.post('/_dash-update-component', json=corpo)
+        assert resposta.status_code == 200, resposta.status_code
+
+    return {
+        'layout_ms': _minimo(lambda: cliente.get('/_dash-layout'), repeticoes) * 1e3,
+        'callback_sem_mudanca_ms': _minimo(lambda: callback(payload), repeticoes) * 1e3,
+        'callback_payload_ms': _minimo(lambda: callback(None), repeticoes) * 1e3,
+        'callback_filtro_ms': _minimo(lambda: callback(None, [familia]), repeticoes) * 1e3,
+    }
+
+
+def medir_tamanho(n_linhas, seed, repeticoes):
+    caminho, geracao = planilha_sintetica(n_linhas, seed)
+    resultado = {'linhas': n_linhas, 'geracao_s': geracao}
+
+    # Carga a frio, direto do Excel (apaga os snapshots colunares)
+    shutil.rmtree(snapshot.pasta_snapshot(caminho), ignore_errors=True)
+    carregador = CarregadorPlanilha(caminho)
+    inicio = time.perf_counter()
+    carregador.carregar()
+    resultado['carga_excel_s'] = time.perf_counter() - inicio
+    resultado['leitura_abas_excel_s'] = {aba: tempo for aba, (_, tempo) in carregador.tempos_leitura.items()}
+
+    # Carga de um processo novo com os snapshots já gravados
+    carregador = CarregadorPlanilha(caminho)
+    inicio = time.perf_counter()
+    carregador.carregar()
+    resultado['carga_snapshot_s'] = time.perf_counter() - inicio
+
+    frames = carregador.frames()
+    resultado['linhas_abas'] = {aba: len(df) for aba, df in carregador.dados.items()}
+    resultado['indicadores_ms'] = _minimo(lambda: calcular_analise_descritiva(*frames), repeticoes) * 1e3
+
+    inicio = time.perf_counter()
+    cubo = CuboContratos(*frames)
+    resultado['cubo_montagem_s'] = time.perf_counter() - inicio
+    filtros = {'Família': cubo.opcoes('Família')[:1]}
+    resultado['cubo_consulta_ms'] = _minimo(lambda: cubo.consultar(filtros), repeticoes) * 1e3
+
+    contagens = contagens_consumo(calcular_analise_descritiva(*frames))
+    resultado['figura_ms'] = _minimo(lambda: criar_figura_consumo(*contagens).to_json(), repeticoes) * 1e3
+
+    processo = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.suite', '--requisicoes', caminho, '--repeticoes', str(repeticoes)],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(PASTA),
+    )
+    resultado['requisicoes'] = json.loads(processo.stdout.strip().splitlines()[-1])
+    return resultado
+
+
+def _numeros(resultado, prefixo=''):
+    # Achata os tempos de um tamanho em {'caminho.da.metrica': valor} (sem as contagens de linhas)
+    for chave, valor in resultado.items():
+        if chave.startswith('linhas'):
+            continue
+        if isinstance(valor, dict):
+            yield from _numeros(valor, f'{prefixo}{chave}.')
+        elif isinstance(valor, (int, float)):
+            yield f'{prefixo}{chave}', valor
+
+
+def comparar(caminho_antes, caminho_depois):
+    with open(caminho_antes, encoding='utf-8') as arquivo:
+        antes = json.load(arquivo)
+    with open(caminho_depois, encoding='utf-8') as arquivo:
+        depois = json.load(arquivo)
+    print(f"antes: {antes['ambiente']['commit']} ({antes['ambiente']['data']}) | "
+          f"depois: {depois['ambiente']['commit']} ({depois['ambiente']['data']})")
+    for linhas, resultado in depois['resultados'].items():
+        if linhas not in antes['resultados']:
+            continue
+        print(f"\n{int(linhas):,} linhas")
+        base = dict(_numeros(antes['resultados'][linhas]))
+        for metrica, valor in _numeros(resultado):
+            if metrica in base and base[metrica]:
+                print(f"  {metrica:<44} {base[metrica]:>12.3f} {valor:>12.3f} {valor / base[metrica]:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(TAMANHOS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/<data>.json)')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DEPOIS'))
+    parser.add_argument('--requisicoes', metavar='PLANILHA', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.requisicoes:
+        print(json.dumps(medir_requisicoes(args.requisicoes, args.repeticoes)))
+        return
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    relatorio = {'ambiente': ambiente(), 'resultados': {}}
+    for n_linhas in args.linhas:
+        resultado = medir_tamanho(n_linhas, args.seed, args.repeticoes)
+        relatorio['resultados'][str(n_linhas)] = resultado
+        print(f"{n_linhas:>10,} linhas | excel {resultado['carga_excel_s']:.2f} s | "
+              f"snapshot {resultado['carga_snapshot_s']:.3f} s | indicadores {resultado['indicadores_ms']:.1f} ms | "
+              f"figura {resultado['figura_ms']:.1f} ms | "
+              f"callback {resultado['requisicoes']['callback_payload_ms']:.1f} ms", flush=True)
+
+        # Grava a cada tamanho, para não perder as medições já feitas se a execução parar
+        os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados em {saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Cache de unidades (unidades.py): várias planilhas sintéticas acessadas com popularidade
+desigual (Zipf: poucas unidades recebem a maior parte dos acessos), para alguns limites
+de memória do cache.
+
+Mostra acertos, faltas e remoções, a taxa de acerto das unidades mais e menos acessadas
+e a latência de um acerto (o snapshot já está na memória) contra uma falta (a planilha
+é carregada de novo). As planilhas ficam em benchmarks/planilhas, como as da suíte.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.unidades
+    python -m benchmarks.unidades --unidades 12 --linhas 20000 --cache-mb 10 30 100
+"""
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from atualizacao import AtualizadorDashboard
+from benchmarks.suite import planilha_sintetica
+from carregamento import CarregadorPlanilha
+from unidades import CacheUnidades, nome_unidade
+
+
+def criar_atualizador(caminho):
+    # Sem histórico, para não gravar nada ao lado das planilhas sintéticas
+    return AtualizadorDashboard(lambda: CarregadorPlanilha(caminho)).iniciar(esperar=False)
+
+
+def sequencia_acessos(unidades, n_acessos, expoente, seed=0):
+    # Unidade i (0 = mais popular) com probabilidade proporcional a 1 / (i + 1) ** expoente
+    pesos = 1 / np.arange(1, len(unidades) + 1) ** expoente
+    rng = np.random.default_rng(seed)
+    return [unidades[i] for i in rng.choice(len(unidades), n_acessos, p=pesos / pesos.sum())]
+
+
+def simular(planilhas, acessos, limite_mb):
+    cache = CacheUnidades(planilhas, criar_atualizador, limite_bytes=limite_mb * 2**20)
+    cache.obter().esperar()
+    acertos, remocoes = Counter(), 0
+    latencias = {True: [], False: []}
+    for unidade in acessos:
+        antes = {item['unidade'] for item in cache.estado()}
+        inicio = time.perf_counter()
+        cache.obter(unidade).esperar()
+        latencias[unidade in antes].append(time.perf_counter() - inicio)
+        acertos[unidade] += unidade in antes
+        # Uma medição nova pode descarregar outras unidades já no próximo acesso
+        cache.obter(unidade)
+        remocoes += len(antes - {item['unidade'] for item in cache.estado()})
+    for item in cache.estado():
+        cache.obter(item['unidade']).parar()
+    return acertos, remocoes, latencias, cache.estado()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--unidades', type=int, default=8)
+    parser.add_argument('--linhas', type=int, default=10_000, help='linhas da aba Contratos de cada planilha')
+    parser.add_argument('--acessos', type=int, default=200)
+    parser.add_argument('--expoente', type=float, default=1.2, help='expoente da distribuição de Zipf')
+    parser.add_argument('--cache-mb', type=float, nargs='+', default=[5, 15, 1024])
+    args = parser.parse_args()
+
+    planilhas = {}
+    for seed in range(args.unidades):
+        caminho, _ = planilha_sintetica(args.linhas, seed)
+        planilhas[nome_unidade(caminho)] = caminho
+    ordem = list(planilhas)
+    acessos = sequencia_acessos(ordem[1:], args.acessos, args.expoente)
+    vezes = Counter(acessos)
+    populares = ordem[1:1 + max(len(ordem) // 4, 1)]
+
+    print(f"{args.unidades} unidades de {args.linhas} linhas, {args.acessos} acessos "
+          f"(a mais acessada: {vezes.most_common(1)[0][1]}, a menos: {min(vezes.values())})")
+    print(f"{'cache (MB)':>10} {'acertos':>8} {'faltas':>7} {'remoções':>9} {'acerto populares':>17} "
+          f"{'acerto demais':>14} {'acerto (ms)':>12} {'falta (ms)':>11} {'carregadas':>11} {'MB':>6}")
+    for limite_mb in args.cache_mb:
+        acertos, remocoes, latencias, estado = simular(planilhas, acessos, limite_mb)
+        total_acertos = sum(acertos.values())
+        taxa = {
+            grupo: sum(acertos[u] for u in unidades) / max(sum(vezes[u] for u in unidades), 1)
+            for grupo, unidades in (('populares', populares), ('demais', [u for u in vezes if u not in populares]))
+        }
+        mediana = {chave: np.median(valores) * 1e3 if valores else float('nan') for chave, valores in latencias.items()}
+        print(f"{limite_mb:>10g} {total_acertos:>8} {len(acessos) - total_acertos:>7} {remocoes:>9} "
+              f"{taxa['populares']:>17.0%} {taxa['demais']:>14.0%} {mediana[True]:>12.2f} {mediana[False]:>11.1f} "
+              f"{len(estado):>11} {sum(item['bytes'] for item in estado) / 2**20:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
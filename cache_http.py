@@ -0,0 +1,88 @@
+from datetime import date, datetime, time, timezone
+from urllib.parse import quote
+
+from flask import g, request
+
+# Rotas (relativas ao prefixo do Dash) cujo conteúdo só muda com a versão dos dados ou com o dia
+ROTAS_VERSIONADAS = ('_dash-layout', 'snapshot')
+
+
+def etag_dados(snapshot, unidade=None):
+    # Impressão digital do conteúdo (e não o contador de versões, que é de cada processo e
+    # recomeça a cada reinício) e o dia, porque a contagem de vencimentos depende dele;
+    # com várias unidades, o nome da unidade também entra
+    etag = f"{snapshot.digital[:16]}-{date.today():%Y%m%d}"
+    return f"{quote(unidade, safe='')}-{etag}" if unidade else etag
+
+
+def ultima_mudanca(snapshot):
+    """Instante (UTC, em segundos) da última mudança: a atualização dos dados ou a virada do dia."""
+    mudanca = max(snapshot.atualizado_em, datetime.combine(date.today(), time()))
+    return mudanca.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _nao_modificado(etag, modificado_em):
+    etags = request.if_none_match
+    if etags:
+        # O flask-compress acrescenta o algoritmo ao ETag enviado (ex.: "59810e0533acb852-20240601:br")
+        return etags.star_tag or etag in {valor.split(':')[0] for valor in etags.as_set()}
+    return request.if_modified_since is not None and modificado_em <= request.if_modified_since
+
+
+def configurar_cache_http(app, atualizador, rotas=ROTAS_VERSIONADAS):
+    """
+    ETag e Last-Modified nas rotas de ``rotas``, derivados do conteúdo dos dados do snapshot.
+
+    Se o navegador já tem a versão atual, a resposta é um 304 sem corpo, devolvido antes
+    de montar o layout. O Cache-Control no-cache faz o navegador revalidar a cada acesso.
+
+    ``atualizador`` também pode ser uma função que devolve (unidade, atualizador) da
+    requisição atual, com várias planilhas no mesmo servidor (ver unidades.py); ela não
+    deve carregar a unidade, e devolve atualizador None se ela não estiver carregada.
+    """
+    if callable(atualizador):
+        atualizador_da_requisicao = atualizador
+    else:
+        def atualizador_da_requisicao():
+            return None, atualizador
+
+    prefixo = app.config.routes_pathname_prefix
+    caminhos = {prefixo + rota for rota in rotas}
+    servidor = app.server
+
+    @servidor.before_request
+    def responder_nao_modificado():
+        if request.method != 'GET' or request.path not in caminhos:
+            return None
+        # Os validadores da resposta vêm deste snapshot, lido antes de montar o conteúdo:
+        # se um snapshot novo for publicado no meio, o ETag fica antigo (e não novo demais)
+        unidade, atualizador_atual = atualizador_da_requisicao()
+        if atualizador_atual is None:
+            # Unidade inexistente ou fora do cache: o conteúdo responde sem validadores
+            return None
+        snapshot = g.snapshot_validado = atualizador_atual.snapshot
+        g.unidade_validada = unidade
+        if snapshot is None:
+            return None
+        etag = etag_dados(snapshot, unidade)
+        modificado_em = ultima_mudanca(snapshot)
+        if _nao_modificado(etag, modificado_em):
+            resposta = servidor.response_class(status=304)
+            _validadores(resposta, etag, modificado_em)
+            return resposta
+        return None
+
+    @servidor.after_request
+    def adicionar_validadores(resposta):
+        # Só as rotas versionadas têm snapshot_validado; sem snapshot (página de espera)
+        # não há versão dos dados para validar
+        snapshot = g.get('snapshot_validado')
+        if snapshot is not None and resposta.status_code == 200:
+            _validadores(resposta, etag_dados(snapshot, g.get('unidade_validada')), ultima_mudanca(snapshot))
+        return resposta
+
+
+def _validadores(resposta, etag, modificado_em):
+    resposta.set_etag(etag)
+    resposta.last_modified = modificado_em
+    resposta.cache_control.no_cache = True
@@ -0,0 +1,372 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+import snapshot
+from instrumentacao import LEITURA_ABA, LINHAS_ABA, RECARGAS, TRATAMENTO_ABA
+
+logger = logging.getLogger(__name__)
+
+# Arquivo padrão usado pelos dashboards
+ARQUIVO_PADRAO = 'BASE BI CONTRATOS.xlsx'
+
+# Abas utilizadas e a linha de cabeçalho de cada uma
+ABAS = {
+    'ANÁLISE': 1,  # Definindo a segunda linha como cabeçalho
+    'Contratos': 0,  # Definindo a primeira linha como cabeçalho
+    'Demanda SPT': 0,
+}
+
+# Tipos de cada coluna, aplicados uma vez na leitura:
+#   categoria: textos repetidos (códigos inteiros + dicionário de valores)
+#   dinheiro: float64 arredondado em centavos (e não um inteiro de centavos ou decimal:
+#     todos os cálculos dos indicadores são em float)
+#   percentual: float64 sem arredondar (Farol SALDO: com float32, valores exatamente em
+#     0.6 ou 0.8 podiam mudar de faixa de consumo)
+#   data: datetime64 (textos no formato dd/mm/aaaa)
+#   inteiro: menor tipo inteiro que comporta os valores
+ESQUEMAS = {
+    'ANÁLISE': {
+        'Doc.compra': 'categoria',
+        'Fornecedor': 'categoria',
+        'Família': 'categoria',
+        'Linha de Negócio': 'categoria',
+        'InPerVal': 'data',
+        'FimValid/': 'data',
+        'Prazo para encerrar (D)': 'inteiro',
+        'Farol Prazo': 'categoria',
+        'Val.fixado': 'dinheiro',
+        'ValGlPend.': 'dinheiro',
+        'Moeda': 'categoria',
+        'Tipo Fornecedor': 'categoria',
+        'Farol SALDO': 'percentual',
+        'Ampliação Prazo': 'categoria',
+        'Ampliação Saldo': 'categoria',
+        'Ação Macro': 'categoria',
+        'Ação Contrato': 'categoria',
+        'Responsável Ação': 'categoria',
+        'TIPO DE MULTA': 'categoria',
+        'DATA DE APLICAÇÃO': 'data',
+    },
+    'Contratos': {
+        'Data doc/': 'data',
+        'Doc.compra': 'categoria',
+        'InPerVal': 'data',
+        'FimValid/': 'data',
+        'OrgC': 'categoria',
+        'Itm': 'inteiro',
+        'Material': 'inteiro',
+        'Texto breve': 'categoria',
+        'Cen.': 'categoria',
+        'Dep.': 'categoria',
+        'Preço líq.': 'dinheiro',
+        'Moeda': 'categoria',
+        'por': 'inteiro',
+        'Val.fixado': 'dinheiro',
+        'ValGlPend.': 'dinheiro',
+        'Fornecedor/centro fornecedor': 'categoria',
+        'Grupo de mercadorias': 'categoria',
+        'Família': 'categoria',
+        'GESTOR': 'categoria',
+        'PREÇO FINAL': 'dinheiro',
+        'Linha de Negócio': 'categoria',
+        'Consumo Mínimo': 'categoria',
+        'Valor Consumo Mínimo': 'dinheiro',
+        'CHECK': 'categoria',
+    },
+    'Demanda SPT': {
+        'Família': 'categoria',
+        'MG CODE': 'categoria',
+        'Contrato Vigente': 'categoria',
+        'Licitação em Curso': 'categoria',
+    },
+}
+
+# Colunas lidas pelos indicadores, regras DAX, cubo, tabela de detalhe e histórico: um valor
+# fora do tipo nelas é erro (a carga falha e o último snapshot continua publicado). Nas
+# demais, o valor que não converte vira vazio, com um aviso no log
+COLUNAS_ESTRITAS = {
+    'ANÁLISE': {'FimValid/', 'Prazo para encerrar (D)', 'Val.fixado', 'ValGlPend.', 'Farol SALDO'},
+    'Contratos': {'Val.fixado', 'ValGlPend.', 'Valor Consumo Mínimo'},
+}
+
+# Muda sempre que o tratamento das abas mudar, para invalidar snapshots antigos
+VERSAO_TRATAMENTO = 3
+
+# Partes do xlsx compartilhadas por todas as abas: se mudarem, todas precisam ser relidas
+# (as células de texto apontam para sharedStrings e as datas dependem dos formatos em styles)
+PARTES_COMPARTILHADAS = ('xl/sharedStrings.xml', 'xl/styles.xml', 'xl/workbook.xml')
+
+_NS_PLANILHA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_NS_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def limpar_colunas(df):
+    # Remover espaços em branco dos nomes das colunas
+    df.columns = [str(col).strip() for col in df.columns]
+    return df
+
+
+def _texto_misto(serie):
+    # Colunas com textos e números misturados viram texto (mantendo os vazios),
+    # senão não podem ser gravadas em formato colunar
+    return serie.map(lambda valor: valor if pd.isna(valor) else str(valor)).astype(object)
+
+
+def _tipo_misto(serie):
+    return serie.dtype == object and serie.dropna().map(type).nunique() > 1
+
+
+def _converter(serie, tipo, estrito=True):
+    # Com ``estrito``, um valor que não converte levanta ValueError; sem, vira vazio
+    erros = 'raise' if estrito else 'coerce'
+    if tipo == 'data':
+        return pd.to_datetime(serie, format='%d/%m/%Y', errors=erros)
+    if tipo == 'dinheiro':
+        # Valores em reais arredondados em centavos
+        return pd.to_numeric(serie, errors=erros).astype('float64').round(2)
+    if tipo == 'percentual':
+        return pd.to_numeric(serie, errors=erros).astype('float64')
+    if tipo == 'inteiro':
+        return pd.to_numeric(serie, errors=erros, downcast='integer')
+    if tipo == 'categoria':
+        # Textos repetidos viram códigos inteiros + uma única cópia de cada valor
+        return (_texto_misto(serie) if _tipo_misto(serie) else serie).astype('category')
+    raise ValueError(f"Tipo desconhecido no esquema: {tipo}")
+
+
+def preparar_aba(aba, df):
+    """
+    Tratamento aplicado a toda aba lida: limpa os nomes das colunas, aplica o esquema
+    de tipos da aba (ESQUEMAS) e converte para texto as demais colunas de tipo misto.
+    """
+    df = limpar_colunas(df)
+
+    # 'Consumo Mínimo' mistura 'Sim'/'sim' com 1/0; o 1 vira 'Sim' para a regra
+    # (texto == 'sim' ou valor == 1) continuar valendo depois da conversão para texto
+    if 'Consumo Mínimo' in df.columns:
+        df['Consumo Mínimo'] = df['Consumo Mínimo'].map(lambda valor: 'Sim' if valor == 1 else valor)
+
+    esquema = ESQUEMAS.get(aba, {})
+    estritas = COLUNAS_ESTRITAS.get(aba, set())
+    for coluna, tipo in esquema.items():
+        if coluna not in df.columns:
+            continue
+        convertida = _converter(df[coluna], tipo, estrito=coluna in estritas)
+        descartados = int((df[coluna].notna() & convertida.isna()).sum())
+        if descartados:
+            logger.warning("Aba %s, coluna %s: %d valores fora do tipo '%s' ficaram vazios",
+                           aba, coluna, descartados, tipo)
+        df[coluna] = convertida
+
+    for coluna in df.columns:
+        if coluna not in esquema and _tipo_misto(df[coluna]):
+            df[coluna] = _texto_misto(df[coluna])
+    return df
+
+
+def ler_aba_excel(caminho, aba, cabecalho):
+    """
+    Lê e trata uma aba do Excel (``caminho`` também pode ser um pd.ExcelFile já aberto).
+    Retorna (df, {'leitura': segundos, 'tratamento': segundos}). É a função executada
+    nos processos filhos.
+    """
+    inicio = time.perf_counter()
+    df = pd.read_excel(caminho, sheet_name=aba, header=cabecalho)
+    lido = time.perf_counter()
+    df = preparar_aba(aba, df)
+    return df, {'leitura': lido - inicio, 'tratamento': time.perf_counter() - lido}
+
+
+def contexto_processos():
+    """
+    Contexto dos processos de leitura: 'forkserver' onde existe, senão 'spawn'.
+
+    Com 'fork', o filho copiaria o estado das threads do servidor (locks presos pela
+    thread de atualização, pelo gunicorn ou pelo Flask); o forkserver é um processo
+    limpo, com o pandas e este módulo já importados, de onde os filhos são copiados.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        contexto.set_forkserver_preload([__name__])
+        return contexto
+    return multiprocessing.get_context('spawn')
+
+
+def ler_abas_excel(caminho, abas, processos=None):
+    """
+    Lê várias abas do Excel ao mesmo tempo, uma por processo, para o tempo total ficar
+    perto do tempo da aba mais lenta. ``abas`` mapeia o nome da aba para a linha de cabeçalho.
+
+    Com ``processos=1``, uma só aba ou uma só CPU, lê em série no próprio processo;
+    se o pool de processos não puder ser usado, também cai para a leitura em série.
+    Retorna ({aba: df}, {aba: {'leitura': segundos, 'tratamento': segundos}}).
+    """
+    if processos is None:
+        processos = min(len(abas), os.cpu_count() or 1)
+
+    if processos > 1 and len(abas) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto_processos()) as pool:
+                futuros = {aba: pool.submit(ler_aba_excel, caminho, aba, cabecalho) for aba, cabecalho in abas.items()}
+                resultados = {aba: futuro.result() for aba, futuro in futuros.items()}
+            return ({aba: df for aba, (df, _) in resultados.items()},
+                    {aba: tempo for aba, (_, tempo) in resultados.items()})
+        except (OSError, BrokenProcessPool):
+            pass
+
+    # Leitura em série, reaproveitando o mesmo arquivo aberto
+    dados, tempos = {}, {}
+    with pd.ExcelFile(caminho) as xls:
+        for aba, cabecalho in abas.items():
+            dados[aba], tempos[aba] = ler_aba_excel(xls, aba, cabecalho)
+    return dados, tempos
+
+
+def partes_das_abas(zf):
+    """Mapeia o nome de cada aba para o caminho do XML dela dentro do xlsx."""
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    alvos = {rel.get('Id'): rel.get('Target') for rel in rels.iter(_NS_REL + 'Relationship')}
+
+    partes = {}
+    for sheet in workbook.iter(_NS_PLANILHA + 'sheet'):
+        alvo = alvos.get(sheet.get(_NS_REL_ID))
+        if alvo is None:
+            continue
+        # O destino pode ser absoluto ("/xl/worksheets/...") ou relativo à pasta xl/
+        if alvo.startswith('/'):
+            partes[sheet.get('name')] = alvo.lstrip('/')
+        else:
+            partes[sheet.get('name')] = posixpath.normpath(posixpath.join('xl', alvo))
+    return partes
+
+
+def impressoes_digitais(caminho, abas):
+    """
+    Calcula uma impressão digital do conteúdo de cada aba sem descompactar o arquivo.
+
+    Usa o CRC32 e o tamanho gravados no diretório central do zip para o XML da aba
+    e para as partes compartilhadas, então o custo não depende do tamanho das abas.
+    """
+    with zipfile.ZipFile(caminho) as zf:
+        info = {i.filename: (i.CRC, i.file_size) for i in zf.infolist()}
+        partes = partes_das_abas(zf)
+
+    compartilhadas = tuple(info.get(p) for p in PARTES_COMPARTILHADAS)
+    digitais = {}
+    for aba in abas:
+        if aba not in partes:
+            raise ValueError(f"Aba '{aba}' não encontrada em {caminho}")
+        digitais[aba] = (info.get(partes[aba]), compartilhadas)
+    return digitais
+
+
+def resumo_digitais(digitais):
+    """Uma impressão digital (sha1) para o conjunto das impressões digitais das abas."""
+    return hashlib.sha1(repr(sorted(digitais.items())).encode()).hexdigest()
+
+
+class CarregadorPlanilha:
+    """
+    Carrega as abas da planilha e só relê o que mudou desde a última leitura.
+
+    A cada chamada de ``carregar``:
+      1. se mtime e tamanho do arquivo não mudaram, nada é feito;
+      2. senão, compara o CRC de cada parte do xlsx com a leitura anterior;
+      3. só as abas cujo XML (ou partes compartilhadas) mudou são lidas de novo,
+         a partir do snapshot colunar ao lado do xlsx quando ele corresponde ao
+         conteúdo atual da aba, ou do Excel (gravando um snapshot novo). As abas
+         que vêm do Excel são lidas em paralelo, uma por processo (``processos``).
+
+    ``versao`` é incrementada sempre que alguma aba é relida, e serve de chave
+    para quem quiser guardar resultados calculados em cima dos dados.
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO, abas=None, processos=None):
+        self.caminho = caminho
+        self.abas = dict(ABAS if abas is None else abas)
+        self.processos = processos
+        self.versao = 0
+        self.dados = {}
+        # Origem ('snapshot' ou 'excel') e segundos gastos na última leitura de cada aba
+        self.tempos_leitura = {}
+        self._assinatura = None
+        self._digitais = {}
+        self._lock = threading.Lock()
+
+    def _ler_abas(self, nomes, digitais):
+        # Primeiro tenta o snapshot colunar de cada aba; só abre o Excel para as que faltarem
+        lidas = {}
+        for aba in nomes:
+            inicio = time.perf_counter()
+            df = snapshot.ler_snapshot(self.caminho, aba, (VERSAO_TRATAMENTO, digitais[aba]))
+            if df is not None:
+                lidas[aba] = df
+                self.tempos_leitura[aba] = ('snapshot', time.perf_counter() - inicio)
+                LEITURA_ABA.observar(self.tempos_leitura[aba][1], aba=aba, origem='snapshot')
+
+        faltantes = {aba: self.abas[aba] for aba in nomes if aba not in lidas}
+        if faltantes:
+            dados, tempos = ler_abas_excel(self.caminho, faltantes, self.processos)
+            for aba, df in dados.items():
+                snapshot.gravar_snapshot(self.caminho, aba, (VERSAO_TRATAMENTO, digitais[aba]), df)
+                lidas[aba] = df
+                self.tempos_leitura[aba] = ('excel', sum(tempos[aba].values()))
+                LEITURA_ABA.observar(tempos[aba]['leitura'], aba=aba, origem='excel')
+                TRATAMENTO_ABA.observar(tempos[aba]['tratamento'], aba=aba)
+        return lidas
+
+    def carregar(self):
+        """Atualiza os dados se o arquivo mudou. Retorna True se alguma aba foi relida."""
+        with self._lock:
+            stat = os.stat(self.caminho)
+            assinatura = (stat.st_mtime_ns, stat.st_size)
+            if assinatura == self._assinatura:
+                return False
+
+            try:
+                digitais = impressoes_digitais(self.caminho, self.abas)
+            except zipfile.BadZipFile:
+                # Arquivo ainda sendo gravado: mantém os dados atuais e tenta no próximo ciclo
+                if self.dados:
+                    return False
+                raise
+
+            alteradas = [aba for aba in self.abas if digitais[aba] != self._digitais.get(aba)]
+            if alteradas:
+                self.dados.update(self._ler_abas(alteradas, digitais))
+                self.versao += 1
+                RECARGAS.incrementar(unidade=self.unidade)
+                for aba in alteradas:
+                    LINHAS_ABA.definir(len(self.dados[aba]), unidade=self.unidade, aba=aba)
+
+            self._digitais = digitais
+            self._assinatura = assinatura
+            return bool(alteradas)
+
+    @property
+    def unidade(self):
+        """Nome da planilha sem a extensão (o mesmo de unidades.nome_unidade), rótulo das métricas."""
+        return os.path.splitext(os.path.basename(self.caminho))[0]
+
+    def digital(self):
+        """Impressão digital do conteúdo carregado: muda sempre que alguma aba muda."""
+        return resumo_digitais(self._digitais)
+
+    def frames(self):
+        """Retorna (analise_df, contratos_df, demanda_spt_df), carregando na primeira vez."""
+        if not self.dados:
+            self.carregar()
+        return self.dados['ANÁLISE'], self.dados['Contratos'], self.dados['Demanda SPT']
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from metricas import (DIAS_PROX_VENCIMENTO, DOCS_EXCLUIDOS_MINIMO, LIMITE_CONSUMO_ALTO, LIMITE_CONSUMO_MEDIO,
+                      LIMITES_CONSUMO, como_float, e_sim)
+from regras_dax import CONSUMO_MINIMO_ATINGIDO, classificar_consumo_minimo
+
+# Dimensões dos filtros do dashboard e de onde vem cada uma (ANÁLISE, depois Contratos)
+DIMENSOES = {
+    'Fornecedor': ('Fornecedor', 'Fornecedor/centro fornecedor'),
+    'Família': ('Família', 'Família'),
+    'Grupo de mercadorias': (None, 'Grupo de mercadorias'),
+    'Gestor': (None, 'GESTOR'),
+}
+
+# Valor usado quando o contrato não tem a dimensão preenchida
+NAO_INFORMADO = '(não informado)'
+
+# Chave dos contratos sem Doc.compra na aba ANÁLISE (contam uma vez no total, como no unique())
+SEM_DOC = '(sem Doc.compra)'
+
+MEDIDAS = ['contratos', 'valor_fixado', 'valor_pendente', 'faixa_abaixo_60', 'faixa_60_80', 'faixa_acima_80',
+           'com_minimo', 'minimo_atingido']
+
+
+def _texto(serie):
+    return serie.astype(object).where(serie.notna(), None)
+
+
+def _primeiro_por_doc(docs, valores):
+    # Primeiro valor preenchido de cada contrato
+    return pd.Series(_texto(valores).to_numpy(), index=docs).dropna().groupby(level=0).first()
+
+
+class CuboContratos:
+    """
+    Indicadores pré-agregados por (Fornecedor, Família, Grupo de mercadorias, Gestor),
+    montados uma vez por carga.
+
+    Cada contrato (Doc.compra) recebe um único valor de cada dimensão, então as contagens
+    de contratos distintos somam entre as células. Filtrar o dashboard vira uma máscara
+    sobre as células do cubo, sem percorrer as abas originais. O vencimento fica num
+    segundo cubo com a data de FimValid/, para continuar sendo contado na hora da consulta.
+    """
+
+    def __init__(self, analise_df, contratos_df, demanda_spt_df, docs_excluidos=DOCS_EXCLUIDOS_MINIMO,
+                 limites=LIMITES_CONSUMO):
+        docs_analise = _texto(analise_df['Doc.compra']).fillna(SEM_DOC)
+        docs_contratos = _texto(contratos_df['Doc.compra'])
+        validos = docs_contratos.notna().to_numpy()
+
+        # Dimensões de cada contrato: primeiro valor na ANÁLISE, senão na aba Contratos
+        dimensoes = {}
+        for dimensao, (coluna_analise, coluna_contratos) in DIMENSOES.items():
+            valores = _primeiro_por_doc(docs_contratos[validos], contratos_df[coluna_contratos][validos])
+            if coluna_analise is not None:
+                valores = _primeiro_por_doc(docs_analise, analise_df[coluna_analise]).combine_first(valores)
+            dimensoes[dimensao] = valores
+
+        # Medidas por contrato vindas da ANÁLISE
+        farol = como_float(analise_df['Farol SALDO'])
+        faixa = np.where(np.isnan(farol), -1, np.digitize(farol, [LIMITE_CONSUMO_MEDIO, LIMITE_CONSUMO_ALTO]))
+        faixa[(docs_analise == SEM_DOC).to_numpy()] = -1
+        # Faixas do gráfico de consumo (limites configurados), também por contrato
+        self.faixas_grafico = [f'faixa_grafico_{i}' for i in range(len(limites) + 1)]
+        faixa_grafico = np.where(np.isnan(farol), -1, np.digitize(farol, limites))
+        faixa_grafico[(docs_analise == SEM_DOC).to_numpy()] = -1
+        por_analise = pd.DataFrame({
+            'contratos': 1,
+            'valor_fixado': np.nan_to_num(como_float(analise_df['Val.fixado'])),
+            'valor_pendente': np.nan_to_num(como_float(analise_df['ValGlPend.'])),
+            'faixa_abaixo_60': faixa == 0,
+            'faixa_60_80': faixa == 1,
+            'faixa_acima_80': faixa == 2,
+            **{medida: faixa_grafico == i for i, medida in enumerate(self.faixas_grafico)},
+        }, index=docs_analise.to_numpy())
+        por_analise = por_analise.groupby(level=0).agg({
+            'contratos': 'max', 'valor_fixado': 'sum', 'valor_pendente': 'sum',
+            'faixa_abaixo_60': 'max', 'faixa_60_80': 'max', 'faixa_acima_80': 'max',
+            **{medida: 'max' for medida in self.faixas_grafico},
+        })
+
+        # Medidas por contrato vindas da aba Contratos
+        status_minimo = classificar_consumo_minimo(contratos_df)
+        atingido = (status_minimo == CONSUMO_MINIMO_ATINGIDO).to_numpy() & ~docs_contratos.isin(docs_excluidos).to_numpy()
+        por_contratos = pd.DataFrame({
+            'com_minimo': e_sim(contratos_df['Consumo Mínimo']),
+            'minimo_atingido': atingido,
+        }, index=docs_contratos.to_numpy())[validos].groupby(level=0).max()
+
+        por_doc = por_analise.join(por_contratos, how='outer').fillna(0)
+        self.medidas = MEDIDAS + self.faixas_grafico
+        por_doc = por_doc.astype({medida: 'int64' for medida in self.medidas if not medida.startswith('valor')})
+        for dimensao, valores in dimensoes.items():
+            por_doc[dimensao] = valores.reindex(por_doc.index).fillna(NAO_INFORMADO)
+
+        # Dimensões de cada contrato, para aplicar os mesmos filtros à tabela de detalhe
+        self.dimensoes_por_doc = por_doc[list(DIMENSOES)].astype('category')
+
+        # Células do cubo: soma das medidas por combinação de dimensões
+        self.celulas = (
+            por_doc.groupby(list(DIMENSOES), observed=True)[self.medidas].sum().reset_index()
+        )
+        self.celulas[list(DIMENSOES)] = self.celulas[list(DIMENSOES)].astype('category')
+
+        # Cubo de vencimentos: linhas da ANÁLISE por dimensões e data de FimValid/
+        vencimentos = pd.DataFrame({
+            dimensao: por_doc[dimensao].reindex(docs_analise.to_numpy()).to_numpy() for dimensao in DIMENSOES
+        })
+        vencimentos['FimValid/'] = pd.to_datetime(analise_df['FimValid/']).to_numpy()
+        self.vencimentos = (
+            vencimentos.dropna(subset=['FimValid/'])
+            .groupby([*DIMENSOES, 'FimValid/'], observed=True).size()
+            .rename('linhas').reset_index()
+        )
+        self.vencimentos[list(DIMENSOES)] = self.vencimentos[list(DIMENSOES)].astype('category')
+
+        # Demanda SPT só tem Família (em outra caixa): materiais sem contrato por família
+        sem_contrato = demanda_spt_df[(demanda_spt_df['Contrato Vigente'] == "Não").to_numpy()]
+        self.sem_contrato_total = len(sem_contrato)
+        self.sem_contrato_por_familia = _texto(sem_contrato['Família']).dropna().str.casefold().value_counts()
+
+    def opcoes(self, dimensao):
+        """Valores disponíveis de uma dimensão, para os filtros."""
+        return sorted(self.celulas[dimensao].cat.categories, key=str.casefold)
+
+    @staticmethod
+    def _mascara(tabela, filtros):
+        mascara = np.ones(len(tabela), dtype=bool)
+        for dimensao, valores in filtros.items():
+            if valores:
+                mascara &= tabela[dimensao].isin(valores).to_numpy()
+        return mascara
+
+    def faixas(self, filtros=None):
+        """Contratos por faixa do gráfico de consumo (limites do cubo) que atendem ``filtros``."""
+        soma = self.celulas.loc[self._mascara(self.celulas, filtros or {}), self.faixas_grafico].sum()
+        return tuple(int(quantidade) for quantidade in soma)
+
+    def consultar(self, filtros=None, agora=None):
+        """
+        Indicadores (mesmas chaves de calcular_analise_descritiva) para os contratos que
+        atendem ``filtros`` ({dimensão: [valores]}; lista vazia ou None = sem filtro).
+        "Materiais Sem Contrato" só responde ao filtro de Família.
+        """
+        filtros = filtros or {}
+        if agora is None:
+            agora = datetime.now()
+
+        soma = self.celulas.loc[self._mascara(self.celulas, filtros), MEDIDAS].sum()
+
+        vencimentos = self.vencimentos[self._mascara(self.vencimentos, filtros)]
+        data_limite = agora + timedelta(days=DIAS_PROX_VENCIMENTO)
+        prox_venc = int(vencimentos.loc[vencimentos['FimValid/'] <= data_limite, 'linhas'].sum())
+
+        familias = filtros.get('Família')
+        if familias:
+            sem_contrato = int(self.sem_contrato_por_familia.reindex(
+                [familia.casefold() for familia in familias]).fillna(0).sum())
+        else:
+            sem_contrato = self.sem_contrato_total
+
+        return {
+            "Contratos Prox. Vencimento": prox_venc,
+            "Consumo Abaixo de 60%": int(soma['faixa_abaixo_60']),
+            "Consumo Acima de 60%": int(soma['faixa_60_80']),
+            "Consumo Acima de 80%": int(soma['faixa_acima_80']),
+            "Total de Contratos": int(soma['contratos']),
+            "Valor Total dos Contratos (Bi)": float(soma['valor_fixado']) / 1e9,
+            "Valor Global Pendente (Bi)": float(soma['valor_pendente']) / 1e9,
+            "Contratos com Consumo Mínimo": int(soma['com_minimo']),
+            "Consumo Mínimo Atingido": int(soma['minimo_atingido']),
+            "Materiais Sem Contrato": sem_contrato,
+        }
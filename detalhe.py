@@ -0,0 +1,193 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cubo import SEM_DOC
+from metricas import LIMITES_CONSUMO, ROTULOS_FAIXAS, como_float
+
+# Faixas do gráfico de consumo, na ordem das barras (índice = faixa do Farol SALDO)
+FAIXAS = ROTULOS_FAIXAS
+
+# Colunas da tabela de detalhe: coluna -> tipo da DataTable. Fornecedor, Família e Gestor
+# vêm das dimensões do cubo (os mesmos valores dos filtros do dashboard)
+COLUNAS = {
+    'Doc.compra': 'text',
+    'Fornecedor': 'text',
+    'Família': 'text',
+    'Gestor': 'text',
+    'FimValid/': 'datetime',
+    'Farol SALDO': 'numeric',
+    'Val.fixado': 'numeric',
+    'ValGlPend.': 'numeric',
+    'Ação Contrato': 'text',
+}
+
+# Linhas por página da tabela
+LINHAS_POR_PAGINA = 50
+
+# Uma condição do filter_query da DataTable: {coluna} operador valor
+_CONDICAO = re.compile(
+    r'\{(?P<coluna>[^}]+)\}\s+(?P<operador>[<>!]=?|=|eq|ne|lt|le|gt|ge|i?contains|datestartswith)\s+'
+    r'(?P<valor>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|\S+)'
+)
+_OPERADORES = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=', 'icontains': 'contains'}
+_COMPARAR = {'=': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}
+
+
+def condicoes_filtro(consulta):
+    """[(coluna, operador, valor)] do filter_query da DataTable (condições ligadas por &&)."""
+    condicoes = []
+    for condicao in _CONDICAO.finditer(consulta or ''):
+        valor = condicao['valor']
+        if valor[:1] in '"\'':
+            valor = re.sub(r'\\(.)', r'\1', valor[1:-1])
+        condicoes.append((condicao['coluna'], _OPERADORES.get(condicao['operador'], condicao['operador']), valor))
+    return condicoes
+
+
+class TabelaDetalhe:
+    """
+    Contratos da aba ANÁLISE por faixa do Farol SALDO, para o detalhe do gráfico de consumo.
+
+    A cópia é ordenada uma vez por carga (faixa, depois Farol SALDO decrescente), então
+    cada faixa é um trecho contínuo e a página sem filtro nem ordenação é só um fatiamento.
+    Cada coluna ganha uma chave numérica de ordenação, e as posições de cada combinação de
+    faixa, filtros e ordenação ficam guardadas: uma página nova só serializa as suas linhas.
+    """
+
+    def __init__(self, analise_df, dimensoes_por_doc=None, limites=LIMITES_CONSUMO):
+        docs = analise_df['Doc.compra']
+        farol = como_float(analise_df['Farol SALDO'])
+        faixa = np.where(np.isnan(farol), -1, np.digitize(farol, limites))
+        faixa[docs.isna().to_numpy()] = -1
+
+        dados = pd.DataFrame({'faixa': faixa.astype(np.int8)}, index=analise_df.index)
+        for coluna in COLUNAS:
+            if coluna in analise_df.columns:
+                dados[coluna] = analise_df[coluna]
+        if dimensoes_por_doc is not None:
+            # Dimensões do cubo por contrato (no lugar das colunas da ANÁLISE)
+            chaves = docs.astype(object).where(docs.notna(), SEM_DOC).to_numpy()
+            for dimensao, valores in dimensoes_por_doc.items():
+                dados[dimensao] = pd.Categorical(valores.reindex(chaves))
+        self.colunas = [coluna for coluna in COLUNAS if coluna in dados.columns]
+
+        # Um contrato por faixa, como na contagem das barras
+        dados = dados[dados['faixa'] >= 0].drop_duplicates(['Doc.compra', 'faixa'])
+        dados = dados.sort_values(['faixa', 'Farol SALDO', 'Doc.compra'], ascending=[True, False, True],
+                                  kind='stable', na_position='last')
+        self.dados = dados.reset_index(drop=True)
+        self.inicios = np.searchsorted(self.dados['faixa'].to_numpy(), np.arange(len(limites) + 2))
+
+        # Chaves de ordenação (float, NaN = vazio): texto pela posição em ordem alfabética.
+        # Os valores exibidos ficam em arrays do numpy (categorias como objetos Python), para
+        # uma página custar o número de linhas dela, e não o de contratos da faixa
+        self.chaves, self.valores, self.categorias = {}, {}, {}
+        for coluna in self.colunas:
+            serie = self.dados[coluna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                # Código -1 (vazio) cai no None do fim das categorias
+                self.categorias[coluna] = np.append(np.asarray(serie.cat.categories, dtype=object), None)
+                self.valores[coluna] = serie.cat.codes.to_numpy()
+                ordem = np.argsort(np.argsort([str(valor).casefold() for valor in serie.cat.categories], kind='stable'))
+                codigos = serie.cat.codes.to_numpy()
+                self.chaves[coluna] = np.where(codigos >= 0, np.append(ordem, -1)[codigos], np.nan)
+            elif pd.api.types.is_datetime64_any_dtype(serie):
+                self.valores[coluna] = serie.to_numpy(dtype='datetime64[us]')
+                self.chaves[coluna] = np.where(serie.isna(), np.nan, self.valores[coluna].astype(np.int64))
+            elif pd.api.types.is_numeric_dtype(serie):
+                self.valores[coluna] = self.chaves[coluna] = serie.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                self.valores[coluna] = serie.astype(object).where(serie.notna(), None).to_numpy()
+                codigos, _ = pd.factorize(serie.astype(str).str.casefold().where(serie.notna()), sort=True)
+                self.chaves[coluna] = np.where(codigos >= 0, codigos, np.nan)
+
+        self._posicoes = lru_cache(maxsize=128)(self._calcular_posicoes)
+
+    def contratos(self, faixa):
+        """Contratos da faixa (índice em FAIXAS), sem filtros."""
+        return int(self.inicios[faixa + 1] - self.inicios[faixa])
+
+    def _mascara_condicao(self, trecho, coluna, operador, valor):
+        serie = self.dados[coluna].iloc[trecho]
+        if operador == 'contains':
+            return serie.astype(str).str.contains(valor, case=False, regex=False).to_numpy() & serie.notna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            if operador == 'datestartswith':
+                periodo = pd.Period(valor)
+                return ((serie >= periodo.start_time) & (serie <= periodo.end_time)).to_numpy()
+            return _COMPARAR.get(operador, np.equal)(serie.to_numpy(), np.datetime64(pd.Timestamp(valor)))
+        if pd.api.types.is_numeric_dtype(serie):
+            return _COMPARAR.get(operador, np.equal)(serie.to_numpy(dtype=float, na_value=np.nan), float(valor))
+        # Texto: comparação sem diferenciar maiúsculas
+        texto = serie.astype(str).str.casefold().to_numpy()
+        mascara = _COMPARAR.get(operador, np.equal)(texto.astype(object), valor.casefold())
+        return np.asarray(mascara, dtype=bool) & serie.notna().to_numpy()
+
+    def _calcular_posicoes(self, faixa, filtros, consulta, ordenacao):
+        # Posições (em self.dados) das linhas da faixa que passam nos filtros, na ordem pedida
+        trecho = range(int(self.inicios[faixa]), int(self.inicios[faixa + 1]))
+        mascara = None
+        for dimensao, valores in filtros:
+            if dimensao in self.dados.columns:
+                mascara_dimensao = self.dados[dimensao].iloc[trecho].isin(valores).to_numpy()
+                mascara = mascara_dimensao if mascara is None else mascara & mascara_dimensao
+        for coluna, operador, valor in condicoes_filtro(consulta):
+            if coluna not in self.colunas:
+                continue
+            try:
+                mascara_condicao = self._mascara_condicao(trecho, coluna, operador, valor)
+            except (ValueError, TypeError):
+                # Valor que não combina com o tipo da coluna (ex.: texto num campo numérico)
+                mascara_condicao = np.zeros(len(trecho), dtype=bool)
+            mascara = mascara_condicao if mascara is None else mascara & mascara_condicao
+
+        if mascara is None and not ordenacao:
+            return trecho
+        posicoes = np.arange(trecho.start, trecho.stop)
+        if mascara is not None:
+            posicoes = posicoes[mascara]
+        if ordenacao:
+            # lexsort: a última chave é a principal; vazios sempre no fim
+            chaves = []
+            for coluna, direcao in reversed(ordenacao):
+                chave = self.chaves[coluna][posicoes]
+                chaves.append(-chave if direcao == 'desc' else chave)
+                chaves.append(np.isnan(chave))
+            posicoes = posicoes[np.lexsort(chaves)]
+        return posicoes
+
+    def pagina(self, faixa, pagina=0, linhas_por_pagina=LINHAS_POR_PAGINA, filtros=None, consulta='', ordenacao=()):
+        """
+        Uma página da faixa: (registros, página, total de páginas, total de contratos).
+
+        ``filtros`` são os do dashboard ({dimensão: [valores]}), ``consulta`` é o
+        filter_query e ``ordenacao`` o sort_by da DataTable. A página pedida é limitada
+        às que existem (um filtro pode ter encolhido a faixa).
+        """
+        filtros = tuple(sorted((dimensao, tuple(valores)) for dimensao, valores in (filtros or {}).items() if valores))
+        ordenacao = tuple((item['column_id'], item['direction']) for item in ordenacao or ()
+                          if item['column_id'] in self.chaves)
+        posicoes = self._posicoes(faixa, filtros, consulta or '', ordenacao)
+        total = len(posicoes)
+        paginas = max(-(-total // linhas_por_pagina), 1)
+        pagina = min(max(pagina, 0), paginas - 1)
+        linhas = posicoes[pagina * linhas_por_pagina:(pagina + 1) * linhas_por_pagina]
+        return self.registros(linhas), pagina, paginas, total
+
+    def registros(self, posicoes):
+        """Linhas em dicts prontos para a DataTable (datas em ISO, vazios como None)."""
+        posicoes = np.asarray(posicoes, dtype=np.intp)
+        colunas = {}
+        for coluna in self.colunas:
+            valores = self.valores[coluna][posicoes]
+            if coluna in self.categorias:
+                valores = self.categorias[coluna][valores]
+            elif valores.dtype.kind == 'M':
+                valores = np.where(np.isnat(valores), None, np.datetime_as_string(valores, unit='D'))
+            elif valores.dtype.kind == 'f':
+                valores = np.where(np.isnan(valores), None, valores.astype(object))
+            colunas[coluna] = valores.tolist()
+        return [dict(zip(colunas, linha)) for linha in zip(*colunas.values())]
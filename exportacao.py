@@ -0,0 +1,336 @@
+"""
+Exportação estática: o dashboard pré-renderizado num pacote HTML + JSON, servido por
+qualquer servidor de arquivos estáticos (ou pelo components.html do Streamlit), sem
+processo do Dash.
+
+O HTML sai do mesmo layout do app.py (layout_dashboard): cartões, títulos e links viram
+HTML com as classes do Bootstrap, e os gráficos são desenhados no navegador pelo
+plotly.js a partir das figuras do snapshot. Filtros e tabela de detalhe precisam do
+servidor e ficam de fora. Cada arquivo é gravado também comprimido (.gz e .br), para o
+servidor mandar direto (gzip_static/brotli_static do nginx, por exemplo).
+
+Uma exportação só é refeita quando a planilha muda ou o dia vira ("Contratos Prox.
+Vencimento" é contado na data da exportação).
+
+Uso:
+    python exportacao.py --saida estatico/
+    python exportacao.py --saida estatico/ --observar          # exporta de novo a cada mudança
+    python exportacao.py --planilha 'Outra.xlsx' --saida estatico/ --autocontido
+Com DASH_PLANILHAS (ou --planilhas), cada unidade vai para uma subpasta da saída.
+"""
+import argparse
+import gzip
+import html as html_texto
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime
+from urllib.parse import quote
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PASTA_ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# Arquivos do pacote: página, dados e os recursos compartilhados pelas unidades
+ARQUIVO_PAGINA = 'index.html'
+ARQUIVO_DADOS = 'dados.json'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+ARQUIVO_CSS = 'bootstrap.min.css'
+ARQUIVO_PLOTLY = 'plotly.min.js'
+
+# Tempo máximo (segundos) de espera pela carga de uma planilha
+ESPERA_CARGA = 600
+
+# Propriedades de estilo sem unidade (as demais, quando numéricas, vão em px, como no React)
+_SEM_UNIDADE = {'opacity', 'zIndex', 'fontWeight', 'lineHeight', 'flex', 'flexGrow', 'flexShrink', 'order'}
+_ALINHAMENTOS = {'start', 'center', 'end', 'between', 'around', 'evenly'}
+_MAIUSCULA = re.compile(r'([A-Z])')
+
+
+def estilo_css(estilo):
+    # {'textAlign': 'center', 'marginTop': 10} -> 'text-align:center;margin-top:10px'
+    declaracoes = []
+    for propriedade, valor in (estilo or {}).items():
+        if isinstance(valor, (int, float)) and propriedade not in _SEM_UNIDADE:
+            valor = f'{valor}px'
+        declaracoes.append(_MAIUSCULA.sub(r'-\1', propriedade).lower() + f':{valor}')
+    return ';'.join(declaracoes)
+
+
+def _classes_bootstrap(tipo, props):
+    # Classes que os componentes do dash-bootstrap-components põem no elemento
+    classes = []
+    if tipo == 'Container':
+        classes.append('container-fluid' if props.get('fluid') else 'container')
+    elif tipo == 'Row':
+        classes.append('row')
+        if props.get('justify') in _ALINHAMENTOS:
+            classes.append(f"justify-content-{props['justify']}")
+    elif tipo == 'Col':
+        largura = props.get('width')
+        if isinstance(largura, dict):
+            classes.append(f"col-{largura['size']}" if largura.get('size') else 'col')
+            if largura.get('offset'):
+                classes.append(f"offset-{largura['offset']}")
+        else:
+            classes.append(f'col-{largura}' if largura else 'col')
+    elif tipo == 'Card':
+        classes.append('card')
+        if props.get('color'):
+            classes.append(f"bg-{props['color']}")
+        if props.get('inverse'):
+            classes.append('text-white')
+    elif tipo == 'CardBody':
+        classes.append('card-body')
+    elif tipo == 'Button':
+        classes += ['btn', f"btn-{props.get('color') or 'primary'}"]
+    return classes
+
+
+def _href(href, raiz):
+    # Links entre unidades (/unidade/Sul) apontam para a subpasta da unidade no pacote
+    from unidades import PREFIXO_UNIDADE
+
+    if href.startswith(PREFIXO_UNIDADE):
+        return f'{raiz}{href[len(PREFIXO_UNIDADE):]}/'
+    return href
+
+
+def html_estatico(componente, figuras, raiz=''):
+    """
+    HTML de um componente do Dash (e dos filhos). As figuras dos dcc.Graph vão para
+    ``figuras`` ({id: figura}); componentes que dependem do servidor não são renderizados.
+    """
+    if componente is None:
+        return ''
+    if isinstance(componente, (list, tuple)):
+        return ''.join(html_estatico(filho, figuras, raiz) for filho in componente)
+    if isinstance(componente, (str, int, float)):
+        return html_texto.escape(str(componente))
+
+    tipo, namespace = componente._type, componente._namespace
+    props = componente.to_plotly_json()['props']
+    if namespace == 'dash_core_components':
+        if tipo == 'Graph' and props.get('figure'):
+            figuras[props['id']] = props['figure']
+            return f'<div id="{html_texto.escape(props["id"])}" class="grafico"></div>'
+        # Store, Interval, Dropdown: sem servidor não há o que atualizar nem filtrar
+        return ''
+    if namespace == 'dash_html_components':
+        tag = tipo.lower()
+        classes = [props['className']] if props.get('className') else []
+    elif namespace == 'dash_bootstrap_components':
+        tag = 'a' if tipo == 'Button' and props.get('href') else 'button' if tipo == 'Button' else 'div'
+        classes = _classes_bootstrap(tipo, props) + [props.get('className') or props.get('class_name') or '']
+    else:
+        # Tabela de detalhe e outros componentes interativos
+        return ''
+
+    atributos = {
+        'id': props.get('id'),
+        'class': ' '.join(classe for classe in classes if classe) or None,
+        'style': estilo_css(props.get('style')) or None,
+        'href': _href(props['href'], raiz) if props.get('href') else None,
+        'target': props.get('target'),
+    }
+    texto_atributos = ''.join(f' {nome}="{html_texto.escape(str(valor))}"'
+                              for nome, valor in atributos.items() if valor is not None)
+    return f'<{tag}{texto_atributos}>{html_estatico(props.get("children"), figuras, raiz)}</{tag}>'
+
+
+def _json_script(dados):
+    # JSON dentro de <script>: '</' não pode aparecer no texto
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':'), default=str).replace('</', '<\\/')
+
+
+def renderizar_pagina(corpo, titulo, dados, css, plotly_js):
+    """
+    Página completa. ``css`` e ``plotly_js`` são ('arquivo', caminho) para referenciar
+    os recursos ou ('inline', conteúdo) para uma página autocontida.
+    """
+    estilo = (f'<link rel="stylesheet" href="{css[1]}">' if css[0] == 'arquivo'
+              else f'<style>{css[1]}</style>')
+    script = (f'<script src="{plotly_js[1]}" charset="utf-8"></script>' if plotly_js[0] == 'arquivo'
+              else f'<script>{plotly_js[1]}</script>')
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html_texto.escape(titulo)}</title>
+{estilo}
+{script}
+</head>
+<body>
+{corpo}
+<script type="application/json" id="dados_dashboard">{_json_script(dados)}</script>
+<script>
+var dados = JSON.parse(document.getElementById('dados_dashboard').textContent);
+Object.keys(dados.figuras).forEach(function(id) {{
+    var figura = dados.figuras[id];
+    Plotly.newPlot(id, figura.data, figura.layout, {{responsive: true}});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def gravar(caminho, conteudo):
+    """
+    Grava o arquivo e as versões .gz e .br; um arquivo igual ao gravado não é reescrito
+    (a data de modificação não muda, e os caches HTTP continuam válidos). Retorna os bytes.
+    """
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+    destinos = [caminho + '.gz'] + ([caminho + '.br'] if brotli is not None else [])
+    if os.path.exists(caminho) and all(os.path.exists(destino) for destino in destinos):
+        with open(caminho, 'rb') as arquivo:
+            if arquivo.read() == conteudo:
+                return {os.path.basename(destino): os.path.getsize(destino) for destino in [caminho, *destinos]}
+    versoes = {caminho: conteudo, caminho + '.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versoes[caminho + '.br'] = brotli.compress(conteudo)
+    # Versões comprimidas antes da original, cada uma trocada de uma vez (os.replace)
+    # (nome temporário único: duas exportações na mesma pasta não escrevem no mesmo arquivo)
+    for destino in sorted(versoes, key=lambda destino: destino == caminho):
+        descritor, temporario = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(destino) or '.')
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(versoes[destino])
+        # mkstemp cria o arquivo só para o dono; o servidor estático precisa ler
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, destino)
+    return {os.path.basename(destino): len(dados) for destino, dados in versoes.items()}
+
+
+def _recursos():
+    # CSS do Bootstrap (o mesmo da pasta assets/ do app) e o plotly.js do pacote plotly
+    from plotly.offline import get_plotlyjs
+
+    with open(os.path.join(PASTA_ASSETS, ARQUIVO_CSS), encoding='utf-8') as arquivo:
+        return {ARQUIVO_CSS: arquivo.read(), ARQUIVO_PLOTLY: get_plotlyjs()}
+
+
+def ler_manifesto(pasta):
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        try:
+            return json.load(arquivo)
+        except json.JSONDecodeError:
+            return None
+
+
+def exportar_snapshot(snapshot, pasta, unidade=None, digital=None, raiz='', autocontido=False, recursos=None):
+    """
+    Grava o pacote de um snapshot na pasta: index.html, dados.json (indicadores, payload
+    do dashboard e figuras) e manifesto.json. Retorna {arquivo: bytes}.
+
+    Sem ``autocontido``, a página referencia o CSS e o plotly.js em ``raiz`` (gravados
+    por ``exportar``); com, eles vão dentro do HTML (para o components.html do Streamlit).
+    """
+    from app import layout_dashboard, payload_dashboard
+    from atualizacao import analise_no_momento
+
+    os.makedirs(pasta, exist_ok=True)
+    figuras = {}
+    corpo = html_estatico(layout_dashboard(snapshot, unidade), figuras, raiz='../' if raiz else '')
+    titulo = f"Análise Descritiva Contratos de Materiais - {f'{unidade} - ' if unidade else ''}{snapshot.periodo}"
+    dados = {
+        'unidade': unidade,
+        'periodo': snapshot.periodo,
+        'dia': date.today().isoformat(),
+        'exportado_em': datetime.now().isoformat(timespec='seconds'),
+        'indicadores': analise_no_momento(snapshot),
+        'payload': payload_dashboard(snapshot, {}, unidade),
+        'figuras': figuras,
+    }
+
+    if autocontido:
+        recursos = recursos or _recursos()
+        css, plotly_js = ('inline', recursos[ARQUIVO_CSS]), ('inline', recursos[ARQUIVO_PLOTLY])
+    else:
+        css, plotly_js = ('arquivo', raiz + ARQUIVO_CSS), ('arquivo', raiz + ARQUIVO_PLOTLY)
+    tamanhos = gravar(os.path.join(pasta, ARQUIVO_DADOS), json.dumps(dados, ensure_ascii=False, default=str))
+    tamanhos.update(gravar(os.path.join(pasta, ARQUIVO_PAGINA), renderizar_pagina(corpo, titulo, dados, css, plotly_js)))
+    # O manifesto vai por último: só diz que a exportação está completa depois dos arquivos
+    manifesto = {'digital': digital, 'dia': dados['dia'], 'autocontido': autocontido,
+                 'exportado_em': dados['exportado_em']}
+    # (trocado de uma vez, como os outros: uma exportação interrompida não deixa um manifesto pela metade)
+    tamanhos.update(gravar(os.path.join(pasta, ARQUIVO_MANIFESTO), json.dumps(manifesto, ensure_ascii=False)))
+    return tamanhos
+
+
+def exportar(pasta, autocontido=False, forcar=False, saida=print):
+    """
+    Exporta as unidades do app.py (uma, ou uma por subpasta com DASH_PLANILHAS) que
+    mudaram desde a última exportação. Retorna as unidades exportadas.
+    """
+    from app import pasta_planilhas, unidades
+
+    os.makedirs(pasta, exist_ok=True)
+    varias = bool(pasta_planilhas)
+    recursos = _recursos()
+    if not autocontido:
+        for nome, conteudo in recursos.items():
+            gravar(os.path.join(pasta, nome), conteudo)
+    if varias:
+        # Raiz do pacote: redireciona para a unidade padrão
+        gravar(os.path.join(pasta, ARQUIVO_PAGINA),
+               f'<!DOCTYPE html><meta charset="utf-8"><meta http-equiv="refresh" '
+               f'content="0; url={quote(unidades.padrao)}/">')
+
+    exportadas = []
+    for unidade in unidades.unidades() if varias else [unidades.padrao]:
+        destino = os.path.join(pasta, unidade) if varias else pasta
+        inicio = time.perf_counter()
+        atualizador = unidades.obter(unidade)
+        snapshot = atualizador.esperar(ESPERA_CARGA)
+        if snapshot is None:
+            saida(f"{unidade}: dados não carregados em {ESPERA_CARGA} s, exportação adiada")
+            continue
+        digital = atualizador.carregador.digital()
+        anterior = ler_manifesto(destino) or {}
+        if not forcar and (anterior.get('digital'), anterior.get('dia'), anterior.get('autocontido')) == (
+                digital, date.today().isoformat(), autocontido):
+            continue
+        tamanhos = exportar_snapshot(snapshot, destino, unidade if varias else None, digital,
+                                     raiz='../' if varias else '', autocontido=autocontido, recursos=recursos)
+        exportadas.append(unidade)
+        saida(f"{unidade}: {destino} em {time.perf_counter() - inicio:.1f} s ("
+              + ', '.join(f'{nome} {tamanho / 1024:.0f} KB' for nome, tamanho in tamanhos.items()) + ')')
+    return exportadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--saida', required=True, help='pasta do pacote estático')
+    parser.add_argument('--planilha', help='planilha exportada (padrão: DASH_PLANILHA ou a do app.py)')
+    parser.add_argument('--planilhas', help='pasta com uma planilha por unidade (como DASH_PLANILHAS)')
+    parser.add_argument('--autocontido', action='store_true', help='CSS e plotly.js dentro de cada index.html')
+    parser.add_argument('--forcar', action='store_true', help='exporta mesmo sem mudança na planilha')
+    parser.add_argument('--observar', action='store_true', help='continua rodando e exporta a cada mudança')
+    parser.add_argument('--intervalo', type=float, default=60, help='segundos entre as verificações (--observar)')
+    args = parser.parse_args()
+
+    # O app.py lê as variáveis ao ser importado (pelas funções de exportação)
+    if args.planilha:
+        os.environ['DASH_PLANILHA'] = args.planilha
+    if args.planilhas:
+        os.environ['DASH_PLANILHAS'] = args.planilhas
+
+    exportar(args.saida, args.autocontido, args.forcar)
+    while args.observar:
+        # A thread do atualizador de cada unidade relê a planilha quando ela muda
+        time.sleep(args.intervalo)
+        exportar(args.saida, args.autocontido)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import json
+from functools import lru_cache
+
+import pandas as pd
+import plotly.express as px
+from plotly.colors import sample_colorscale
+
+from metricas import ROTULOS_FAIXAS
+
+# Faixas do gráfico de consumo e a cor de cada barra
+CORES_CONSUMO = {
+    "Abaixo de 60%": "green",
+    "Entre 60% e 80%": "orange",
+    "Acima de 80%": "red"
+}
+
+
+def cores_faixas(rotulos):
+    # As três faixas de sempre mantêm as cores; outros limites vão do verde ao vermelho
+    if list(rotulos) == list(CORES_CONSUMO):
+        return dict(CORES_CONSUMO)
+    escala = [[0, 'rgb(0,128,0)'], [0.5, 'rgb(255,165,0)'], [1, 'rgb(255,0,0)']]
+    posicoes = [i / max(len(rotulos) - 1, 1) for i in range(len(rotulos))]
+    return dict(zip(rotulos, sample_colorscale(escala, posicoes)))
+
+
+def criar_figura_consumo(*contagens, rotulos=None):
+    """Barras de contratos por faixa do Farol SALDO (uma contagem por rótulo; padrão: 60% e 80%)."""
+    if rotulos is None:
+        rotulos = list(CORES_CONSUMO)
+    # Criar DataFrame para o gráfico
+    data_consumo = pd.DataFrame({
+        'Consumo': list(rotulos),
+        'Quantidade': list(contagens)
+    })
+
+    # Gráfico de barras para mostrar os consumos
+    fig_consumo = px.bar(
+        data_consumo,
+        x='Consumo',
+        y='Quantidade',
+        title='Consumo',
+        color='Consumo',
+        color_discrete_map=cores_faixas(rotulos)
+    )
+
+    fig_consumo.update_traces(
+        texttemplate='%{y}',
+        textposition='inside',
+        insidetextanchor='middle',
+        textfont=dict(color='white', size=15, family='Arial', weight='bold'),
+        hovertemplate='<b>Consumo</b>: %{x}<br><b>Quantidade</b>: %{y}<extra></extra>'
+    )
+
+    fig_consumo.update_layout(
+        showlegend=False,
+        xaxis_title=None,
+        yaxis_title=None,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        title_font=dict(size=30, family='Arial', color='#005a8d', weight='bold'),
+        title_x=0.5,
+        xaxis=dict(tickfont=dict(size=15, family='Arial', color='black', weight='bold'))
+    )
+
+    fig_consumo.update_xaxes(
+        tickfont=dict(size=13, family='Arial', color='black', weight='bold')
+    )
+    return fig_consumo
+
+
+def contagens_consumo(analise_descritiva):
+    # As três contagens dos indicadores "Consumo ..." (faixas de 60% e 80%)
+    return (
+        int(analise_descritiva["Consumo Abaixo de 60%"]),
+        int(analise_descritiva["Consumo Acima de 60%"]),
+        int(analise_descritiva["Consumo Acima de 80%"]),
+    )
+
+
+@lru_cache(maxsize=64)
+def figura_consumo_json(*contagens, rotulos=None):
+    """
+    Gráfico de consumo já serializado em JSON, guardado por contagens (e rótulos, uma tupla).
+
+    Montar a figura com o Plotly Express (validação de cada propriedade) custa bem mais
+    que o próprio gráfico de três barras; com as mesmas contagens a figura é reaproveitada.
+    """
+    return criar_figura_consumo(*contagens, rotulos=rotulos).to_json()
+
+
+@lru_cache(maxsize=64)
+def figura_consumo_dados(*contagens, rotulos=None):
+    # Mesma figura em dicts e listas, pronta para um Output do Dash (não alterar o objeto devolvido)
+    return json.loads(figura_consumo_json(*contagens, rotulos=rotulos))
+
+
+def figura_consumo_faixas(contagens):
+    # Gráfico de consumo (em JSON) com as faixas configuradas (LIMITES_CONSUMO)
+    return figura_consumo_dados(*contagens, rotulos=tuple(ROTULOS_FAIXAS))
+
+
+# Indicadores de contagem mostrados no gráfico de tendência, com a cor de cada linha
+CORES_TENDENCIA = {
+    "Total de Contratos": "#005a8d",
+    "Contratos Prox. Vencimento": "purple",
+    "Consumo Abaixo de 60%": "green",
+    "Consumo Acima de 60%": "orange",
+    "Consumo Acima de 80%": "red",
+}
+
+
+def criar_figura_tendencia(serie):
+    """Gráfico de linhas mês a mês a partir da série do histórico (períodos x indicadores)."""
+    indicadores = [indicador for indicador in CORES_TENDENCIA if indicador in serie.columns]
+    dados = serie[indicadores].rename_axis('Período').reset_index().melt(
+        id_vars='Período', var_name='Indicador', value_name='Quantidade'
+    )
+    fig_tendencia = px.line(
+        dados,
+        x='Período',
+        y='Quantidade',
+        color='Indicador',
+        markers=True,
+        title='Tendência Mensal',
+        color_discrete_map=CORES_TENDENCIA
+    )
+    fig_tendencia.update_layout(
+        xaxis_title=None,
+        yaxis_title=None,
+        xaxis_type='category',
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        legend_title_text=None,
+        title_font=dict(size=30, family='Arial', color='#005a8d', weight='bold'),
+        title_x=0.5
+    )
+    return fig_tendencia
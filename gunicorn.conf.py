@@ -0,0 +1,27 @@
+# Configuração do gunicorn para o dashboard (gunicorn -c gunicorn.conf.py wsgi:server)
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('DASH_BIND', '0.0.0.0:8055')
+workers = int(os.environ.get('DASH_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('DASH_THREADS', 4))
+timeout = 120
+
+# Carrega o app (planilha, indicadores, gráfico) no mestre antes de criar os workers
+preload_app = True
+
+
+def when_ready(server):
+    # Congela os objetos já carregados para o coletor de lixo não tocar nessas páginas
+    # nos workers (o que desfaria o compartilhamento por copy-on-write)
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Threads não sobrevivem ao fork: cada worker reinicia as threads dos atualizadores
+    # das unidades carregadas no mestre, partindo dos snapshots herdados. A primeira
+    # conferência da planilha é imediata: ela pode ter mudado desde o preload
+    from wsgi import unidades
+    for atualizador in unidades.atualizadores():
+        atualizador.iniciar(esperar=False, imediato=True)
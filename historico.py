@@ -0,0 +1,177 @@
+"""
+Histórico mensal dos indicadores, para as tendências mês a mês.
+
+Cada mês a planilha é sobrescrita; a cada carga nova o histórico (SQLite ao lado do
+xlsx) guarda os indicadores de ``calcular_analise_descritiva`` e o Farol SALDO e o
+ValGlPend. de cada contrato, com o período (mês) da planilha. Os indicadores já ficam
+numa linha por (período, indicador), então a série das tendências é uma consulta
+pequena, sem reabrir planilhas antigas. Gravar um mês custa só as linhas desse mês.
+"""
+import logging
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+import zipfile
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from metricas import como_float
+
+logger = logging.getLogger(__name__)
+
+MESES = ('Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cargas (
+    periodo TEXT PRIMARY KEY,
+    digital TEXT NOT NULL,
+    registrado_em TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS indicadores (
+    periodo TEXT NOT NULL,
+    indicador TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (periodo, indicador)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contratos (
+    periodo TEXT NOT NULL,
+    doc_compra TEXT NOT NULL,
+    farol_saldo REAL,
+    valor_pendente REAL,
+    PRIMARY KEY (periodo, doc_compra)
+) WITHOUT ROWID;
+"""
+
+
+def caminho_historico(caminho_xlsx):
+    # "BASE BI CONTRATOS.xlsx" -> "BASE BI CONTRATOS.historico.sqlite"
+    base, _ = os.path.splitext(caminho_xlsx)
+    return base + '.historico.sqlite'
+
+
+def data_referencia(analise_df):
+    """
+    Data em que a planilha foi extraída, tirada do conteúdo: na ANÁLISE, 'Prazo para
+    encerrar (D)' é contado a partir dela até 'FimValid/'. None se não der para calcular.
+    """
+    if not {'FimValid/', 'Prazo para encerrar (D)'} <= set(analise_df.columns):
+        return None
+    prazo = pd.to_numeric(analise_df['Prazo para encerrar (D)'], errors='coerce')
+    referencia = (pd.to_datetime(analise_df['FimValid/'], errors='coerce')
+                  - pd.to_timedelta(prazo, unit='D')).dropna()
+    # A mais frequente: linhas com prazo digitado à mão não mudam o resultado
+    return referencia.mode().iloc[0] if len(referencia) else None
+
+
+def data_propriedades(caminho_xlsx):
+    """Data da última gravação pelo Excel (docProps/core.xml, dcterms:modified); None se não houver."""
+    try:
+        with zipfile.ZipFile(caminho_xlsx) as arquivo:
+            raiz = ET.fromstring(arquivo.read('docProps/core.xml'))
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        return None
+    modificado = raiz.find('{http://purl.org/dc/terms/}modified')
+    if modificado is None or not modificado.text:
+        return None
+    try:
+        return datetime.fromisoformat(modificado.text.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def periodo_arquivo(caminho_xlsx, analise_df=None):
+    """
+    Período ('AAAA-MM') da planilha, nesta ordem: a data de referência do conteúdo da
+    ANÁLISE, a data de gravação nas propriedades do xlsx e, em último caso, a data de
+    modificação do arquivo (que muda com uma simples cópia).
+    """
+    data = data_referencia(analise_df) if analise_df is not None else None
+    if data is None:
+        data = data_propriedades(caminho_xlsx)
+    if data is None:
+        logger.warning("Período de %s tirado da data de modificação do arquivo", caminho_xlsx)
+        data = datetime.fromtimestamp(os.stat(caminho_xlsx).st_mtime)
+    return data.strftime('%Y-%m')
+
+
+def nome_periodo(periodo):
+    # '2024-06' -> 'Junho 2024'
+    ano, mes = periodo.split('-')
+    return f"{MESES[int(mes) - 1]} {ano}"
+
+
+def valores_por_contrato(analise_df):
+    """Farol SALDO e ValGlPend. de cada contrato (Doc.compra) da aba ANÁLISE."""
+    contratos = pd.DataFrame({
+        'doc_compra': analise_df['Doc.compra'].astype(object).to_numpy(),
+        'farol_saldo': como_float(analise_df['Farol SALDO']),
+        'valor_pendente': como_float(analise_df['ValGlPend.']),
+    }).dropna(subset=['doc_compra'])
+    contratos['doc_compra'] = contratos['doc_compra'].astype(str)
+    return contratos.groupby('doc_compra', sort=False).agg({'farol_saldo': 'max', 'valor_pendente': 'sum'})
+
+
+class HistoricoMensal:
+    """
+    Histórico em SQLite, um período por mês.
+
+    Os meses anteriores nunca são alterados. Se a planilha do mesmo mês for gravada de
+    novo, as linhas daquele mês são substituídas; a mesma carga repetida (mesma
+    impressão digital, como em vários workers) não grava nada.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with closing(self._conectar()) as conexao:
+            conexao.executescript(ESQUEMA)
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def registrar(self, periodo, digital, analise_descritiva, analise_df):
+        """Grava os indicadores e os contratos do período. Retorna False se já estavam gravados."""
+        contratos = valores_por_contrato(analise_df)
+        linhas_contratos = [
+            (periodo, doc, None if np.isnan(farol) else float(farol), None if np.isnan(pendente) else float(pendente))
+            for doc, farol, pendente in zip(contratos.index, contratos['farol_saldo'], contratos['valor_pendente'])
+        ]
+        conexao = self._conectar()
+        try:
+            # BEGIN IMMEDIATE: só um processo por vez confere e grava o período
+            conexao.execute('BEGIN IMMEDIATE')
+            gravado = conexao.execute('SELECT digital FROM cargas WHERE periodo = ?', (periodo,)).fetchone()
+            if gravado is not None and gravado[0] == digital:
+                conexao.rollback()
+                return False
+            for tabela in ('indicadores', 'contratos'):
+                conexao.execute(f'DELETE FROM {tabela} WHERE periodo = ?', (periodo,))
+            conexao.execute('INSERT OR REPLACE INTO cargas VALUES (?, ?, ?)',
+                            (periodo, digital, datetime.now().isoformat(timespec='seconds')))
+            conexao.executemany('INSERT INTO indicadores VALUES (?, ?, ?)',
+                                [(periodo, indicador, float(valor)) for indicador, valor in analise_descritiva.items()])
+            conexao.executemany('INSERT INTO contratos VALUES (?, ?, ?, ?)', linhas_contratos)
+            conexao.commit()
+            return True
+        except BaseException:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+
+    def serie_indicadores(self):
+        """Indicadores por período: uma linha por mês ('AAAA-MM'), uma coluna por indicador."""
+        with closing(self._conectar()) as conexao:
+            serie = pd.read_sql_query('SELECT periodo, indicador, valor FROM indicadores ORDER BY periodo', conexao)
+        return serie.pivot(index='periodo', columns='indicador', values='valor')
+
+    def contratos(self, periodo):
+        """Farol SALDO e ValGlPend. gravados para cada contrato no período."""
+        with closing(self._conectar()) as conexao:
+            return pd.read_sql_query(
+                'SELECT doc_compra, farol_saldo, valor_pendente FROM contratos WHERE periodo = ?',
+                conexao, params=(periodo,), index_col='doc_compra',
+            )
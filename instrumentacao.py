@@ -0,0 +1,175 @@
+"""
+Instrumentação do pipeline carga → cálculo → exibição, exposta no formato de texto do
+Prometheus (rota /metrics do app.py).
+
+Métricas simples em memória, sem dependências: contadores, medidores e histogramas com
+rótulos. Os valores são por processo; com o gunicorn, cada worker expõe os seus.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Content-Type do formato de texto do Prometheus
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites dos histogramas de tempo, em segundos (de callbacks de milissegundos a leituras de minutos)
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+METRICAS = []
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos_texto(nomes, valores, extra=()):
+    pares = [*zip(nomes, valores), *extra]
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+        METRICAS.append(self)
+
+    def _chave(self, rotulos):
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}, recebeu {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def _amostras(self):
+        raise NotImplementedError
+
+    def formatar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} {self.tipo}']
+        with self._lock:
+            linhas.extend(self._amostras())
+        return '\n'.join(linhas)
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (ex.: número de recargas)."""
+    tipo = 'counter'
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def _amostras(self):
+        if not self.rotulos and not self._valores:
+            return [f'{self.nome} 0']
+        return [f'{self.nome}{_rotulos_texto(self.rotulos, chave)} {_numero(valor)}'
+                for chave, valor in self._valores.items()]
+
+
+class Medidor(_Metrica):
+    """Valor que sobe e desce (ex.: linhas de cada aba)."""
+    tipo = 'gauge'
+
+    def definir(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = valor
+
+    def _amostras(self):
+        return [f'{self.nome}{_rotulos_texto(self.rotulos, chave)} {_numero(valor)}'
+                for chave, valor in self._valores.items()]
+
+
+class Histograma(_Metrica):
+    """Distribuição de durações em buckets cumulativos, com soma e contagem."""
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            contagens, soma = self._valores.get(chave, ([0] * len(self.buckets), 0.0))
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+            self._valores[chave] = (contagens, soma + valor)
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        """Mede o bloco (ou a função decorada) e registra a duração, mesmo se der erro."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def _amostras(self):
+        linhas = []
+        for chave, (contagens, soma) in self._valores.items():
+            for limite, contagem in zip(self.buckets, contagens):
+                rotulos = _rotulos_texto(self.rotulos, chave, [('le', _numero(limite))])
+                linhas.append(f'{self.nome}_bucket{rotulos} {contagem}')
+            rotulos = _rotulos_texto(self.rotulos, chave)
+            linhas.append(f'{self.nome}_sum{rotulos} {_numero(soma)}')
+            linhas.append(f'{self.nome}_count{rotulos} {contagens[-1]}')
+        return linhas
+
+
+def formatar_metricas():
+    """Todas as métricas no formato de texto do Prometheus."""
+    return '\n'.join(metrica.formatar() for metrica in METRICAS) + '\n'
+
+
+# Carga da planilha
+RECARGAS = Contador(
+    'dashboard_recargas_total', 'Cargas da planilha de cada unidade em que alguma aba foi relida.', ('unidade',)
+)
+LEITURA_ABA = Histograma(
+    'dashboard_leitura_aba_segundos',
+    'Tempo de leitura de cada aba, do Excel (só o parse) ou do snapshot colunar.',
+    ('aba', 'origem'),
+)
+TRATAMENTO_ABA = Histograma(
+    'dashboard_tratamento_aba_segundos',
+    'Tempo do tratamento de cada aba lida do Excel (nomes de colunas e esquema de tipos).',
+    ('aba',),
+)
+LINHAS_ABA = Medidor('dashboard_linhas_aba', 'Linhas de cada aba na última carga.', ('unidade', 'aba'))
+
+# Cálculo e publicação do snapshot
+ETAPA = Histograma(
+    'dashboard_etapa_segundos',
+    'Tempo de cada etapa da atualização (indicadores inclui consumo_minimo e faixas_consumo).',
+    ('etapa',),
+)
+VERSAO_DADOS = Medidor('dashboard_versao_dados', 'Versão dos dados do snapshot publicado.', ('unidade',))
+ULTIMA_ATUALIZACAO = Medidor(
+    'dashboard_ultima_atualizacao_timestamp_segundos', 'Momento (epoch) da publicação do último snapshot.',
+    ('unidade',),
+)
+
+# Exibição
+CALLBACK = Histograma('dashboard_callback_segundos', 'Tempo de resposta do layout e dos callbacks.', ('callback',))
+
+# Cache das unidades (várias planilhas num só servidor)
+ACESSOS_UNIDADE = Contador(
+    'dashboard_cache_unidades_acessos_total', 'Acessos ao cache de unidades: acerto (já carregada) ou falta.',
+    ('resultado',),
+)
+REMOCOES_UNIDADE = Contador('dashboard_cache_unidades_remocoes_total', 'Unidades descarregadas por falta de memória.')
+UNIDADES_CARREGADAS = Medidor('dashboard_cache_unidades_carregadas', 'Unidades com os dados em memória.')
+BYTES_UNIDADES = Medidor('dashboard_cache_unidades_bytes', 'Memória estimada dos dados das unidades carregadas.')
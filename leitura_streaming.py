@@ -0,0 +1,185 @@
+"""
+Leitura em streaming da planilha: calcula os indicadores linha a linha, sem montar DataFrames.
+
+O openpyxl em modo read-only lê o XML de cada aba aos poucos; de cada linha só ficam
+as colunas usadas nos indicadores, que alimentam somas, contagens e conjuntos de
+contratos distintos. A memória cresce com o número de contratos distintos (e com a
+tabela de textos compartilhados do xlsx), não com o número de linhas.
+
+É a leitura da análise em lote com --streaming (lote.py), onde só os indicadores de
+cada planilha interessam; o dashboard precisa dos DataFrames (cubo, detalhe) e usa o
+CarregadorPlanilha.
+
+Uso:
+    python leitura_streaming.py "BASE BI CONTRATOS.xlsx"
+    python lote.py exportacoes/ --streaming
+"""
+import bisect
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from carregamento import ABAS, ARQUIVO_PADRAO
+from metricas import DIAS_PROX_VENCIMENTO, DOCS_EXCLUIDOS_MINIMO, LIMITE_CONSUMO_ALTO, LIMITE_CONSUMO_MEDIO
+
+# Colunas de cada aba usadas nos indicadores
+COLUNAS_STREAMING = {
+    'ANÁLISE': ('Doc.compra', 'Val.fixado', 'ValGlPend.', 'FimValid/', 'Farol SALDO'),
+    'Contratos': ('Doc.compra', 'Val.fixado', 'ValGlPend.', 'Consumo Mínimo', 'Valor Consumo Mínimo'),
+    'Demanda SPT': ('Contrato Vigente',),
+}
+
+# Colunas da ANÁLISE com a data de referência do conteúdo (historico.data_referencia)
+COLUNAS_PERIODO = ('FimValid/', 'Prazo para encerrar (D)')
+
+# Textos que o pandas lê como vazio (na_values padrão do read_excel)
+TEXTOS_VAZIOS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+def _valor(celula):
+    if isinstance(celula, str) and celula in TEXTOS_VAZIOS:
+        return None
+    return celula
+
+
+def _numero(celula):
+    return None if celula is None else float(celula)
+
+
+def _data(celula):
+    if isinstance(celula, str):
+        return datetime.strptime(celula, '%d/%m/%Y')
+    return celula
+
+
+def iterar_linhas(wb, aba, cabecalho, colunas):
+    """
+    Gera tuplas só com ``colunas`` de cada linha da aba, depois da linha de cabeçalho.
+
+    Linhas totalmente vazias no meio da aba são mantidas (como no pandas) e as do
+    final são descartadas.
+    """
+    linhas = wb[aba].iter_rows(values_only=True)
+    for _ in range(cabecalho):
+        next(linhas, None)
+    nomes = [str(nome).strip() for nome in next(linhas, ())]
+    faltando = [coluna for coluna in colunas if coluna not in nomes]
+    if faltando:
+        raise KeyError(f"Colunas {faltando} não encontradas na aba '{aba}'")
+    indices = [nomes.index(coluna) for coluna in colunas]
+
+    vazias = 0
+    for linha in linhas:
+        if all(celula is None for celula in linha):
+            vazias += 1
+            continue
+        for _ in range(vazias):
+            yield (None,) * len(indices)
+        vazias = 0
+        yield tuple(_valor(linha[i]) if i < len(linha) else None for i in indices)
+
+
+def colunas_periodo_streaming(caminho=ARQUIVO_PADRAO):
+    """
+    Só as colunas da ANÁLISE usadas por historico.periodo_arquivo, lidas em streaming
+    (None se a aba não tiver essas colunas: o período vem então das propriedades do xlsx).
+    """
+    wb = load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+    try:
+        linhas = []
+        for fim_valid, prazo in iterar_linhas(wb, 'ANÁLISE', ABAS['ANÁLISE'], COLUNAS_PERIODO):
+            try:
+                fim_valid = _data(fim_valid)
+            except ValueError:
+                # Data digitada fora do formato: a linha só não conta para a referência
+                fim_valid = None
+            linhas.append((fim_valid, prazo))
+    except KeyError:
+        return None
+    finally:
+        wb.close()
+    return pd.DataFrame(linhas, columns=list(COLUNAS_PERIODO))
+
+
+def calcular_analise_descritiva_streaming(caminho=ARQUIVO_PADRAO, agora=None,
+                                          docs_excluidos=DOCS_EXCLUIDOS_MINIMO):
+    """Mesmo resultado de metricas.calcular_analise_descritiva, lendo a planilha em streaming."""
+    if agora is None:
+        agora = datetime.now()
+    data_limite = agora + timedelta(days=DIAS_PROX_VENCIMENTO)
+    limites = [LIMITE_CONSUMO_MEDIO, LIMITE_CONSUMO_ALTO]
+
+    wb = load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+    try:
+        # ANÁLISE: contratos distintos, valores, vencimento e faixas do Farol SALDO
+        docs = set()
+        faixas = (set(), set(), set())
+        valor_total = valor_pendente = 0.0
+        prox_venc = 0
+        for doc, fixado, pendente, fim_valid, farol in iterar_linhas(
+                wb, 'ANÁLISE', ABAS['ANÁLISE'], COLUNAS_STREAMING['ANÁLISE']):
+            docs.add(doc)
+            valor_total += _numero(fixado) or 0.0
+            valor_pendente += _numero(pendente) or 0.0
+            fim_valid = _data(fim_valid)
+            if fim_valid is not None and fim_valid <= data_limite:
+                prox_venc += 1
+            farol = _numero(farol)
+            if farol is not None and doc is not None:
+                faixas[bisect.bisect_right(limites, farol)].add(doc)
+
+        # Contratos: consumo mínimo definido e regra DAX de consumo mínimo atingido
+        com_minimo = set()
+        minimo_atingido = set()
+        for doc, fixado, pendente, consumo_minimo, valor_minimo in iterar_linhas(
+                wb, 'Contratos', ABAS['Contratos'], COLUNAS_STREAMING['Contratos']):
+            if doc is None:
+                continue
+            if (isinstance(consumo_minimo, str) and consumo_minimo.lower() == 'sim') or consumo_minimo == 1:
+                com_minimo.add(doc)
+            valor_minimo = _numero(valor_minimo)
+            if valor_minimo is None or doc in docs_excluidos:
+                continue
+            fixado, pendente = _numero(fixado), _numero(pendente)
+            if fixado is not None and pendente is not None and fixado - pendente >= valor_minimo:
+                minimo_atingido.add(doc)
+
+        # Demanda SPT: materiais sem contrato vigente
+        sem_contrato = sum(
+            1 for (vigente,) in iterar_linhas(wb, 'Demanda SPT', ABAS['Demanda SPT'], COLUNAS_STREAMING['Demanda SPT'])
+            if vigente == "Não"
+        )
+    finally:
+        wb.close()
+
+    return {
+        "Contratos Prox. Vencimento": prox_venc,
+        "Consumo Abaixo de 60%": len(faixas[0]),
+        "Consumo Acima de 60%": len(faixas[1]),
+        "Consumo Acima de 80%": len(faixas[2]),
+        "Total de Contratos": len(docs),
+        "Valor Total dos Contratos (Bi)": valor_total / 1e9,
+        "Valor Global Pendente (Bi)": valor_pendente / 1e9,
+        "Contratos com Consumo Mínimo": len(com_minimo),
+        "Consumo Mínimo Atingido": len(minimo_atingido),
+        "Materiais Sem Contrato": sem_contrato,
+    }
+
+
+if __name__ == '__main__':
+    caminho = sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_PADRAO
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = calcular_analise_descritiva_streaming(caminho)
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    for chave, valor in resultado.items():
+        print(f"{chave}: {valor}")
+    print(f"\nTempo: {duracao:.2f} s | Pico de memória (Python): {pico / 2**20:.1f} MB")
@@ -0,0 +1,213 @@
+"""
+Análise descritiva em lote: os indicadores do dashboard para cada planilha de uma pasta
+(exportações mensais ou regionais no formato da 'BASE BI CONTRATOS.xlsx'), lado a lado
+numa tabela comparativa.
+
+As planilhas são distribuídas num pool de processos. Cada resultado é gravado no
+arquivo de estado assim que fica pronto, então uma execução interrompida continua de
+onde parou: planilhas com o mesmo conteúdo (mesma impressão digital) não são relidas.
+"Contratos Prox. Vencimento" fica com a data da execução em que a planilha foi calculada.
+
+Uso:
+    python lote.py                      # DASH_PLANILHAS ou a pasta atual
+    python lote.py exportacoes/
+    python lote.py exportacoes/ --saida comparativo.xlsx --processos 4
+    python lote.py exportacoes/ --streaming   # sem DataFrames: menos memória por processo
+ou no notebook:
+    from lote import analisar_pasta
+    tabela = analisar_pasta('exportacoes')
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from carregamento import ABAS, CarregadorPlanilha, impressoes_digitais, resumo_digitais
+from historico import periodo_arquivo
+from motores import calcular_indicadores
+
+# Pasta analisada por padrão: a das planilhas das unidades do dashboard (DASH_PLANILHAS)
+# ou a pasta atual, onde fica a 'BASE BI CONTRATOS.xlsx'
+PASTA_PADRAO = os.environ.get('DASH_PLANILHAS', '.')
+
+# Estado da análise em lote, dentro da própria pasta (uma linha JSON por planilha analisada)
+ARQUIVO_ESTADO = '.analise_lote.jsonl'
+
+# Muda quando o conteúdo de um resultado muda (ex.: como o período é obtido): resultados
+# gravados com outra versão são calculados de novo
+VERSAO_RESULTADO = 2
+
+
+def listar_planilhas(pasta):
+    # Ignora os arquivos temporários que o Excel cria ao abrir uma planilha (~$...)
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.lower().endswith('.xlsx') and not nome.startswith('~$')
+    )
+
+
+def digital_planilha(caminho):
+    """Impressão digital do conteúdo das abas usadas (só lê o diretório do zip)."""
+    return resumo_digitais(impressoes_digitais(caminho, ABAS))
+
+
+def analisar_planilha(caminho, agora=None, streaming=False):
+    """
+    Indicadores de uma planilha. É a função executada nos processos do pool.
+
+    Com ``streaming``, os indicadores são calculados linha a linha (leitura_streaming),
+    sem montar os DataFrames nem gravar o snapshot colunar ao lado da planilha.
+    """
+    inicio = time.perf_counter()
+    if streaming:
+        from leitura_streaming import calcular_analise_descritiva_streaming, colunas_periodo_streaming
+
+        analise_descritiva = calcular_analise_descritiva_streaming(caminho, agora)
+        digital, analise_df = digital_planilha(caminho), colunas_periodo_streaming(caminho)
+    else:
+        # Uma planilha por processo: as abas de cada uma são lidas em série
+        carregador = CarregadorPlanilha(caminho, processos=1)
+        analise_df, contratos_df, demanda_spt_df = carregador.frames()
+        analise_descritiva = calcular_indicadores(analise_df, contratos_df, demanda_spt_df, agora=agora)
+        digital = carregador.digital()
+    return {
+        'arquivo': os.path.basename(caminho),
+        'versao': VERSAO_RESULTADO,
+        'digital': digital,
+        # Do conteúdo da ANÁLISE: uma pasta copiada de uma vez tem a mesma data em todos os arquivos
+        'periodo': periodo_arquivo(caminho, analise_df),
+        'indicadores': analise_descritiva,
+        'segundos': time.perf_counter() - inicio,
+        'analisado_em': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def ler_estado(caminho_estado):
+    """Resultados já gravados: {arquivo: resultado} (a última linha de cada arquivo vale)."""
+    resultados = {}
+    if not os.path.exists(caminho_estado):
+        return resultados
+    with open(caminho_estado, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            try:
+                resultado = json.loads(linha)
+            except json.JSONDecodeError:
+                # Linha cortada por uma execução interrompida no meio da escrita
+                continue
+            resultados[resultado['arquivo']] = resultado
+    return resultados
+
+
+def _executar(caminhos, processos, agora, streaming):
+    # Gera (caminho, resultado, erro) conforme cada planilha termina
+    if processos == 1 or len(caminhos) == 1:
+        for caminho in caminhos:
+            try:
+                yield caminho, analisar_planilha(caminho, agora, streaming), None
+            except Exception as erro:
+                yield caminho, None, erro
+        return
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        futuros = {pool.submit(analisar_planilha, caminho, agora, streaming): caminho for caminho in caminhos}
+        for futuro in as_completed(futuros):
+            try:
+                yield futuros[futuro], futuro.result(), None
+            except Exception as erro:
+                yield futuros[futuro], None, erro
+
+
+def tabela_comparativa(resultados):
+    """Uma linha por planilha (ordenadas por período), uma coluna por indicador."""
+    linhas = [{'arquivo': resultado['arquivo'], 'periodo': resultado['periodo'], **resultado['indicadores']}
+              for resultado in resultados]
+    if not linhas:
+        return pd.DataFrame()
+    return pd.DataFrame(linhas).sort_values(['periodo', 'arquivo']).set_index('arquivo')
+
+
+def analisar_pasta(pasta, processos=None, caminho_estado=None, retomar=True, saida=print, streaming=False):
+    """
+    Analisa todas as planilhas da pasta e devolve a tabela comparativa.
+
+    Com ``retomar``, as planilhas já analisadas (mesmo nome e mesma impressão digital
+    no arquivo de estado) não são processadas de novo. Planilhas com erro não entram
+    no estado, então são tentadas de novo na próxima execução. ``streaming`` vai para
+    ``analisar_planilha``.
+    """
+    if processos is None:
+        processos = os.cpu_count() or 1
+    if caminho_estado is None:
+        caminho_estado = os.path.join(pasta, ARQUIVO_ESTADO)
+    if not retomar and os.path.exists(caminho_estado):
+        os.remove(caminho_estado)
+
+    estado = ler_estado(caminho_estado)
+    resultados, pendentes = {}, []
+    for caminho in listar_planilhas(pasta):
+        nome = os.path.basename(caminho)
+        anterior = estado.get(nome)
+        try:
+            if (anterior is not None and anterior.get('versao') == VERSAO_RESULTADO
+                    and anterior['digital'] == digital_planilha(caminho)):
+                resultados[nome] = anterior
+                continue
+        except (OSError, ValueError, KeyError):
+            # Arquivo que não é um xlsx válido: o erro aparece na análise
+            pass
+        pendentes.append(caminho)
+    saida(f"{len(resultados) + len(pendentes)} planilhas: {len(resultados)} já analisadas, "
+          f"{len(pendentes)} a analisar com {min(processos, max(len(pendentes), 1))} processos")
+
+    agora = datetime.now()
+    inicio = time.perf_counter()
+    erros = {}
+    with open(caminho_estado, 'a', encoding='utf-8') as arquivo_estado:
+        for posicao, (caminho, resultado, erro) in enumerate(_executar(pendentes, processos, agora, streaming), start=1):
+            nome = os.path.basename(caminho)
+            if erro is not None:
+                erros[nome] = erro
+                saida(f"[{posicao}/{len(pendentes)}] {nome}: ERRO {type(erro).__name__}: {erro}")
+                continue
+            resultados[nome] = resultado
+            # Grava já, para uma interrupção não perder o que ficou pronto
+            arquivo_estado.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+            arquivo_estado.flush()
+            saida(f"[{posicao}/{len(pendentes)}] {nome}: {resultado['segundos']:.1f} s")
+    decorrido = time.perf_counter() - inicio
+
+    analisadas = len(pendentes) - len(erros)
+    if pendentes:
+        saida(f"{analisadas} planilhas em {decorrido:.1f} s ({analisadas / decorrido:.2f} arquivos/s)"
+              + (f", {len(erros)} com erro" if erros else ''))
+    return tabela_comparativa(resultados.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta', nargs='?', default=PASTA_PADRAO,
+                        help='pasta com as planilhas (padrão: DASH_PLANILHAS ou a pasta atual)')
+    parser.add_argument('--processos', type=int)
+    parser.add_argument('--estado', help=f'arquivo de estado (padrão: <pasta>/{ARQUIVO_ESTADO})')
+    parser.add_argument('--do-zero', action='store_true', help='ignora o estado e analisa todas as planilhas')
+    parser.add_argument('--saida', help='grava a tabela comparativa (.csv ou .xlsx)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='calcula os indicadores lendo as planilhas linha a linha, sem DataFrames')
+    args = parser.parse_args()
+
+    tabela = analisar_pasta(args.pasta, args.processos, args.estado, retomar=not args.do_zero,
+                            streaming=args.streaming)
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(tabela.T)
+    if args.saida:
+        if args.saida.lower().endswith('.xlsx'):
+            tabela.to_excel(args.saida)
+        else:
+            tabela.to_csv(args.saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import ETAPA
+from regras_dax import CONSUMO_MINIMO_ATINGIDO, classificar_consumo_minimo, mascara_docs
+
+logger = logging.getLogger(__name__)
+
+# Horizonte usado no card "Prox. Vencimento (6 meses)"
+DIAS_PROX_VENCIMENTO = 180
+
+# Horizontes (dias) respondidos pelo índice de vencimentos
+HORIZONTES_VENCIMENTO = (30, 90, 180, 365)
+
+# Limites do Farol SALDO usados nas faixas de consumo
+LIMITE_CONSUMO_MEDIO = 0.6
+LIMITE_CONSUMO_ALTO = 0.8
+
+
+def limites_configurados():
+    """
+    Limites das faixas do gráfico de consumo: DASH_LIMITES_CONSUMO (ex.: "0.4,0.6,0.8,0.95")
+    ou 60% e 80%. Os indicadores "Consumo ..." continuam nos limites de 60% e 80%.
+    """
+    padrao = (LIMITE_CONSUMO_MEDIO, LIMITE_CONSUMO_ALTO)
+    texto = os.environ.get('DASH_LIMITES_CONSUMO', '').strip()
+    if not texto:
+        return padrao
+    try:
+        limites = tuple(sorted({float(limite) for limite in texto.split(',')}))
+    except ValueError:
+        logger.warning("DASH_LIMITES_CONSUMO inválido (%r); usando %s", texto, padrao)
+        return padrao
+    return limites
+
+
+def rotulos_faixas(limites):
+    # (0.6, 0.8) -> ['Abaixo de 60%', 'Entre 60% e 80%', 'Acima de 80%']
+    percentuais = [f"{limite * 100:g}%" for limite in limites]
+    return ([f"Abaixo de {percentuais[0]}"]
+            + [f"Entre {inicio} e {fim}" for inicio, fim in zip(percentuais, percentuais[1:])]
+            + [f"Acima de {percentuais[-1]}"])
+
+
+# Faixas do gráfico de consumo (e da tabela de detalhe), na ordem das barras
+LIMITES_CONSUMO = limites_configurados()
+ROTULOS_FAIXAS = rotulos_faixas(LIMITES_CONSUMO)
+
+# Contratos que não entram na contagem de "Consumo Mínimo Atingido" (padrão de docs_excluidos)
+DOCS_EXCLUIDOS_MINIMO = frozenset({'JA10063222', 'JA10114401'})
+
+
+def como_float(serie):
+    return serie.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _nunique(codigos, mascara):
+    # Quantidade de códigos distintos (>= 0) dentro da máscara
+    codigos = codigos[mascara]
+    codigos = codigos[codigos >= 0]
+    if codigos.size == 0:
+        return 0
+    return int(np.count_nonzero(np.bincount(codigos)))
+
+
+def e_sim(serie):
+    # Regra da planilha: 'Sim' (qualquer caixa) ou o número 1
+    if pd.api.types.is_numeric_dtype(serie):
+        return (serie == 1).to_numpy()
+    return ((serie.astype(str).str.lower() == 'sim') | (serie == 1)).to_numpy()
+
+
+class IndiceVencimento:
+    """
+    Datas de fim de validade (FimValid/) ordenadas uma vez por carga dos dados.
+
+    "Quantos contratos vencem em até N dias a partir de agora" vira uma busca binária,
+    então a contagem pode ser refeita a cada requisição (com a data do momento) e
+    vários horizontes custam o mesmo que um.
+    """
+
+    def __init__(self, datas):
+        datas = pd.to_datetime(pd.Series(datas)).to_numpy(dtype='datetime64[us]')
+        self.datas = np.sort(datas[~np.isnat(datas)])
+
+    def contar_ate(self, limites):
+        """Linhas com FimValid/ <= cada limite (um datetime ou uma lista deles)."""
+        limites = np.asarray(pd.to_datetime(limites).to_numpy(dtype='datetime64[us]'))
+        return np.searchsorted(self.datas, limites, side='right')
+
+    def contar_proximos(self, dias=DIAS_PROX_VENCIMENTO, agora=None):
+        if agora is None:
+            agora = datetime.now()
+        return int(self.contar_ate([agora + timedelta(days=dias)])[0])
+
+    def contar_horizontes(self, horizontes=HORIZONTES_VENCIMENTO, agora=None):
+        """{dias: contratos que vencem em até ``dias``} para vários horizontes numa só busca."""
+        if agora is None:
+            agora = datetime.now()
+        contagens = self.contar_ate([agora + timedelta(days=dias) for dias in horizontes])
+        return {dias: int(contagem) for dias, contagem in zip(horizontes, contagens)}
+
+
+class HistogramaFarol:
+    """
+    Farol SALDO de cada contrato (Doc.compra), ordenado uma vez por carga dos dados.
+
+    "Quantos contratos distintos há em cada faixa" vira uma busca binária por limite nas
+    contagens acumuladas, então qualquer conjunto de limites custa o mesmo que os dois de
+    sempre. Os contratos com mais de um Farol SALDO diferente (várias linhas na ANÁLISE)
+    ficam à parte e contam uma vez em cada faixa em que aparecem, como nas máscaras com
+    ``nunique()`` de 'Doc.compra'.
+    """
+
+    def __init__(self, docs, farol):
+        codigos, _ = pd.factorize(pd.Series(docs))
+        farol = pd.Series(farol).to_numpy(dtype=float, na_value=np.nan)
+        validos = (codigos >= 0) & ~np.isnan(farol)
+        codigos, farol = codigos[validos].astype(np.int64), farol[validos]
+
+        # Contratos com uma só linha (o caso comum) vão direto para as contagens acumuladas
+        linhas_por_contrato = np.bincount(codigos)
+        repetido = linhas_por_contrato[codigos] > 1
+        valores = farol[~repetido]
+
+        # Os repetidos: pares (contrato, Farol SALDO) distintos; os que têm um valor só
+        # também entram nas contagens acumuladas
+        codigos, farol = codigos[repetido], farol[repetido]
+        ordem = np.lexsort((farol, codigos))
+        codigos, farol = codigos[ordem], farol[ordem]
+        novo = np.ones(len(codigos), dtype=bool)
+        novo[1:] = (codigos[1:] != codigos[:-1]) | (farol[1:] != farol[:-1])
+        codigos, farol = codigos[novo], farol[novo]
+        _, pares_por_contrato = np.unique(codigos, return_counts=True)
+        unico = np.repeat(pares_por_contrato == 1, pares_por_contrato)
+
+        self.valores = np.sort(np.concatenate([valores, farol[unico]]))
+        self._codigos_multiplos = codigos[~unico]
+        self._farol_multiplos = farol[~unico]
+
+    def contar(self, limites=(LIMITE_CONSUMO_MEDIO, LIMITE_CONSUMO_ALTO)):
+        """
+        Contratos distintos em cada faixa dos limites (em ordem crescente): abaixo do
+        primeiro, entre cada par de limites e a partir do último (len(limites) + 1 valores).
+        """
+        limites = np.sort(np.asarray(limites, dtype=float))
+        # Valores abaixo de cada limite; a diferença entre limites vizinhos é a faixa
+        abaixo = np.searchsorted(self.valores, limites, side='left')
+        contagem = np.diff(np.concatenate(([0], abaixo, [len(self.valores)])))
+        if self._codigos_multiplos.size:
+            faixas = len(limites) + 1
+            pares = np.unique(self._codigos_multiplos * faixas + np.digitize(self._farol_multiplos, limites))
+            contagem = contagem + np.bincount(pares % faixas, minlength=faixas)
+        return tuple(int(quantidade) for quantidade in contagem)
+
+
+def calcular_analise_descritiva(analise_df, contratos_df, demanda_spt_df, agora=None,
+                                docs_excluidos=DOCS_EXCLUIDOS_MINIMO, indice_vencimento=None, histograma=None):
+    """
+    Calcula todos os indicadores do dashboard a partir das três abas já tratadas.
+
+    Cada coluna é convertida uma única vez e as contagens de contratos distintos
+    usam os códigos de 'Doc.compra' em vez de filtrar cópias dos DataFrames.
+    Os DataFrames recebidos não são alterados. Um ``indice_vencimento`` e um
+    ``histograma`` já montados sobre a aba ANÁLISE podem ser passados para não ordenar
+    as datas e o Farol SALDO de novo.
+    """
+    if agora is None:
+        agora = datetime.now()
+
+    # ANÁLISE: uma linha por contrato
+    codigos_analise, docs_analise = pd.factorize(analise_df['Doc.compra'])
+    # O total conta o contrato vazio como um valor a mais, como o unique() da planilha original
+    total_contratos = len(docs_analise) + int((codigos_analise < 0).any())
+    if histograma is None:
+        with ETAPA.cronometrar(etapa='faixas_consumo'):
+            histograma = HistogramaFarol(analise_df['Doc.compra'], analise_df['Farol SALDO'])
+    abaixo_60, acima_60, acima_80 = histograma.contar((LIMITE_CONSUMO_MEDIO, LIMITE_CONSUMO_ALTO))
+    if indice_vencimento is None:
+        indice_vencimento = IndiceVencimento(analise_df['FimValid/'])
+    prox_venc = indice_vencimento.contar_proximos(DIAS_PROX_VENCIMENTO, agora)
+
+    # Contratos: uma linha por item de contrato
+    codigos_contratos, docs_contratos = pd.factorize(contratos_df['Doc.compra'])
+    com_minimo = e_sim(contratos_df['Consumo Mínimo'])
+
+    # Regra DAX "Consumo Mínimo Atingido", sem os contratos de docs_excluidos
+    with ETAPA.cronometrar(etapa='consumo_minimo'):
+        status_minimo = classificar_consumo_minimo(contratos_df)
+    atingido = (
+        (status_minimo == CONSUMO_MINIMO_ATINGIDO).to_numpy()
+        & ~mascara_docs(codigos_contratos, docs_contratos, docs_excluidos)
+    )
+
+    return {
+        "Contratos Prox. Vencimento": prox_venc,
+        "Consumo Abaixo de 60%": abaixo_60,
+        "Consumo Acima de 60%": acima_60,
+        "Consumo Acima de 80%": acima_80,
+        "Total de Contratos": total_contratos,
+        "Valor Total dos Contratos (Bi)": float(np.nansum(como_float(analise_df['Val.fixado']))) / 1e9,
+        "Valor Global Pendente (Bi)": float(np.nansum(como_float(analise_df['ValGlPend.']))) / 1e9,
+        "Contratos com Consumo Mínimo": _nunique(codigos_contratos, com_minimo),
+        "Consumo Mínimo Atingido": _nunique(codigos_contratos, atingido),
+        "Materiais Sem Contrato": int((demanda_spt_df['Contrato Vigente'] == "Não").sum()),
+    }
@@ -0,0 +1,251 @@
+"""
+Motores de cálculo dos indicadores de ``calcular_analise_descritiva``.
+
+- pandas: metricas.calcular_analise_descritiva, a referência.
+- duckdb: os mesmos indicadores numa única consulta SQL sobre as três abas, em
+  paralelo por todas as CPUs.
+- polars: uma consulta lazy por aba, executadas juntas (collect_all) em paralelo.
+
+Os dois últimos leem só as colunas usadas, com os textos trocados pelos códigos das
+colunas categóricas do carregador (sem cópia): contam e comparam inteiros. As faixas de
+consumo e os vencimentos não entram nas consultas: em todos os motores saem do
+HistogramaFarol e do IndiceVencimento, como no pandas.
+
+O motor é escolhido pela variável de ambiente DASH_MOTOR (padrão: pandas). Se o pacote
+do motor não estiver instalado, o cálculo cai para o pandas. Com DASH_MOTOR_VERIFICAR=1,
+cada cálculo fora do pandas é conferido com a referência e as diferenças vão para o log.
+"""
+import logging
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from metricas import (DIAS_PROX_VENCIMENTO, DOCS_EXCLUIDOS_MINIMO, LIMITE_CONSUMO_ALTO, LIMITE_CONSUMO_MEDIO,
+                      HistogramaFarol, IndiceVencimento, calcular_analise_descritiva, como_float, e_sim)
+
+try:
+    import duckdb
+except ImportError:  # motor opcional
+    duckdb = None
+
+try:
+    import polars as pl
+except ImportError:  # motor opcional
+    pl = None
+
+logger = logging.getLogger(__name__)
+
+MOTOR_REFERENCIA = 'pandas'
+
+# Indicadores em bilhões (somas de floats): comparados com tolerância, pois a ordem da soma muda
+INDICADORES_VALOR = ('Valor Total dos Contratos (Bi)', 'Valor Global Pendente (Bi)')
+TOLERANCIA_VALOR = 1e-9
+
+
+def _codigos(serie):
+    # Códigos inteiros de cada valor (-1 para vazio) e os valores distintos; sem cópia
+    # nas colunas categóricas do carregador
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), pd.Index(serie.cat.categories)
+    codigos, valores = pd.factorize(serie)
+    return codigos, pd.Index(valores)
+
+
+def _codigos_onde(mascara):
+    # Códigos dos valores distintos que satisfazem a regra (a regra roda uma vez por valor)
+    return np.flatnonzero(np.asarray(mascara, dtype=bool)).tolist()
+
+
+def colunas_codificadas(analise_df, contratos_df, demanda_spt_df, docs_excluidos=DOCS_EXCLUIDOS_MINIMO):
+    """
+    Só as colunas usadas pelos indicadores, com os textos trocados pelos códigos do
+    dicionário da coluna: as consultas comparam e contam inteiros, e as regras sobre
+    textos ('sim', 'Não', docs excluídos) viram listas de códigos.
+    """
+    doc_analise, _ = _codigos(analise_df['Doc.compra'])
+    doc_contratos, docs = _codigos(contratos_df['Doc.compra'])
+    consumo_minimo, valores_minimo = _codigos(contratos_df['Consumo Mínimo'])
+    vigente, valores_vigente = _codigos(demanda_spt_df['Contrato Vigente'])
+    tabelas = {
+        'analise': pd.DataFrame({
+            'doc': doc_analise,
+            'valor': como_float(analise_df['Val.fixado']),
+            'pendente': como_float(analise_df['ValGlPend.']),
+        }, copy=False),
+        'contratos': pd.DataFrame({
+            'doc': doc_contratos,
+            'consumo_minimo': consumo_minimo,
+            'minimo': como_float(contratos_df['Valor Consumo Mínimo']),
+            'fixado': como_float(contratos_df['Val.fixado']),
+            'pendente': como_float(contratos_df['ValGlPend.']),
+        }, copy=False),
+        'demanda': pd.DataFrame({'vigente': vigente}, copy=False),
+    }
+    codigos = {
+        'sim': _codigos_onde(e_sim(pd.Series(valores_minimo, dtype=valores_minimo.dtype))),
+        'docs_excluidos': _codigos_onde(docs.isin(list(docs_excluidos))),
+        'nao': _codigos_onde(valores_vigente == "Não"),
+    }
+    return tabelas, codigos
+
+
+# Uma consulta: cada aba é varrida uma vez e os resultados saem numa linha só.
+# NaN conta como vazio (como no np.nansum e nas comparações do NumPy) e o código -1 é o texto vazio
+CONSULTA_DUCKDB = """
+WITH analise AS (
+    SELECT NULLIF(doc, -1) AS doc, nan_nulo(valor) AS valor, nan_nulo(pendente) AS pendente
+    FROM analise_df
+), contratos AS (
+    SELECT NULLIF(doc, -1) AS doc, consumo_minimo, nan_nulo(minimo) AS minimo,
+           nan_nulo(fixado) - nan_nulo(pendente) AS consumido
+    FROM contratos_df
+)
+SELECT a.*, c.*, d.*
+FROM (
+    SELECT COUNT(DISTINCT doc) + COALESCE(MAX(CAST(doc IS NULL AS INTEGER)), 0) AS total_contratos,
+           COALESCE(SUM(valor), 0) AS valor_total,
+           COALESCE(SUM(pendente), 0) AS valor_pendente
+    FROM analise
+) AS a, (
+    SELECT COUNT(DISTINCT doc) FILTER (WHERE list_contains($sim, consumo_minimo)) AS com_minimo,
+           COUNT(DISTINCT doc) FILTER (
+               WHERE minimo IS NOT NULL AND consumido >= minimo AND NOT list_contains($docs_excluidos, doc)
+           ) AS atingido
+    FROM contratos
+) AS c, (
+    SELECT COUNT(*) FILTER (WHERE list_contains($nao, vigente)) AS sem_contrato
+    FROM demanda_df
+) AS d
+"""
+
+
+def calcular_duckdb(analise_df, contratos_df, demanda_spt_df, agora=None,
+                    docs_excluidos=DOCS_EXCLUIDOS_MINIMO, indice_vencimento=None, histograma=None):
+    if agora is None:
+        agora = datetime.now()
+    tabelas, codigos = colunas_codificadas(analise_df, contratos_df, demanda_spt_df, docs_excluidos)
+    with duckdb.connect() as conexao:
+        conexao.execute('CREATE MACRO nan_nulo(x) AS CASE WHEN isnan(x) THEN NULL ELSE x END')
+        for nome, tabela in tabelas.items():
+            conexao.register(f'{nome}_df', tabela)
+        linha = conexao.execute(CONSULTA_DUCKDB, codigos).fetchone()
+        nomes = [coluna[0] for coluna in conexao.description]
+    return _indicadores(dict(zip(nomes, linha)), analise_df, agora, indice_vencimento, histograma)
+
+
+def calcular_polars(analise_df, contratos_df, demanda_spt_df, agora=None,
+                    docs_excluidos=DOCS_EXCLUIDOS_MINIMO, indice_vencimento=None, histograma=None):
+    if agora is None:
+        agora = datetime.now()
+    tabelas, codigos = colunas_codificadas(analise_df, contratos_df, demanda_spt_df, docs_excluidos)
+    # nan_to_null: NaN conta como vazio (no polars o NaN é maior que qualquer número)
+    analise, contratos, demanda = (pl.from_pandas(tabelas[nome], nan_to_null=True)
+                                   for nome in ('analise', 'contratos', 'demanda'))
+
+    doc = pl.when(pl.col('doc') >= 0).then(pl.col('doc'))
+    minimo = pl.col('minimo')
+    consumido = pl.col('fixado') - pl.col('pendente')
+
+    def distintos(condicao):
+        return doc.filter(condicao.fill_null(False)).drop_nulls().n_unique()
+
+    consultas = [
+        analise.lazy().select(
+            # n_unique conta o vazio como um valor a mais, como o total do pandas
+            doc.n_unique().alias('total_contratos'),
+            pl.col('valor').sum().alias('valor_total'),
+            pl.col('pendente').sum().alias('valor_pendente'),
+        ),
+        contratos.lazy().select(
+            distintos(pl.col('consumo_minimo').is_in(codigos['sim'])).alias('com_minimo'),
+            distintos(
+                minimo.is_not_null() & (consumido >= minimo) & ~pl.col('doc').is_in(codigos['docs_excluidos'])
+            ).alias('atingido'),
+        ),
+        demanda.lazy().select(pl.col('vigente').is_in(codigos['nao']).sum().alias('sem_contrato')),
+    ]
+    resultado = {}
+    for tabela in pl.collect_all(consultas):
+        resultado.update(tabela.row(0, named=True))
+    return _indicadores(resultado, analise_df, agora, indice_vencimento, histograma)
+
+
+def _indicadores(resultado, analise_df, agora, indice_vencimento, histograma):
+    # Mesmas chaves e tipos de calcular_analise_descritiva; faixas de consumo e vencimentos
+    # vêm do histograma e do índice (montados aqui se não vierem prontos), como no pandas
+    if histograma is None:
+        histograma = HistogramaFarol(analise_df['Doc.compra'], analise_df['Farol SALDO'])
+    if indice_vencimento is None:
+        indice_vencimento = IndiceVencimento(analise_df['FimValid/'])
+    abaixo_60, acima_60, acima_80 = histograma.contar((LIMITE_CONSUMO_MEDIO, LIMITE_CONSUMO_ALTO))
+    return {
+        "Contratos Prox. Vencimento": indice_vencimento.contar_proximos(DIAS_PROX_VENCIMENTO, agora),
+        "Consumo Abaixo de 60%": int(abaixo_60),
+        "Consumo Acima de 60%": int(acima_60),
+        "Consumo Acima de 80%": int(acima_80),
+        "Total de Contratos": int(resultado['total_contratos']),
+        "Valor Total dos Contratos (Bi)": float(resultado['valor_total'] or 0) / 1e9,
+        "Valor Global Pendente (Bi)": float(resultado['valor_pendente'] or 0) / 1e9,
+        "Contratos com Consumo Mínimo": int(resultado['com_minimo']),
+        "Consumo Mínimo Atingido": int(resultado['atingido']),
+        "Materiais Sem Contrato": int(resultado['sem_contrato']),
+    }
+
+
+MOTORES = {
+    'pandas': calcular_analise_descritiva,
+    'duckdb': calcular_duckdb,
+    'polars': calcular_polars,
+}
+
+# Pacote de cada motor opcional (None se não estiver instalado)
+PACOTES_OPCIONAIS = {'duckdb': duckdb, 'polars': pl}
+
+
+def disponivel(motor):
+    return motor in MOTORES and PACOTES_OPCIONAIS.get(motor, pd) is not None
+
+
+def motor_configurado():
+    """Motor da variável DASH_MOTOR, ou o pandas se ela não existir ou o motor não estiver disponível."""
+    motor = os.environ.get('DASH_MOTOR', MOTOR_REFERENCIA).strip().lower()
+    if not disponivel(motor):
+        logger.warning("Motor de cálculo %r indisponível; usando %s", motor, MOTOR_REFERENCIA)
+        return MOTOR_REFERENCIA
+    return motor
+
+
+def diferencas(referencia, resultado):
+    """{indicador: (referência, resultado)} para os indicadores que não batem."""
+    diferentes = {}
+    for indicador, esperado in referencia.items():
+        valor = resultado.get(indicador)
+        if indicador in INDICADORES_VALOR:
+            igual = valor is not None and math.isclose(esperado, valor, rel_tol=TOLERANCIA_VALOR, abs_tol=1e-12)
+        else:
+            igual = esperado == valor
+        if not igual:
+            diferentes[indicador] = (esperado, valor)
+    return diferentes
+
+
+def calcular_indicadores(analise_df, contratos_df, demanda_spt_df, agora=None, motor=None, **opcoes):
+    """
+    ``calcular_analise_descritiva`` no motor pedido (padrão: o de DASH_MOTOR).
+
+    Aceita as mesmas opções (docs_excluidos, indice_vencimento, histograma) e devolve o mesmo dicionário.
+    """
+    if motor is None:
+        motor = motor_configurado()
+    if agora is None:
+        agora = datetime.now()
+    analise_descritiva = MOTORES[motor](analise_df, contratos_df, demanda_spt_df, agora=agora, **opcoes)
+    if motor != MOTOR_REFERENCIA and os.environ.get('DASH_MOTOR_VERIFICAR') == '1':
+        referencia = calcular_analise_descritiva(analise_df, contratos_df, demanda_spt_df, agora=agora, **opcoes)
+        diferentes = diferencas(referencia, analise_descritiva)
+        if diferentes:
+            logger.error("Motor %s difere do pandas: %s", motor, diferentes)
+    return analise_descritiva
@@ -0,0 +1,106 @@
+"""
+Página leve servida enquanto os dados são carregados em segundo plano.
+
+O servidor sobe e responde logo, sem esperar pandas, plotly e a planilha; a página de
+espera pergunta ao servidor a cada segundo se os dados ficaram prontos e, quando
+ficam, o navegador recarrega a página (que então vem com o dashboard completo).
+"""
+import logging
+import threading
+
+from dash import dcc, html, no_update
+from dash.dependencies import Input, Output
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (ms) entre as perguntas da página de espera ao servidor
+INTERVALO_ESPERA = 1000
+
+_bases_importadas = threading.Event()
+
+
+def _importar_bases():
+    # O plotly procura o numpy e o pandas em sys.modules ao serializar as respostas do
+    # Dash; importados pela metade (pela thread de carga), a serialização falharia
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    _bases_importadas.set()
+
+
+def layout_espera():
+    return html.Div([
+        dcc.Interval(id='espera_dados', interval=INTERVALO_ESPERA),
+        html.H1("Carregando os dados dos contratos...", style={
+            'textAlign': 'center',
+            'color': '#005a8d',
+            'backgroundColor': '#F0F8FF',
+            'padding': '10px',
+            'border-radius': '10px',
+            'marginTop': '40px',
+            'fontSize': '24px'
+        }),
+        html.P("A página será atualizada assim que os indicadores estiverem prontos.",
+               style={'textAlign': 'center', 'color': '#888888', 'fontSize': '14px'}),
+    ])
+
+
+def registrar_espera(app, pronto):
+    """
+    Callbacks da página de espera: ``pronto()`` diz se os dados já foram carregados.
+
+    As requisições só são atendidas depois que o numpy e o pandas terminam de ser
+    importados (em paralelo com a subida do servidor, bem antes da carga dos dados).
+    """
+    threading.Thread(target=_importar_bases, name='importacao-bases', daemon=True).start()
+
+    @app.server.before_request
+    def aguardar_bases():
+        _bases_importadas.wait()
+
+    # O servidor desliga o intervalo quando os dados ficam prontos e o navegador recarrega
+    @app.callback(Output('espera_dados', 'disabled'), Input('espera_dados', 'n_intervals'), prevent_initial_call=True)
+    def verificar_dados(n):
+        return True if pronto() else no_update
+
+    app.clientside_callback(
+        """
+        function(desligado) {
+            if (desligado) {
+                window.location.reload();
+            }
+        }
+        """,
+        Input('espera_dados', 'disabled'),
+        prevent_initial_call=True,
+    )
+
+
+class PreparoEmSegundoPlano:
+    """Executa ``preparar()`` uma vez numa thread e guarda o resultado."""
+
+    def __init__(self, preparar):
+        self.preparar = preparar
+        self.resultado = None
+        self._pronto = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name='preparo-dashboard', daemon=True)
+
+    def _executar(self):
+        try:
+            self.resultado = self.preparar()
+        except Exception:
+            # A página continua em espera; o erro fica no log do servidor
+            logger.exception("Falha ao preparar os dados do dashboard")
+            return
+        self._pronto.set()
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    @property
+    def pronto(self):
+        return self._pronto.is_set()
+
+    def esperar(self, timeout=None):
+        self._pronto.wait(timeout)
+        return self.resultado
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# Resultados da regra "Consumo Mínimo Atingido" (medida DAX do Power BI)
+CONSUMO_MINIMO_ATINGIDO = "Consumo mínimo atingido"
+CONSUMO_MINIMO_NAO_ATINGIDO = "Consumo mínimo não atingido"
+SEM_VALOR_MINIMO = "Não tem valor mínimo"
+
+
+def _float(serie):
+    return serie.to_numpy(dtype=float, na_value=np.nan)
+
+
+def avaliar_regra(condicoes, resultados, padrao, index=None, nome=None):
+    """
+    Equivalente vetorizado de SWITCH(TRUE(), cond1, res1, cond2, res2, ..., padrao) do DAX.
+
+    ``condicoes`` são máscaras booleanas do NumPy avaliadas em ordem: cada linha recebe
+    o resultado da primeira condição verdadeira, ou ``padrao`` se nenhuma for.
+    O resultado é uma coluna categórica (um código int8 por linha).
+    """
+    categorias = [*resultados, padrao]
+    tamanho = len(index) if index is not None else len(condicoes[0])
+    codigos = np.full(tamanho, len(resultados), dtype=np.int8)
+    # Aplica de trás para frente para que a primeira condição verdadeira prevaleça
+    for codigo in range(len(condicoes) - 1, -1, -1):
+        codigos[condicoes[codigo]] = codigo
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias), index=index, name=nome)
+
+
+def mascara_docs(codigos, distintos, docs):
+    """
+    Marca as linhas cujo Doc.compra está no conjunto ``docs``.
+
+    Recebe a coluna já fatorada (``pd.factorize``), então só os valores distintos
+    são procurados no conjunto.
+    """
+    no_conjunto = np.fromiter((doc in docs for doc in distintos), dtype=bool, count=len(distintos))
+    # O False extra no fim atende o código -1 (Doc.compra vazio)
+    return np.append(no_conjunto, False)[codigos]
+
+
+def classificar_consumo_minimo(contratos_df):
+    """
+    Regra DAX "Consumo Mínimo Atingido" para cada linha da aba Contratos:
+      - tem valor mínimo e valor consumido (Val.fixado - ValGlPend.) >= valor mínimo: atingido
+      - tem valor mínimo: não atingido
+      - senão: não tem valor mínimo
+    """
+    valor_minimo = _float(contratos_df['Valor Consumo Mínimo'])
+    valor_consumido = _float(contratos_df['Val.fixado']) - _float(contratos_df['ValGlPend.'])
+    tem_minimo = ~np.isnan(valor_minimo)
+    return avaliar_regra(
+        [tem_minimo & (valor_consumido >= valor_minimo), tem_minimo],
+        [CONSUMO_MINIMO_ATINGIDO, CONSUMO_MINIMO_NAO_ATINGIDO],
+        SEM_VALOR_MINIMO,
+        index=contratos_df.index,
+        nome='Consumo Mínimo Atingido',
+    )
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # sem pyarrow o carregador simplesmente lê sempre do Excel
+    pa = None
+    feather = None
+
+# Chave dos metadados do arquivo onde fica a impressão digital da aba de origem
+CHAVE_DIGITAL = b'digital_origem'
+
+
+def disponivel():
+    return feather is not None
+
+
+def pasta_snapshot(caminho_xlsx):
+    # Os snapshots ficam ao lado do xlsx: "BASE BI CONTRATOS.xlsx" -> "BASE BI CONTRATOS.snapshot/"
+    base, _ = os.path.splitext(caminho_xlsx)
+    return base + '.snapshot'
+
+
+def caminho_snapshot(caminho_xlsx, aba):
+    return os.path.join(pasta_snapshot(caminho_xlsx), f'{aba}.feather')
+
+
+def ler_snapshot(caminho_xlsx, aba, digital):
+    """
+    Lê a aba do snapshot colunar (memory-map) se ele foi gerado a partir do mesmo
+    conteúdo da aba no xlsx atual. Retorna None se não houver snapshot válido.
+    """
+    if not disponivel():
+        return None
+    caminho = caminho_snapshot(caminho_xlsx, aba)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        tabela = feather.read_table(caminho, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(CHAVE_DIGITAL) != json.dumps(digital).encode():
+        return None
+    return tabela.to_pandas()
+
+
+def gravar_snapshot(caminho_xlsx, aba, digital, df):
+    """Grava a aba já tratada em formato Feather (Arrow IPC). Falhas de escrita são ignoradas."""
+    if not disponivel():
+        return False
+    caminho = caminho_snapshot(caminho_xlsx, aba)
+    temporario = None
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Nome temporário único: vários workers ou processos do lote podem gravar a mesma aba
+        descritor, temporario = tempfile.mkstemp(prefix=f'{aba}.', suffix='.tmp', dir=os.path.dirname(caminho))
+        os.close(descritor)
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        metadados = dict(tabela.schema.metadata or {})
+        metadados[CHAVE_DIGITAL] = json.dumps(digital).encode()
+        # Sem compressão para que a leitura possa usar memory-map direto
+        feather.write_feather(tabela.replace_schema_metadata(metadados), temporario,
+                              compression='uncompressed')
+        os.replace(temporario, caminho)
+    except (OSError, pa.ArrowException):
+        if temporario is not None and os.path.exists(temporario):
+            os.remove(temporario)
+        return False
+    return True
@@ -3,26 +3,68 @@ import streamlit.components.v1 as components
 from threading import Thread
 import os
 import time
+import urllib.error
+import urllib.request
 
-# Função para rodar o servidor Dash
-def run_dash():
-    os.system("python dash_contratos_materiais_app.py")
+from werkzeug.serving import make_server
 
-# Executar o servidor Dash em uma thread separada
-thread = Thread(target=run_dash)
-thread.daemon = True
+DASH_HOST = "127.0.0.1"
+DASH_PORTA = 8055
+DASH_URL = f"http://{DASH_HOST}:{DASH_PORTA}"
 
-thread.start()
+# Servidor Dash rodando dentro do próprio processo do Streamlit: um só interpretador,
+# uma só cópia dos dados. O cache_resource garante que ele sobe uma vez por processo,
+# mesmo com o Streamlit reexecutando este script a cada interação.
+@st.cache_resource
+def iniciar_dash():
+    from dash_contratos_materiais_app import app
 
-# Esperar um pouco para o servidor iniciar 
-import time
-time.sleep(5)
+    # make_server já deixa a porta escutando antes de retornar
+    servidor = make_server(DASH_HOST, DASH_PORTA, app.server, threaded=True)
+    thread = Thread(target=servidor.serve_forever, name="servidor-dash", daemon=True)
+    thread.start()
+    return servidor, thread
 
-# Título da página do Streamlit
-#st.title("Dashboard Contrato de Materiais Resumido")
+# Esperar o servidor Dash responder no endpoint de saúde (em vez de um tempo fixo)
+def esperar_dash(url, timeout=30, intervalo=0.05):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resposta:
+                if resposta.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(intervalo)
+    return False
 
-# Mostrar o Dash no Streamlit
-components.iframe("http://127.0.0.1:8055", width=1280, height=768, scrolling=False)
+# Com DASH_ESTATICO apontando para uma página exportada com
+# 'python exportacao.py --saida <pasta> --autocontido', a página é mostrada direto,
+# sem subir o servidor Dash
+pagina_estatica = os.environ.get('DASH_ESTATICO')
+if pagina_estatica:
+    if os.path.isdir(pagina_estatica):
+        pagina_estatica = os.path.join(pagina_estatica, 'index.html')
+    with open(pagina_estatica, encoding='utf-8') as arquivo:
+        components.html(arquivo.read(), width=1280, height=768, scrolling=True)
+    st.stop()
 
+try:
+    servidor, thread = iniciar_dash()
+    # Se a thread do servidor morreu, descarta o servidor antigo e sobe outro
+    if not thread.is_alive():
+        servidor.server_close()
+        iniciar_dash.clear()
+        servidor, thread = iniciar_dash()
+except OSError as erro:
+    st.error(f"Não foi possível iniciar o servidor do dashboard na porta {DASH_PORTA}: {erro}")
+    st.stop()
 
+if not esperar_dash(f"{DASH_URL}/saude"):
+    st.error("O servidor do dashboard não respondeu a tempo.")
 
+# Título da página do Streamlit
+#st.title("Dashboard Contrato de Materiais Resumido")
+
+# Mostrar o Dash no Streamlit
+components.iframe(DASH_URL, width=1280, height=768, scrolling=False)
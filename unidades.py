@@ -0,0 +1,202 @@
+"""
+Várias planilhas num só servidor: uma por unidade de negócio.
+
+Com DASH_PLANILHAS apontando para uma pasta, cada xlsx dela é uma unidade ('Sul.xlsx'
+-> 'Sul'), escolhida pela URL: /unidade/Sul ou ?unidade=Sul. Sem a variável, a única
+unidade é a planilha do app.py (DASH_PLANILHA) e tudo funciona como antes.
+
+Os dados de cada unidade (abas, snapshot, cubo, tabela de detalhe) ficam num cache LRU
+limitado pela memória estimada (DASH_CACHE_MB). Ao passar do limite, as unidades usadas
+há mais tempo são descarregadas (a thread de atualização delas para) e voltam a ser
+carregadas no próximo acesso, com a página de espera. A unidade padrão nunca sai.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from flask import has_request_context, request
+
+from instrumentacao import ACESSOS_UNIDADE, BYTES_UNIDADES, REMOCOES_UNIDADE, UNIDADES_CARREGADAS
+
+logger = logging.getLogger(__name__)
+
+# Parâmetro e prefixo de caminho que escolhem a unidade na URL
+PARAMETRO_UNIDADE = 'unidade'
+PREFIXO_UNIDADE = '/unidade/'
+
+# Limite padrão (MB) da memória dos dados carregados (DASH_CACHE_MB)
+LIMITE_CACHE_MB = 1024
+
+# Intervalo mínimo (segundos) entre duas listagens da pasta em busca de planilhas novas
+INTERVALO_LISTAGEM = 10
+
+
+def nome_unidade(caminho):
+    # 'planilhas/Sul.xlsx' -> 'Sul'
+    return os.path.splitext(os.path.basename(caminho))[0]
+
+
+def planilhas_da_pasta(pasta):
+    """{unidade: caminho} dos xlsx da pasta (sem os temporários do Excel, ~$...)."""
+    return {
+        nome_unidade(nome): os.path.join(pasta, nome)
+        for nome in sorted(os.listdir(pasta))
+        if nome.lower().endswith('.xlsx') and not nome.startswith('~$')
+    }
+
+
+def unidade_da_url(url):
+    """Unidade de uma URL: ?unidade=Sul tem prioridade sobre /unidade/Sul. None se não houver."""
+    partes = urlsplit(url)
+    valores = parse_qs(partes.query).get(PARAMETRO_UNIDADE)
+    if valores:
+        return valores[0]
+    if partes.path.startswith(PREFIXO_UNIDADE):
+        return unquote(partes.path[len(PREFIXO_UNIDADE):].strip('/')) or None
+    return None
+
+
+def unidade_da_requisicao():
+    """
+    Unidade pedida na requisição atual. O layout (_dash-layout) e os callbacks são
+    buscados pelo navegador a partir da página, então a unidade vem da URL dela (Referer).
+    """
+    if not has_request_context():
+        return None
+    unidade = unidade_da_url(request.full_path)
+    if unidade is None and request.referrer:
+        unidade = unidade_da_url(request.referrer)
+    return unidade
+
+
+def _bytes(objeto):
+    # DataFrames, séries e arrays (memória real, com os textos); dicts e listas deles
+    if hasattr(objeto, 'memory_usage'):
+        uso = objeto.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+    if hasattr(objeto, 'nbytes'):
+        return int(objeto.nbytes)
+    if isinstance(objeto, dict):
+        return sum(_bytes(valor) for valor in objeto.values())
+    if isinstance(objeto, (list, tuple)):
+        return sum(_bytes(valor) for valor in objeto)
+    return 0
+
+
+def bytes_dados(atualizador):
+    """Memória estimada dos dados de uma unidade: abas carregadas e as estruturas do snapshot."""
+    total = 0
+    if not callable(atualizador.carregador):
+        total += _bytes(atualizador.carregador.dados)
+    snapshot = atualizador.snapshot
+    if snapshot is not None:
+        for parte in (snapshot.indice_vencimento, snapshot.cubo, snapshot.detalhe, snapshot.histograma):
+            total += sum(_bytes(valor) for valor in vars(parte).values())
+    return total
+
+
+class _Entrada:
+    def __init__(self, atualizador):
+        self.atualizador = atualizador
+        self.versao = None  # versão dos dados em que ``bytes`` foi medido
+        self.bytes = 0
+
+
+class CacheUnidades:
+    """
+    Atualizadores (AtualizadorDashboard) das unidades carregadas, em ordem de uso.
+
+    ``criar_atualizador(caminho)`` cria e inicia o atualizador de uma planilha; a carga
+    acontece na thread dele, então um acesso a uma unidade nova só custa criá-lo. A
+    memória de cada unidade é medida de novo quando a versão dos dados dela muda.
+    """
+
+    def __init__(self, planilhas, criar_atualizador, padrao=None, limite_bytes=LIMITE_CACHE_MB * 2**20, pasta=None):
+        self.planilhas = dict(planilhas)
+        self.criar_atualizador = criar_atualizador
+        self.padrao = padrao if padrao is not None else next(iter(self.planilhas))
+        self.limite_bytes = limite_bytes
+        self.pasta = pasta
+        self._carregadas = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_listagem = threading.Lock()
+        self._listada_em = time.monotonic()
+
+    def unidades(self):
+        return sorted(self.planilhas, key=str.casefold)
+
+    def obter(self, unidade=None):
+        """Atualizador da unidade (a padrão se None). KeyError se a unidade não existir."""
+        if unidade is None:
+            unidade = self.padrao
+        if unidade not in self.planilhas and self.pasta is not None:
+            # Pode ser uma planilha nova na pasta desde a última listagem
+            self._listar_pasta()
+        with self._lock:
+            entrada = self._carregadas.get(unidade)
+            if entrada is not None:
+                self._carregadas.move_to_end(unidade)
+                ACESSOS_UNIDADE.incrementar(resultado='acerto')
+            else:
+                if unidade not in self.planilhas:
+                    raise KeyError(unidade)
+                ACESSOS_UNIDADE.incrementar(resultado='falta')
+                entrada = self._carregadas[unidade] = _Entrada(self.criar_atualizador(self.planilhas[unidade]))
+            self._remover_excesso(unidade)
+            return entrada.atualizador
+
+    def _listar_pasta(self):
+        # Fora do lock do cache e no máximo uma vez a cada INTERVALO_LISTAGEM: nomes de
+        # unidades inexistentes em sequência não travam os outros acessos
+        with self._lock_listagem:
+            if time.monotonic() - self._listada_em < INTERVALO_LISTAGEM:
+                return
+            self._listada_em = time.monotonic()
+        self.planilhas = planilhas_da_pasta(self.pasta)
+
+    def consultar(self, unidade=None):
+        """
+        Atualizador da unidade se ela já estiver carregada, senão None. Não conta acesso,
+        não muda a ordem de uso nem cria atualizador (para validar ETags, por exemplo).
+        """
+        with self._lock:
+            entrada = self._carregadas.get(self.padrao if unidade is None else unidade)
+        return entrada.atualizador if entrada is not None else None
+
+    def _remover_excesso(self, em_uso):
+        # Mede as unidades com dados novos e descarrega as menos usadas até caber no limite
+        total = 0
+        for entrada in self._carregadas.values():
+            snapshot = entrada.atualizador.snapshot
+            versao = snapshot.versao if snapshot is not None else None
+            if versao != entrada.versao:
+                entrada.versao, entrada.bytes = versao, bytes_dados(entrada.atualizador)
+            total += entrada.bytes
+        for unidade in list(self._carregadas):
+            if total <= self.limite_bytes:
+                break
+            if unidade in (em_uso, self.padrao):
+                continue
+            entrada = self._carregadas.pop(unidade)
+            entrada.atualizador.parar(esperar=False)
+            total -= entrada.bytes
+            REMOCOES_UNIDADE.incrementar()
+            logger.info("Unidade %s descarregada (%.0f MB)", unidade, entrada.bytes / 2**20)
+        UNIDADES_CARREGADAS.definir(len(self._carregadas))
+        BYTES_UNIDADES.definir(total)
+
+    def atualizadores(self):
+        """Atualizadores das unidades carregadas (para parar e reiniciar as threads em volta de um fork)."""
+        with self._lock:
+            return [entrada.atualizador for entrada in self._carregadas.values()]
+
+    def estado(self):
+        """Unidades carregadas, da menos para a mais usada recentemente, com a memória medida."""
+        with self._lock:
+            return [
+                {'unidade': unidade, 'carregada': entrada.atualizador.snapshot is not None, 'bytes': entrada.bytes}
+                for unidade, entrada in self._carregadas.items()
+            ]
@@ -0,0 +1,17 @@
+# Ponto de entrada WSGI para servir o dashboard em produção com vários workers:
+#     gunicorn -c gunicorn.conf.py wsgi:server
+# Com preload (ver gunicorn.conf.py) a planilha é lida e os indicadores calculados uma
+# única vez no processo mestre, antes do fork; os workers compartilham essa memória
+# por copy-on-write.
+from app import app, atualizador, unidades
+
+# O app.py não espera a primeira carga (serve a página de espera); aqui ela precisa
+# terminar antes do fork, para os workers já nascerem com os dados
+atualizador.esperar()
+# Sem threads de atualização no mestre: um fork no meio de uma recarga herdaria locks
+# presos (do carregador ou do pool de processos). Cada worker as reinicia no post_fork.
+# O mestre não atende requisições, então em geral só a unidade padrão está carregada
+for atualizador_unidade in unidades.atualizadores():
+    atualizador_unidade.parar()
+
+server = app.server